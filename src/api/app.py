@@ -6,6 +6,7 @@ from src.api.routes import (
     context_search,
     context_retrieve,
     stage1,          # ← add this
+    symbols,
 )
 
 app = FastAPI(title="SourceSherpa API", version="0.1.0")
@@ -20,4 +21,5 @@ app.add_middleware(
 app.include_router(health.router)
 app.include_router(context_search.router)
 app.include_router(context_retrieve.router)
-app.include_router(stage1.router)   # now resolvable
\ No newline at end of file
+app.include_router(stage1.router)   # now resolvable
+app.include_router(symbols.router)
\ No newline at end of file
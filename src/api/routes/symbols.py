@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+
+from src.config.settings import settings
+from src.storage.symbol_index import SymbolIndex, shared_index
+
+router = APIRouter(prefix="/v1", tags=["symbols"])
+
+class Symbol(BaseModel):
+    name: str
+    kind: Optional[str] = None
+    repo: Optional[str] = None
+    path: str
+    lang: Optional[str] = None
+    container: Optional[str] = None
+    start_byte: Optional[int] = None
+    end_byte: Optional[int] = None
+    start_line: Optional[int] = None
+    end_line: Optional[int] = None
+
+class GraphNode(Symbol):
+    id: int
+    hop: int
+
+class GraphEdge(BaseModel):
+    src: int
+    dst: Optional[int] = None
+    kind: str
+    name: str
+
+class Graph(BaseModel):
+    nodes: List[GraphNode]
+    edges: List[GraphEdge]
+    truncated: bool
+
+def get_symbols() -> SymbolIndex:  # dependency
+    try:
+        return shared_index(settings.symbol_index_path)
+    except Exception as e:
+        raise HTTPException(503, detail=f"Symbol index unavailable: {e}")
+
+@router.get("/symbols", response_model=List[Symbol])
+def lookup_symbols(
+    name:   Optional[str] = Query(None, description="Exact symbol name"),
+    prefix: Optional[str] = Query(None, min_length=1, description="Case-insensitive name prefix"),
+    repo:   Optional[str] = None,
+    kind:   Optional[str] = None,
+    k:      int = Query(50, ge=1, le=500),
+    symbols: SymbolIndex = Depends(get_symbols),
+):
+    """Where symbols are defined, from the extractor's symbol index (no Qdrant/LLM)."""
+    if (name is None) == (prefix is None):
+        raise HTTPException(400, detail="Pass exactly one of 'name' or 'prefix'")
+    if name is not None:
+        return symbols.lookup(name, repo=repo, kind=kind, limit=k)
+    return symbols.prefix(prefix, repo=repo, kind=kind, limit=k)
+
+
+@router.get("/symbols/graph", response_model=Graph)
+def symbol_graph(
+    name:      Optional[str] = Query(None, description="Start at the symbols with this exact name"),
+    id:        Optional[int] = Query(None, description="Start at this symbol id (from an earlier graph)"),
+    repo:      Optional[str] = None,
+    kind:      Optional[str] = None,
+    hops:      int = Query(1, ge=1, le=4),
+    direction: Literal["out", "in", "both"] = "out",
+    k:         int = Query(200, ge=1, le=2000, description="Maximum number of nodes"),
+    symbols: SymbolIndex = Depends(get_symbols),
+):
+    """k-hop neighborhood in the reference graph (calls, inheritance, type usages, imports)."""
+    if (name is None) == (id is None):
+        raise HTTPException(400, detail="Pass exactly one of 'name' or 'id'")
+    start = [id] if id is not None else symbols.symbol_ids(name, repo=repo, kind=kind)
+    return symbols.neighborhood(start, hops=hops, direction=direction, max_nodes=k)
@@ -14,6 +14,11 @@ class Settings:
         self.mongodb_username = os.getenv("MONGODB_USERNAME")
         self.mongodb_password = os.getenv("MONGODB_PASSWORD")
         self.mongodb_database = os.getenv("MONGODB_DATABASE", "sourcesherpa")
+        # Written by sidecar_ast_extractor.py into its --out directory
+        self.symbol_index_path = os.getenv("SYMBOL_INDEX_PATH", "generated/ast_output/output/symbols.sqlite")
+        # Last pattern set read from Mongo, for offline Stage-1 runs
+        self.pattern_cache_path = os.getenv("PATTERN_CACHE_PATH", "generated/ast_output/patterns.snapshot.json")
+        self.pattern_refresh_seconds = float(os.getenv("PATTERN_REFRESH_SECONDS", "60"))
         
     @property
     def mongodb_uri(self) -> str:
@@ -1,19 +1,85 @@
-from fastapi import FastAPI, UploadFile, HTTPException
+from fastapi import FastAPI, UploadFile, HTTPException, File, Form
+from fastapi.responses import JSONResponse, StreamingResponse
 from tree_sitter import Parser, Language
-import uvicorn, os
+from concurrent.futures import ThreadPoolExecutor
+import uvicorn, os, json, asyncio, threading
 from typing import List
 import traceback
+from queries import compile_query, extract_symbols
 
 LIB = os.getenv("TS_LIB", "my-languages.so")
 LANG_CACHE = {}
+QUERY_CACHE = {}
+LOAD_ERRORS = {}
+SUPPORTED = ["c_sharp","typescript","tsx","css","html","javascript","json"]  # removed 'yaml'
+
+# One uvicorn worker process per core by default; each runs its own parse threads
+WORKERS = int(os.getenv("TS_WORKERS", os.cpu_count() or 1))
+PARSE_THREADS = int(os.getenv("TS_PARSE_THREADS", "4"))
+PARSE_POOL = ThreadPoolExecutor(max_workers=PARSE_THREADS, thread_name_prefix="parse")
+_local = threading.local()
 
 def lang(name: str):
     if name not in LANG_CACHE:
         LANG_CACHE[name] = Language(LIB, name)
     return LANG_CACHE[name]
 
+def get_parser(lang_id: str) -> Parser:
+    """Parsers are not thread-safe, so each thread keeps one per language."""
+    parsers = getattr(_local, "parsers", None)
+    if parsers is None:
+        parsers = _local.parsers = {}
+    if lang_id not in parsers:
+        parser = Parser(); parser.set_language(lang(lang_id))
+        parsers[lang_id] = parser
+    return parsers[lang_id]
+
 app = FastAPI()
 
+def _warm_thread(barrier: threading.Barrier) -> None:
+    # The barrier holds each task until all have started, one per pool thread
+    barrier.wait(timeout=60)
+    for lang_id in QUERY_CACHE:
+        get_parser(lang_id).parse(b"")
+
+@app.on_event("startup")
+def warm_up():
+    """
+    Load every supported grammar and compile its symbol query once per
+    process, then build the parsers of every `PARSE_POOL` thread, so `/ready`
+    only answers once no request pays for that.
+    """
+    for lang_id in SUPPORTED:
+        try:
+            QUERY_CACHE[lang_id] = compile_query(lang(lang_id), lang_id)
+        except Exception as e:
+            LOAD_ERRORS[lang_id] = str(e)
+            log_error()
+    barrier = threading.Barrier(PARSE_THREADS)
+    for future in [PARSE_POOL.submit(_warm_thread, barrier) for _ in range(PARSE_THREADS)]:
+        try:
+            future.result()
+        except Exception as e:
+            LOAD_ERRORS["parse_pool"] = str(e)
+            log_error()
+
+@app.on_event("shutdown")
+def stop_pool():
+    PARSE_POOL.shutdown(wait=False, cancel_futures=True)
+
+@app.get("/ready")
+def ready():
+    """Readiness probe: 200 once every supported grammar is loaded, else 503."""
+    loaded = [l for l in SUPPORTED if l in QUERY_CACHE]
+    body = {
+        "status": "ready" if not LOAD_ERRORS and len(loaded) == len(SUPPORTED) else "loading",
+        "languages": loaded,
+        "errors": LOAD_ERRORS,
+        "pid": os.getpid(),
+        "parse_threads": PARSE_THREADS,
+    }
+    return JSONResponse(body, status_code=200 if body["status"] == "ready" else 503)
+
 @app.get("/logs")
 def get_logs():
     try:
@@ -22,26 +88,76 @@ def get_logs():
     except Exception as e:
         return {"logs": f"Error reading log: {e}"}
 
+def log_error() -> None:
+    tb = traceback.format_exc()
+    with open("/srv/sidecar_error.log", "a") as f:
+        f.write(f"\n---\n{tb}\n")
+
+def parse_features(code: bytes, filename: str, lang_id: str, include_source: bool = True) -> list:
+    """
+    Parse `code` and return one file-level feature carrying the symbols
+    (classes, methods, functions, CSS rules, HTML elements, ...) found by the
+    language's query, each with byte and point spans into `code`.
+    """
+    tree = get_parser(lang_id).parse(code)
+    if lang_id not in QUERY_CACHE:
+        QUERY_CACHE[lang_id] = compile_query(lang(lang_id), lang_id)
+    feat = {
+        "filepath": filename,
+        "lang": lang_id,
+        "symbols": extract_symbols(QUERY_CACHE[lang_id], tree.root_node, code),
+    }
+    if include_source:
+        feat["source"] = code.decode("utf-8", errors="replace")
+    return [feat]
+
 @app.post("/parse")
-async def parse(lang_id: str, file: UploadFile):
-    supported = ["c_sharp","typescript","tsx","css","html","javascript","json"]  # removed 'yaml'
-    if lang_id not in supported:
-        raise HTTPException(400, f"lang_id {lang_id} not supported. Supported: {supported}")
+async def parse(lang_id: str, file: UploadFile, include_source: bool = True):
+    if lang_id not in SUPPORTED:
+        raise HTTPException(400, f"lang_id {lang_id} not supported. Supported: {SUPPORTED}")
     try:
         code = await file.read()
-        parser = Parser(); parser.set_language(lang(lang_id))
-        parser.parse(code)  # parse for side effects, but don't assign unused variable
-        feat = {
-            "filepath": file.filename,
-            "lang": lang_id,
-            "source": code.decode("utf-8", errors="replace")
-        }
-        return {"features": [feat]}
+        feats = await asyncio.get_running_loop().run_in_executor(
+            PARSE_POOL, parse_features, code, file.filename, lang_id, include_source
+        )
+        return {"features": feats}
     except Exception as e:
-        tb = traceback.format_exc()
-        with open("/srv/sidecar_error.log", "a") as f:
-            f.write(f"\n---\n{tb}\n")
+        log_error()
         raise HTTPException(500, f"Internal error: {e}")
 
+@app.post("/parse/batch")
+def parse_batch(files: List[UploadFile] = File(...), lang_ids: List[str] = Form(...),
+                include_source: bool = True):
+    """
+    Parse many uploaded files in one request.
+
+    `lang_ids` is matched to `files` by position. Results are streamed back as
+    NDJSON, one line per file in upload order:
+    `{"index", "filepath", "lang", "features"}` or `{"index", "filepath", "error"}`.
+    A failure on one file never aborts the rest of the batch. Uploads are read
+    up front because FastAPI closes them once the handler returns; callers keep
+    batches size-bounded. The handler is sync, so FastAPI runs it (and the
+    result generator) off the event loop.
+    """
+    if len(files) != len(lang_ids):
+        raise HTTPException(400, f"Got {len(files)} files but {len(lang_ids)} lang_ids")
+    unsupported = sorted({l for l in lang_ids if l not in SUPPORTED})
+    if unsupported:
+        raise HTTPException(400, f"lang_id {unsupported} not supported. Supported: {SUPPORTED}")
+
+    uploads = [(file.filename, file.file.read()) for file in files]
+
+    def results():
+        for i, ((filename, code), lang_id) in enumerate(zip(uploads, lang_ids)):
+            row = {"index": i, "filepath": filename, "lang": lang_id}
+            try:
+                row["features"] = parse_features(code, filename, lang_id, include_source)
+            except Exception as e:
+                log_error()
+                row["error"] = f"Internal error: {e}"
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=9000)
+    uvicorn.run("app:app", host="0.0.0.0", port=9000, workers=WORKERS)
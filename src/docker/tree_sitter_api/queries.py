@@ -0,0 +1,123 @@
+"""
+Per-language tree-sitter queries for server-side symbol extraction.
+
+Every pattern captures the definition node as `@<kind>` and, optionally, its
+name as `@<kind>.name`. Patterns are test-compiled one by one so a node type
+missing from the grammar version in my-languages.so only drops that pattern.
+"""
+from typing import Dict, List, Optional
+
+MAX_NAME = 200
+
+PATTERNS: Dict[str, List[str]] = {
+    "c_sharp": [
+        "(namespace_declaration name: (_) @namespace.name) @namespace",
+        "(file_scoped_namespace_declaration name: (_) @namespace.name) @namespace",
+        "(class_declaration name: (identifier) @class.name) @class",
+        "(interface_declaration name: (identifier) @interface.name) @interface",
+        "(struct_declaration name: (identifier) @struct.name) @struct",
+        "(record_declaration name: (identifier) @record.name) @record",
+        "(enum_declaration name: (identifier) @enum.name) @enum",
+        "(method_declaration name: (identifier) @method.name) @method",
+        "(constructor_declaration name: (identifier) @constructor.name) @constructor",
+        "(property_declaration name: (identifier) @property.name) @property",
+    ],
+    "typescript": [
+        "(class_declaration name: (_) @class.name) @class",
+        "(abstract_class_declaration name: (_) @class.name) @class",
+        "(interface_declaration name: (_) @interface.name) @interface",
+        "(enum_declaration name: (_) @enum.name) @enum",
+        "(type_alias_declaration name: (_) @type.name) @type",
+        "(method_definition name: (_) @method.name) @method",
+        "(function_declaration name: (_) @function.name) @function",
+        "(lexical_declaration (variable_declarator name: (identifier) @function.name value: (arrow_function))) @function",
+        "(lexical_declaration (variable_declarator name: (identifier) @function.name value: (function_expression))) @function",
+        "(lexical_declaration (variable_declarator name: (identifier) @function.name value: (function))) @function",
+    ],
+    "javascript": [
+        "(class_declaration name: (_) @class.name) @class",
+        "(method_definition name: (_) @method.name) @method",
+        "(function_declaration name: (_) @function.name) @function",
+        "(lexical_declaration (variable_declarator name: (identifier) @function.name value: (arrow_function))) @function",
+        "(lexical_declaration (variable_declarator name: (identifier) @function.name value: (function_expression))) @function",
+        "(lexical_declaration (variable_declarator name: (identifier) @function.name value: (function))) @function",
+    ],
+    "css": [
+        "(rule_set (selectors) @rule.name) @rule",
+        "(media_statement) @media",
+        "(keyframes_statement (keyframes_name) @keyframes.name) @keyframes",
+    ],
+    "html": [
+        "(element (start_tag (tag_name) @element.name)) @element",
+        "(element (self_closing_tag (tag_name) @element.name)) @element",
+        "(script_element (start_tag (tag_name) @element.name)) @element",
+        "(style_element (start_tag (tag_name) @element.name)) @element",
+    ],
+    "json": [
+        "(document (object (pair key: (string) @key.name) @key))",
+    ],
+}
+PATTERNS["tsx"] = PATTERNS["typescript"]
+
+
+def compile_query(language, lang_id: str):
+    """
+    Compile the patterns for `lang_id` into a single Query, skipping any the
+    grammar rejects. Returns None when no pattern is usable.
+    """
+    valid = []
+    for pattern in PATTERNS.get(lang_id, []):
+        try:
+            language.query(pattern)
+            valid.append(pattern)
+        except Exception:
+            continue
+    return language.query("\n".join(valid)) if valid else None
+
+
+def _span(node) -> dict:
+    return {
+        "start_byte": node.start_byte,
+        "end_byte": node.end_byte,
+        "start_point": list(node.start_point),
+        "end_point": list(node.end_point),
+    }
+
+
+def extract_symbols(query, root, code: bytes) -> List[dict]:
+    """
+    Run `query` over the tree at `root` and return one record per definition:
+    `{kind, name, container, start_byte, end_byte, start_point, end_point}`.
+    `container` is the name of the closest enclosing symbol, if any.
+    """
+    if query is None:
+        return []
+    captures = [(node, *capture.partition(".")[::2]) for node, capture in query.captures(root)]
+    by_node: Dict[tuple, dict] = {}
+    for node, kind, part in captures:
+        key = (kind, node.start_byte, node.end_byte)
+        if not part and key not in by_node:
+            by_node[key] = {"kind": kind, "name": None, "container": None, **_span(node)}
+
+    # Names hang a few levels below their definition node; walk up to find it
+    for node, kind, part in captures:
+        if not part:
+            continue
+        owner: Optional[dict] = None
+        parent = node.parent
+        while parent is not None and owner is None:
+            owner = by_node.get((kind, parent.start_byte, parent.end_byte))
+            parent = parent.parent
+        if owner is not None and owner["name"] is None:
+            name = code[node.start_byte:node.end_byte].decode("utf-8", errors="replace")
+            owner["name"] = " ".join(name.split())[:MAX_NAME]
+
+    symbols = sorted(by_node.values(), key=lambda s: (s["start_byte"], -s["end_byte"]))
+    stack: List[dict] = []
+    for sym in symbols:
+        while stack and stack[-1]["end_byte"] <= sym["start_byte"]:
+            stack.pop()
+        if stack:
+            sym["container"] = stack[-1]["name"]
+        stack.append(sym)
+    return symbols
@@ -1,15 +1,23 @@
 """
 Table‑of‑Contents (Stage 1) extractor.
 
-Scans the JSON artifacts produced by your AST parser and produces a single
-`patterns_and_features.json` that maps every source file to one of the
-pattern “buckets” stored in MongoDB.
+Scans the JSON artifacts produced by your AST parser and maps every source
+file to one of the pattern “buckets” stored in MongoDB.
 
-* **Input  :** <repo‑root>/generated/output/**.json  (unchunked AST output)
-* **Output :** <repo‑root>/generated/ast_output/patterns_and_features.json
+* **Input  :** the path entries the AST parser noted in
+               <repo‑root>/generated/output/.extract-manifest, else
+               <repo‑root>/generated/output/**.json  (per-file AST output), or the
+               shard index under generated/output/shards/ when present
+* **Output :** <repo‑root>/generated/ast_output/features/part-*.jsonl, one row per
+               line, written by one worker process per group of repos with
+               duplicate rows dropped; `--format json` writes the single
+               <repo‑root>/generated/ast_output/patterns_and_features.json instead
 
 Run it after **`src/storage/pattern_loader.py`** so that the `patterns`
-collection is populated.
+collection is populated. Patterns are loaded on first use through
+`src/storage/pattern_store.py`, which falls back to the last snapshot it saved
+when MongoDB is unreachable (or with `--offline`) and picks up edits to the
+collection without a restart.
 
 Example:
 ```
@@ -19,14 +27,18 @@ python -m src.extractors.toc_extractor --debug
 from __future__ import annotations
 
 import argparse
-import fnmatch
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from pymongo import MongoClient
-from src.config.settings import settings
+from src.extractors.utils.manifest import ExtractionManifest, expand_runs, path_entries
+from src.extractors.utils.patterns import PatternIndex
+from src.extractors.utils.shards import SHARD_DIR, ShardReader, has_shards
+from src.extractors.utils.walker import walk_files
+from src.storage.pattern_store import PatternStore, default_store
 
 # -----------------------------------------------------------------------------
 # 📁 Filesystem locations
@@ -34,25 +46,35 @@ from src.config.settings import settings
 ROOT               = Path(__file__).resolve().parents[2]              # repo root
 INPUT_DIR          = ROOT / "generated" / "output"                  # AST parser out
 OUTPUT_DIR         = ROOT / "generated" / "ast_output"             # Stage‑1 out
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-OUT_FILE           = OUTPUT_DIR / "patterns_and_features.json"       # final file
+OUT_FILE           = OUTPUT_DIR / "patterns_and_features.json"       # --format json
+FEATURES_DIR       = OUTPUT_DIR / "features"                         # JSONL shards
 
 # -----------------------------------------------------------------------------
-# 🛢️ MongoDB
+# 🛢️ Patterns (MongoDB, loaded on first use)
 # -----------------------------------------------------------------------------
-mongo = MongoClient(settings.mongodb_uri)[settings.mongodb_database]
-PATTERNS: List[Dict[str, Any]] = list(mongo["patterns"].find({}, {"_id": 0}))
+# Set to a list to pin the patterns instead (tests, one-off runs)
+PATTERNS: Optional[List[Dict[str, Any]]] = None
 
 # -----------------------------------------------------------------------------
 # 🛠️ Extractor
 # -----------------------------------------------------------------------------
 class SummaryExtractor:
-    def __init__(self, debug: bool = False) -> None:
+    def __init__(self, debug: bool = False, store: Optional[PatternStore] = None,
+                 patterns: Optional[List[Dict[str, Any]]] = None) -> None:
         self.debug = debug
         self.features: List[Dict[str, Any]] = []
-        self._d(f"Loaded {len(PATTERNS)} patterns from MongoDB.")
-        if PATTERNS:
-            self._d(f"Sample pattern: {PATTERNS[0]}")
+        self.store = store
+        pinned = PATTERNS if patterns is None else patterns
+        self._pinned = PatternIndex(pinned) if pinned is not None else None
+
+    @property
+    def patterns(self) -> PatternIndex:
+        """The pinned `patterns` (or `PATTERNS`), else the store's current snapshot (reloaded when the collection changes)."""
+        if self._pinned is not None:
+            return self._pinned
+        if self.store is None:
+            self.store = default_store()
+        return self.store.snapshot().index
 
     def _d(self, msg: str) -> None:
         if self.debug:
@@ -72,52 +94,15 @@ class SummaryExtractor:
         return repo, repo.split("-")[0]
 
     def extract_entries(self, data: Any) -> List[str]:
-        entries: List[str] = []
-        if isinstance(data, list):
-            for e in data:
-                if isinstance(e, str):
-                    entries.append(e)
-                elif isinstance(e, dict):
-                    if 'filepath' in e:
-                        entries.append(e['filepath'])
-                    elif 'value' in e:
-                        entries.append(e['value'])
-        elif isinstance(data, dict):
-            for v in data.values():
-                if isinstance(v, str):
-                    entries.append(v)
-                elif isinstance(v, dict):
-                    if 'filepath' in v:
-                        entries.append(v['filepath'])
-                    elif 'value' in v:
-                        entries.append(v['value'])
-                elif isinstance(v, list):
-                    for x in v:
-                        if isinstance(x, str):
-                            entries.append(x)
-                        elif isinstance(x, dict):
-                            if 'filepath' in x:
-                                entries.append(x['filepath'])
-                            elif 'value' in x:
-                                entries.append(x['value'])
-        return entries
+        return path_entries(data)
 
     def find_pattern(self, file_path: str) -> Dict[str, Any] | None:
-        basename = Path(file_path).name.lower()
-        if basename.endswith('.json'):
-            basename = basename[:-5]
-        for pat in PATTERNS:
-            if not any(fnmatch.fnmatch(basename, g.lower()) for g in pat["file_patterns"]):
-                continue
-            if dirs := pat.get("directories"):
-                if not any(d.lower() in file_path.lower() for d in dirs):
-                    continue
-            return pat
-        return None
+        return self.patterns.find(file_path)
 
-    def create_feature(self, file_path: str, src_file: str, pat: Dict[str, Any] | None, repo: str, program: str) -> Dict[str, Any]:
+    def create_feature(self, file_path: str, src_file: str, pat: Dict[str, Any] | None, repo: str, program: str,
+                       digest: str | None = None) -> Dict[str, Any]:
         if pat:
-            return {
+            feature = {
                 "repo": repo,
                 "program": program,
                 "group": pat["keyword"],
@@ -127,37 +112,122 @@ class SummaryExtractor:
                 "source_file": src_file,
             }
         else:
-            return {
+            feature = {
                 "repo": repo,
                 "program": program,
                 "value": file_path,
                 "source_file": src_file
             }
+        if digest is not None:
+            feature["hash"] = digest
+        return feature
+
+    def summarize(self, file_path: str, src_file: str, digest: str | None = None) -> Dict[str, Any]:
+        repo, program = self._repo_program(file_path)
+        return self.create_feature(file_path, src_file, self.find_pattern(file_path), repo, program, digest)
+
+    def _entries(self, input_dir: Path, files: Dict[str, Dict[str, Any]]):
+        """
+        Yield `(source_file, entries, hash)` per output in `files` (see
+        `ast_outputs`). The extractor notes the entries of each output in its
+        manifest, so outputs (with their source text) are only read for
+        records it has not noted yet. `hash` is the source file's content
+        hash from the manifest, else from its records.
+        """
+        sharded = has_shards(input_dir)
+        reader = None
+        for key, entry in files.items():
+            output = entry.get("output")
+            if not output:
+                continue
+            src_file = Path(key).name + ".json" if sharded else Path(output).name
+            digest = entry.get("hash")
+            if "paths" in entry:
+                yield src_file, expand_runs(entry["paths"]), digest
+                continue
+            if not sharded:
+                with (input_dir / output).open(encoding="utf-8") as fp:
+                    data = json.load(fp)
+            else:
+                reader = reader or ShardReader(input_dir)
+                if key not in reader.index.entries:
+                    continue
+                data = reader.get(key)
+            yield src_file, self.extract_entries(data), digest or record_hash(data)
 
     def walk(self) -> None:
-        json_files = list(INPUT_DIR.rglob("*.json"))
-        self._d(f"Found {len(json_files)} AST JSON files under {INPUT_DIR}.")
+        patterns = self.patterns
+        self._d(f"Loaded {len(patterns)} patterns.")
+        if len(patterns):
+            self._d(f"Sample pattern: {patterns.patterns[0]}")
         sample_entries = []
-        for jf in json_files:
-            if not jf.is_file():
-                self._d(f"Skipping directory: {jf}")
-                continue
-            with jf.open(encoding="utf-8") as fp:
-                data = json.load(fp)
-            entries = self.extract_entries(data)
+        n_files = 0
+        for src_file, entries, digest in self._entries(INPUT_DIR, ast_outputs(INPUT_DIR)):
+            n_files += 1
             if not entries:
-                self._d(f"No string or dict entries found in {jf}")
+                self._d(f"No string or dict entries found in {src_file}")
             for path in entries:
                 if len(sample_entries) < 10:
                     sample_entries.append(path)
-                repo, program = self._repo_program(path)
-                pat = self.find_pattern(path)
-                feature = self.create_feature(path, jf.name, pat, repo, program)
-                self.features.append(feature)
+                self.features.append(self.summarize(path, src_file, digest))
+        self._d(f"Read {n_files} AST records under {INPUT_DIR}.")
         if sample_entries:
             self._d(f"Sample entries: {sample_entries}")
 
+    def partition(self, files: Dict[str, Dict[str, Any]], parts: int) -> List[Dict[str, Dict[str, Any]]]:
+        """
+        Split the outputs in `files` into at most `parts` groups of whole
+        repos, balanced by file count (largest repo first, into the lightest
+        group). Rows are deduplicated within a group; rows whose path entry
+        is a bare file name (per-file `/parse` output) do not name their repo,
+        so their duplicates can cross groups and are dropped by
+        `feature_loader` instead.
+        """
+        repos: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for key, entry in files.items():
+            if entry.get("output"):
+                repos.setdefault(self._repo_program(key)[0], {})[key] = entry
+        groups: List[Dict[str, Dict[str, Any]]] = [{} for _ in range(min(parts, len(repos)))]
+        loads = [0] * len(groups)
+        for repo in sorted(repos, key=lambda r: -len(repos[r])):
+            i = loads.index(min(loads))
+            groups[i].update(repos[repo])
+            loads[i] += len(repos[repo])
+        return groups
+
+    def run(self, workers: Optional[int] = None, out_dir: Optional[Path] = None) -> tuple[int, int]:
+        """
+        Summarize every AST output into JSONL shards under `out_dir`
+        (default FEATURES_DIR), one per group of repos, across `workers`
+        processes (default: one per core). Duplicate rows are dropped as they
+        are met. Returns `(written, duplicates)`.
+        """
+        out_dir = Path(out_dir or FEATURES_DIR)
+        workers = workers or os.cpu_count() or 1
+        patterns = self.patterns
+        self._d(f"Loaded {len(patterns)} patterns.")
+        groups = self.partition(ast_outputs(INPUT_DIR), workers)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for old in out_dir.glob("*.jsonl"):
+            old.unlink()
+        tasks = [(INPUT_DIR, group, out_dir / f"part-{i:05d}.jsonl", patterns.patterns)
+                 for i, group in enumerate(groups)]
+        if len(tasks) <= 1:
+            results = [summarize_part(*task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=len(tasks)) as executor:
+                results = list(executor.map(summarize_part, *zip(*tasks)))
+        written = sum(w for w, _ in results)
+        duplicates = sum(d for _, d in results)
+        try:
+            rel_path = out_dir.relative_to(ROOT)
+        except ValueError:
+            rel_path = out_dir
+        print(f"Wrote {written} features ➜ {rel_path}/ ({len(tasks)} shards, {duplicates} duplicates skipped)")
+        return written, duplicates
+
     def save(self) -> None:
+        OUT_FILE.parent.mkdir(parents=True, exist_ok=True)
         OUT_FILE.write_text(json.dumps(self.features, indent=2), encoding="utf-8")
         try:
             rel_path = OUT_FILE.relative_to(ROOT)
@@ -170,7 +240,7 @@ class SummaryExtractor:
         seen = {}
         dups = []
         for row in features:
-            key = (row.get("repo"), row.get("value"), row.get("hash"))
+            key = feature_key(row)
             if key in seen:
                 dups.append(row)
             else:
@@ -180,14 +250,79 @@ class SummaryExtractor:
                 print(json.dumps(dup, indent=2))
         # Print only duplicates, nothing else
 
+
+def feature_key(row: Dict[str, Any]) -> tuple:
+    """What makes two feature rows duplicates."""
+    return row.get("repo"), row.get("value"), row.get("hash")
+
+
+def record_hash(data: Any) -> str | None:
+    """The content hash the AST extractor stamped on the records in `data`, if any."""
+    records = data if isinstance(data, list) else [data]
+    return next((r["hash"] for r in records if isinstance(r, dict) and r.get("hash")), None)
+
+
+def ast_outputs(input_dir: Path) -> Dict[str, Dict[str, Any]]:
+    """
+    The AST outputs under `input_dir` as manifest entries (source path ->
+    `{output, paths?, ...}`): the extractor's manifest, else one entry per
+    shard index path or per-file JSON.
+    """
+    manifest = ExtractionManifest.load(input_dir, "")
+    if manifest.files:
+        return manifest.files
+    if has_shards(input_dir):
+        return {rel: {"output": SHARD_DIR} for rel in ShardReader(input_dir).paths()}
+    outputs = {}
+    for jf, _ in walk_files(input_dir, suffixes={".json"}):
+        rel = jf.relative_to(input_dir).as_posix()
+        outputs[rel[:-len(".json")]] = {"output": rel}
+    return outputs
+
+
+def summarize_part(input_dir: Path, files: Dict[str, Dict[str, Any]], out_path: Path,
+                   patterns: List[Dict[str, Any]]) -> tuple[int, int]:
+    """
+    Worker for `SummaryExtractor.run`: stream the features of `files` to the
+    JSONL shard `out_path`, skipping rows whose `feature_key` was already
+    written. Returns `(written, duplicates)`.
+    """
+    ext = SummaryExtractor(patterns=patterns)
+    seen = set()
+    written = duplicates = 0
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as fp:
+        for src_file, entries, digest in ext._entries(input_dir, files):
+            for path in entries:
+                row = ext.summarize(path, src_file, digest)
+                key = feature_key(row)
+                if key in seen:
+                    duplicates += 1
+                    continue
+                seen.add(key)
+                fp.write(json.dumps(row) + "\n")
+                written += 1
+    os.replace(tmp, out_path)
+    return written, duplicates
+
 # -----------------------------------------------------------------------------
 # 🚀 CLI
 # -----------------------------------------------------------------------------
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Generate patterns_and_features.json from AST output.")
+    parser = argparse.ArgumentParser(description="Summarize the AST output into pattern-matched features.")
     parser.add_argument("--debug", action="store_true", help="Verbose logging")
+    parser.add_argument("--offline", action="store_true",
+                        help="Use the saved pattern snapshot without contacting MongoDB")
+    parser.add_argument("--workers", "-w", type=int, default=None,
+                        help="Worker processes for the JSONL shards (default: one per core)")
+    parser.add_argument("--format", choices=["jsonl", "json"], default="jsonl",
+                        help="jsonl: deduplicated shards under generated/ast_output/features/ (default); "
+                             "json: one patterns_and_features.json")
     args = parser.parse_args()
 
-    ext = SummaryExtractor(debug=args.debug)
-    ext.walk()
-    ext.save()
+    ext = SummaryExtractor(debug=args.debug, store=PatternStore(offline=args.offline) if args.offline else None)
+    if args.format == "json":
+        ext.walk()
+        ext.save()
+    else:
+        ext.run(workers=args.workers)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Nodes/sec of the per-language extractors, before and after the query engine.
+
+Both sides do the same work on the same tree: each file is read and parsed
+once with the cached parser (parse time is reported separately), then
+"before" runs the old extractors' recursive `.children` walk, building the
+same features they did (with decoded `source`), and "after" runs
+`engine.extract_tree` with the module's query and fields, materializing
+every feature's `source` too. Throughput is the tree's node count over the
+extraction time (best of `--repeat` runs), and over parse plus extraction,
+per suffix.
+
+Usage:
+    python src/extractors/lang/benchmark.py --source pyxis [--limit 2000]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.extractors.lang import extract_css, extract_csharp, extract_html, extract_js
+from src.extractors.lang.engine import compile_query, extract_tree, iter_nodes
+from src.extractors.utils import robust_get_text
+from src.extractors.utils.spans import SourceBuffer
+from src.extractors.utils.tree_sitter_loader import get_parser
+from src.extractors.utils.walker import walk_files
+
+MODULES = {".cs": extract_csharp, ".ts": extract_js, ".tsx": extract_js, ".js": extract_js,
+           ".css": extract_css, ".html": extract_html}
+
+
+def _first(node, kind, txt, default=None):
+    return next((txt(c) for c in node.children if c.type == kind), default)
+
+
+def legacy_extract(code: bytes, root, filepath: Path, suffix: str) -> list:
+    """The pre-engine extractors: recurse through `.children` of every node."""
+    feats = []
+
+    def txt(n):
+        return robust_get_text(code, n, filepath)
+
+    def walk(n):
+        t = n.type
+        if suffix == ".cs" and t == "class_declaration":
+            meths = []
+            for body in n.children:
+                if body.type != "declaration_list":
+                    continue
+                for m in body.children:
+                    if m.type == "method_declaration" and any(
+                            ml.type == "modifier" and txt(ml).strip() == "public" for ml in m.children):
+                        name = _first(m, "identifier", txt)
+                        if name:
+                            meths.append(name)
+            feats.append({"filepath": str(filepath), "lang": "csharp", "type": "class",
+                          "name": _first(n, "identifier", txt), "public_methods": meths, "source": txt(n)})
+        elif suffix in (".ts", ".tsx", ".js") and t == "class_declaration":
+            meths = [txt(mn) for m in n.walk().node.children if m.type == "method_definition"
+                     for mn in m.children if mn.type == "property_identifier"]
+            feats.append({"filepath": str(filepath), "lang": "typescript", "type": "class",
+                          "name": _first(n, "identifier", txt), "methods": meths, "source": txt(n)})
+        elif suffix in (".ts", ".tsx", ".js") and t == "function_declaration":
+            feats.append({"filepath": str(filepath), "lang": "typescript", "type": "function",
+                          "name": _first(n, "identifier", txt), "source": txt(n)})
+        elif suffix == ".css" and t == "rule_set":
+            feats.append({"filepath": str(filepath), "lang": "css", "type": "rule_set",
+                          "selector": _first(n, "selectors", txt, ""), "source": txt(n)})
+        elif suffix == ".css" and t == "media_statement":
+            feats.append({"filepath": str(filepath), "lang": "css", "type": "media_statement",
+                          "source": txt(n)})
+        elif suffix == ".html" and t == "element":
+            tag, attrs = None, {}
+            for c in n.children:
+                if c.type != "start_tag":
+                    continue
+                for sc in c.children:
+                    if sc.type == "tag_name":
+                        tag = txt(sc)
+                    elif sc.type == "attribute":
+                        k = v = None
+                        for ac in sc.children:
+                            if ac.type == "attribute_name":
+                                k = txt(ac)
+                            elif ac.type == "quoted_attribute_value":
+                                v = txt(ac).strip('"')
+                        if k:
+                            attrs[k] = v
+            feats.append({"filepath": str(filepath), "lang": "html", "type": "element",
+                          "tag": tag, "attributes": attrs, "source": txt(n)})
+        for c in n.children:
+            walk(c)
+
+    walk(root)
+    return feats
+
+
+def engine_extract(code: bytes, tree, filepath: Path, module) -> list:
+    feats = extract_tree(SourceBuffer(code, filepath), tree, module.LANG_ID, module.LANG,
+                         module.QUERY, module.FIELDS, getattr(module, "CONVERT", None))
+    for feat in feats:
+        feat["source"] = feat.text()  # decode like the old extractors did
+    return feats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extractor nodes/sec benchmark")
+    parser.add_argument("--source", "-s", type=Path, required=True, help="Corpus root, e.g. pyxis")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many files")
+    parser.add_argument("--repeat", type=int, default=3, help="Extraction runs per file (best is kept)")
+    args = parser.parse_args()
+
+    files = []
+    for fp, _ in walk_files(args.source.resolve(), suffixes=set(MODULES)):
+        files.append(fp)
+        if args.limit and len(files) >= args.limit:
+            break
+
+    for module in set(MODULES.values()):
+        compile_query(module.LANG_ID, module.QUERY)  # once per process, not per file
+
+    stats = {}  # suffix -> [files, nodes, parse, before, after]
+    overflows = 0
+    for fp in files:
+        suffix = fp.suffix.lower()
+        module = MODULES[suffix]
+        code = fp.read_bytes()
+
+        t0 = time.perf_counter()
+        tree = get_parser(module.LANG_ID).parse(code)
+        parse = time.perf_counter() - t0
+
+        before = after = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            try:
+                legacy_extract(code, tree.root_node, fp, suffix)
+            except RecursionError:
+                overflows += 1
+            before = min(before, time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            engine_extract(code, tree, fp, module)
+            after = min(after, time.perf_counter() - t0)
+
+        row = stats.setdefault(suffix, [0, 0, 0.0, 0.0, 0.0])
+        for k, v in enumerate((1, sum(1 for _ in iter_nodes(tree)), parse, before, after)):
+            row[k] += v
+
+    def rate(nodes, seconds):
+        return f"{nodes / seconds if seconds else 0:>11,.0f}"
+
+    total = [sum(col) for col in zip(*stats.values())] if stats else [0] * 5
+    print(f"{'':8}{'files':>6}{'nodes':>9}   nodes/sec: {'before':>11}{'after':>11}"
+          f"   with parse: {'before':>11}{'after':>11}")
+    for suffix, (n, nodes, parse, before, after) in sorted(stats.items()) + [("total", total)]:
+        print(f"{suffix:8}{n:>6}{nodes:>9}              {rate(nodes, before)}{rate(nodes, after)}"
+              f"               {rate(nodes, parse + before)}{rate(nodes, parse + after)}")
+    if overflows:
+        print(f"before hit RecursionError {overflows} times")
+
+
+if __name__ == "__main__":
+    main()
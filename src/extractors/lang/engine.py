@@ -0,0 +1,212 @@
+"""
+Shared tree-sitter extraction engine for the per-language extractors.
+
+Each `extract_<lang>.py` module only declares a query and the fields it fills;
+this module parses the file with the process-wide cached parser, runs the
+compiled query once (matching happens in C, no Python visit per node) and
+assembles one feature per definition capture. Features are
+`src.extractors.utils.spans.Feature` records: they carry byte/point spans
+into the file's shared `SourceBuffer`, and `feat["source"]` is decoded only on
+access, so nested definitions do not copy the same text again.
+
+Query conventions, as in the sidecar's `queries.py`:
+
+- `@<type>` captures a definition node and becomes one feature of that type
+- `@<type>.<field>` captures a node belonging to the nearest enclosing
+  `@<type>` node; its text is stored under `field`
+
+`fields` gives each type's fields with their defaults, in output order. A list
+default collects every capture, a tuple default collects distinct captures
+(written out as a list; for references that repeat, like calls), a dict
+default expects `(key, value)` pairs, anything else keeps the first capture.
+`convert` maps `"<type>.<field>"` to a `fn(node, text) -> value` hook;
+returning None drops the capture.
+
+`extract_tree` runs the same extraction over an already parsed tree, for
+callers that keep trees around and re-parse incrementally (watch mode).
+
+With `timeout_micros`, a parse that runs longer raises `ParseTimeout` so
+pathological inputs (generated or macro-heavy headers) cannot stall a worker.
+
+`iter_nodes` is the non-recursive `TreeCursor` walk for code that has to look
+at every node; it never touches the Python recursion limit.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional
+
+from src.extractors.utils import robust_get_text
+from src.extractors.utils.spans import Feature, SourceBuffer, node_span
+from src.extractors.utils.tree_sitter_loader import get_language, get_parser
+
+Converter = Callable[[Any, str], Any]
+
+
+class ParseTimeout(TimeoutError):
+    """The parser gave up after its `timeout_micros` budget."""
+
+
+@lru_cache(maxsize=None)
+def compile_query(lang_id: str, source: str):
+    """Compile `source` for `lang_id` once per process."""
+    return get_language(lang_id).query(source)
+
+
+def iter_nodes(tree) -> Iterator[Any]:
+    """
+    Yield every node of `tree` in pre-order with a single `TreeCursor`,
+    without recursion or `.children` lists.
+    """
+    cursor = tree.walk()
+    while True:
+        yield cursor.node
+        if cursor.goto_first_child() or cursor.goto_next_sibling():
+            continue
+        while True:
+            if not cursor.goto_parent():
+                return
+            if cursor.goto_next_sibling():
+                break
+
+
+def _owners(defs: List[tuple], spans: List[tuple]) -> List[Optional[dict]]:
+    """
+    The innermost of `defs` (`(start, end, feature)`) enclosing each
+    `(start, end)` of `spans`, in one sweep over both sorted by start.
+    Definitions nest, so the open ones form a stack. (`node.parent` would
+    cost a descent from the root per step.)
+    """
+    defs = sorted(defs, key=lambda d: (d[0], -d[1]))
+    owners: List[Optional[dict]] = [None] * len(spans)
+    stack: List[tuple] = []
+    i = 0
+    for j in sorted(range(len(spans)), key=lambda j: spans[j][0]):
+        start, end = spans[j]
+        while i < len(defs) and defs[i][0] <= start:
+            while stack and stack[-1][1] <= defs[i][0]:
+                stack.pop()
+            stack.append(defs[i])
+            i += 1
+        while stack and stack[-1][1] < start:
+            stack.pop()
+        for d in reversed(stack):
+            if d[1] >= end:
+                owners[j] = d[2]
+                break
+    return owners
+
+
+def extract_features(
+    filepath: Path,
+    lang_id: str,
+    lang: str,
+    query: str,
+    fields: Mapping[str, Mapping[str, Any]],
+    convert: Optional[Mapping[str, Converter]] = None,
+    timeout_micros: int = 0,
+) -> List[dict]:
+    """
+    Parse `filepath` with the `lang_id` grammar and return one feature per
+    `@<type>` capture of `query`, in source order:
+    `{filepath, lang, type, <fields...>, start_byte, end_byte, start_point,
+    end_point}`, with `source` available lazily.
+    """
+    filepath = Path(filepath)
+    buf = SourceBuffer.read(filepath)
+    parser = get_parser(lang_id, timeout_micros)
+    try:
+        tree = parser.parse(buf.data)
+    except ValueError:
+        if not timeout_micros:
+            raise
+        parser.reset()  # a timed-out parse would otherwise resume on the next call
+        raise ParseTimeout(f"Parsing {filepath} took over {timeout_micros} µs")
+    return extract_tree(buf, tree, lang_id, lang, query, fields, convert)
+
+
+def extract_tree(
+    buf: SourceBuffer,
+    tree,
+    lang_id: str,
+    lang: str,
+    query: str,
+    fields: Mapping[str, Mapping[str, Any]],
+    convert: Optional[Mapping[str, Converter]] = None,
+) -> List[dict]:
+    """`extract_features` over `tree`, already parsed from `buf`."""
+    filepath = buf.path
+    captures = compile_query(lang_id, query).captures(tree.root_node)
+    convert = convert or {}
+
+    def text(node) -> str:
+        return robust_get_text(buf.view, node, filepath)
+
+    # How each capture name and field is handled, worked out once per call
+    names: Dict[str, tuple] = {}
+    for name in {name for _, name in captures}:
+        kind, _, field = name.partition(".")
+        if kind not in fields or (field and field not in fields[kind]):
+            continue
+        if not field:
+            names[name] = (kind, None, None, None)
+            continue
+        default = fields[kind][field]
+        mode = ("set" if isinstance(default, tuple) else "list" if isinstance(default, list)
+                else "dict" if isinstance(default, dict) else "first")
+        names[name] = (kind, field, mode, convert.get(name))
+
+    defs: Dict[tuple, dict] = {}
+    members: Dict[str, List[tuple]] = {}  # kind -> (start, end, seq, node, field, mode, hook)
+    str_path = str(filepath)
+    for seq, (node, name) in enumerate(captures):
+        how = names.get(name)
+        if how is None:
+            continue
+        kind, field, mode, hook = how
+        if field is not None:
+            members.setdefault(kind, []).append((node.start_byte, node.end_byte, seq, node, field, mode, hook))
+            continue
+        key = (kind, node.start_byte, node.end_byte)
+        if key not in defs:
+            feat = Feature(buf, filepath=str_path, lang=lang, type=kind)
+            for field, default in fields[kind].items():
+                if isinstance(default, tuple):
+                    feat[field] = dict.fromkeys(default)  # ordered set
+                else:
+                    feat[field] = default.copy() if isinstance(default, (list, dict)) else default
+            feat.update(node_span(node))
+            defs[key] = feat
+
+    # Apply in capture order, which decides list order and the first match
+    order = []
+    for kind, caps in members.items():
+        owners = _owners([(s, e, f) for (k, s, e), f in defs.items() if k == kind], [c[:2] for c in caps])
+        order.extend(zip(caps, owners))
+    if len(members) > 1:
+        order.sort(key=lambda pair: pair[0][2])
+    for (_, _, _, node, field, mode, hook), feat in order:
+        if feat is None:
+            continue
+        value = hook(node, text(node)) if hook else text(node)
+        if value is None:
+            continue
+        if mode == "list":
+            feat[field].append(value)
+        elif mode == "set":
+            feat[field][value] = None
+        elif mode == "dict":
+            feat[field][value[0]] = value[1]
+        elif feat[field] is None or feat[field] == fields[feat["type"]][field]:
+            feat[field] = value
+
+    for kind, kind_fields in fields.items():
+        sets = [field for field, default in kind_fields.items() if isinstance(default, tuple)]
+        if sets:
+            for (k, _, _), feat in defs.items():
+                if k == kind:
+                    for field in sets:
+                        feat[field] = list(feat[field])
+
+    return sorted(defs.values(), key=lambda f: (f["start_byte"], -f["end_byte"]))
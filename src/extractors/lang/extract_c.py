@@ -0,0 +1,160 @@
+"""
+C extractor: functions, prototypes, structs/unions/enums, typedefs, macros
+and `#include` edges, each with its span. Functions also list the functions
+they call and the named types they use, structs and unions the named types of
+their fields (reference edges for `symbol_index`).
+
+Matching runs as one compiled query in C (see `engine`), so header size only
+costs parse time. Definitions inside `#if`/`#ifdef` blocks are still found,
+since tree-sitter keeps both branches in the tree. Parsing is capped at
+`timeout_micros`; past that, the file falls back to `scan_preprocessor`, a
+single regex pass that still yields its includes and macros.
+"""
+import logging
+import re
+from pathlib import Path
+
+from src.extractors.lang.engine import ParseTimeout, extract_features
+from src.extractors.utils.spans import Feature, SourceBuffer
+
+logger = logging.getLogger(__name__)
+
+LANG_ID = "c"
+LANG    = "c"
+
+DEFAULT_TIMEOUT_MICROS = 5_000_000
+
+QUERY = """
+(function_definition declarator: (_) @function.name @function.parameters) @function
+(function_definition type: (_) @function.returns)
+(function_definition (storage_class_specifier) @function.static)
+(call_expression function: (identifier) @function.calls)
+(call_expression function: (field_expression field: (_) @function.calls))
+(parameter_declaration type: (type_identifier) @function.types)
+(declaration type: (type_identifier) @function.types)
+(declaration declarator: (function_declarator) @prototype.name @prototype.parameters) @prototype
+(declaration declarator: (pointer_declarator declarator: (function_declarator))
+  @prototype.name @prototype.parameters) @prototype
+(declaration type: (_) @prototype.returns)
+(struct_specifier body: (_)) @struct
+(struct_specifier name: (_) @struct.name body: (_))
+(struct_specifier body: (field_declaration_list (field_declaration declarator: (_) @struct.fields)))
+(struct_specifier body: (field_declaration_list (field_declaration type: (type_identifier) @struct.types)))
+(union_specifier body: (_)) @union
+(union_specifier name: (_) @union.name body: (_))
+(union_specifier body: (field_declaration_list (field_declaration declarator: (_) @union.fields)))
+(union_specifier body: (field_declaration_list (field_declaration type: (type_identifier) @union.types)))
+(enum_specifier body: (_)) @enum
+(enum_specifier name: (_) @enum.name body: (_))
+(enum_specifier body: (enumerator_list (enumerator name: (_) @enum.values)))
+(type_definition declarator: (_) @typedef.name) @typedef
+(preproc_def name: (_) @macro.name) @macro
+(preproc_function_def name: (_) @macro.name parameters: (_) @macro.parameters) @macro
+(preproc_include path: (_) @include.path) @include
+(preproc_include path: (system_lib_string) @include.system)
+"""
+
+FIELDS = {
+    "function": {"name": None, "parameters": None, "returns": None, "static": False,
+                 "calls": (), "types": ()},
+    "prototype": {"name": None, "parameters": None, "returns": None},
+    "struct": {"name": None, "fields": [], "types": ()},
+    "union": {"name": None, "fields": [], "types": ()},
+    "enum": {"name": None, "values": []},
+    "typedef": {"name": None},
+    "macro": {"name": None, "parameters": None},
+    "include": {"path": None, "system": False},
+}
+
+
+def _node_text(node) -> str:
+    return node.text.decode("utf-8", errors="replace")
+
+
+def _declared_name(node, text):
+    # `**get(...)`, `name[8]`, `(*fn)(void)` -> the declared identifier
+    while True:
+        inner = node.child_by_field_name("declarator")
+        if inner is None and node.type == "parenthesized_declarator" and node.named_child_count:
+            inner = node.named_children[0]
+        if inner is None:
+            return _node_text(node)
+        node = inner
+
+
+def _parameters(node, text):
+    while node is not None and node.type != "function_declarator":
+        node = node.child_by_field_name("declarator")
+    params = node.child_by_field_name("parameters") if node is not None else None
+    return _node_text(params) if params is not None else None
+
+
+def _include_path(node, text):
+    return text.strip('"<>')
+
+
+CONVERT = {
+    "function.name": _declared_name,
+    "function.parameters": _parameters,
+    "function.static": lambda node, text: text == "static" or None,
+    "prototype.name": _declared_name,
+    "prototype.parameters": _parameters,
+    "struct.fields": _declared_name,
+    "union.fields": _declared_name,
+    "typedef.name": _declared_name,
+    "include.path": _include_path,
+    "include.system": lambda node, text: True,
+}
+
+_PREPROCESSOR = re.compile(
+    rb"^[ \t]*#[ \t]*(?:include[ \t]*([<\"][^>\"\n]*[>\"])"
+    rb"|define[ \t]+(\w+)(\([^)\n]*\))?(?:[^\n\\]|\\.)*)",
+    re.MULTILINE | re.DOTALL,
+)
+
+
+def scan_preprocessor(filepath: Path, lang: str = LANG):
+    """`include` and `macro` features from a regex pass, for files that do not parse in time."""
+    filepath = Path(filepath)
+    buf = SourceBuffer.read(filepath)
+    data = buf.data
+    feats = []
+    row = line = pos = 0
+    for m in _PREPROCESSOR.finditer(data):
+        start, end = m.span()
+        row += data.count(b"\n", pos, start)
+        line = data.rfind(b"\n", 0, start) + 1
+        end_row = row + data.count(b"\n", start, end)
+        end_line = data.rfind(b"\n", 0, end) + 1
+        pos = start
+        path, name, params = (g.decode("utf-8", errors="replace") if g else None for g in m.groups())
+        if path is not None:
+            fields = {"type": "include", "path": path.strip('"<>'), "system": path.startswith("<")}
+        else:
+            fields = {"type": "macro", "name": name, "parameters": params}
+        feats.append(Feature(
+            buf, filepath=str(filepath), lang=lang, **fields,
+            start_byte=start, end_byte=end,
+            start_point=[row, start - line], end_point=[end_row, end - end_line],
+        ))
+    return feats
+
+
+def extract_with_timeout(filepath, lang_id, lang, query, fields, convert, timeout_micros):
+    try:
+        return extract_features(Path(filepath), lang_id, lang, query, fields, convert, timeout_micros)
+    except ParseTimeout as e:
+        logger.warning(f"{e}; keeping preprocessor features only")
+        return scan_preprocessor(filepath, lang)
+
+
+def extract_c_features(filepath, timeout_micros: int = DEFAULT_TIMEOUT_MICROS):
+    return extract_with_timeout(filepath, LANG_ID, LANG, QUERY, FIELDS, CONVERT, timeout_micros)
+
+# Optional CLI:
+if __name__ == "__main__":
+    import sys, json
+    p = Path(sys.argv[1])
+    out = p.with_suffix(p.suffix + ".features.json")
+    json.dump([dict(f, source=f.text()) for f in extract_c_features(p)], out.open("w"), indent=2)
+    print("Wrote ->", out)
@@ -0,0 +1,33 @@
+"""
+C++ extractor: the C query (see `extract_c`) plus classes and namespaces,
+and calls through qualified names (`ns::f()`, `Type::make()`).
+Also used for `.h`, since the C++ grammar parses C headers as well.
+"""
+from src.extractors.lang import extract_c
+
+LANG_ID = "cpp"
+LANG    = "cpp"
+DEFAULT_TIMEOUT_MICROS = extract_c.DEFAULT_TIMEOUT_MICROS
+
+QUERY = extract_c.QUERY + """
+(class_specifier body: (_)) @class
+(class_specifier name: (_) @class.name body: (_))
+(class_specifier (base_class_clause [(type_identifier) (qualified_identifier) (template_type)] @class.bases))
+(class_specifier body: (field_declaration_list (function_definition declarator: (_) @class.methods)))
+(class_specifier body: (field_declaration_list
+  (field_declaration declarator: (function_declarator) @class.methods)))
+(namespace_definition name: (_) @namespace.name) @namespace
+(call_expression function: (qualified_identifier) @function.calls)
+"""
+
+FIELDS = {
+    **extract_c.FIELDS,
+    "class": {"name": None, "bases": [], "methods": []},
+    "namespace": {"name": None},
+}
+
+CONVERT = {**extract_c.CONVERT, "class.methods": extract_c._declared_name}
+
+
+def extract_cpp_features(filepath, timeout_micros: int = DEFAULT_TIMEOUT_MICROS):
+    return extract_c.extract_with_timeout(filepath, LANG_ID, LANG, QUERY, FIELDS, CONVERT, timeout_micros)
@@ -1,60 +1,44 @@
 # src/extractors/lang/extract_csharp.py   (example for C#)
-from tree_sitter import Parser
-from src.extractors.utils.tree_sitter_loader import get_language
-from src.extractors.utils import robust_get_text  # your helper
+from pathlib import Path
+from src.extractors.lang.engine import extract_features
 
 LANG_ID = "c_sharp"       # grammar name in my-languages.so or wheel
-LANG    = get_language(LANG_ID)
+LANG    = "csharp"        # "lang" written into each feature
 
-def extract_csharp_features(filepath):
-    parser = Parser(); parser.set_language(LANG)
-    code   = Path(filepath).read_bytes()       # keeps encoding
-    tree   = parser.parse(code)
-    root   = tree.root_node
+QUERY = """
+(class_declaration name: (identifier) @class.name) @class
+(class_declaration body: (declaration_list
+  (method_declaration name: (identifier) @class.public_methods)))
+(class_declaration bases: (base_list (_) @class.bases))
+(invocation_expression function: (identifier) @class.calls)
+(invocation_expression function: (member_access_expression name: (_) @class.calls))
+(object_creation_expression type: [(identifier) (qualified_name) (generic_name)] @class.types)
+(variable_declaration type: [(identifier) (qualified_name) (generic_name)] @class.types)
+(parameter type: [(identifier) (qualified_name) (generic_name)] @class.types)
+(using_directive name: (_) @using.name) @using
+"""
+
+FIELDS = {
+    "class": {"name": None, "public_methods": [], "bases": [], "calls": (), "types": ()},
+    "using": {"name": None},
+}
 
-    feats = []
 
-    def text(node):
-        return robust_get_text(code, node, filepath)
+def _public(name_node, text):
+    # keep the method name only if its declaration carries `public`
+    method = name_node.parent
+    is_public = any(
+        m.type == "modifier" and m.text.decode("utf-8", errors="replace").strip() == "public"
+        for m in method.children
+    )
+    return text if is_public else None
 
-    # ------------ recursive walk ------------------------------------
-    def walk(node):
-        if node.type == "class_declaration":
-            cls_name     = None
-            public_meths = []
-            for child in node.children:
-                if child.type == "identifier":
-                    cls_name = text(child)
-                elif child.type == "declaration_list":
-                    # find `public` methods
-                    for m in child.children:
-                        if m.type == "method_declaration":
-                            is_public = any(
-                                ml.type == "modifier" and text(ml).strip() == "public"
-                                for ml in m.children
-                            )
-                            if is_public:
-                                meth_name = next(
-                                    (mn for mn in m.children if mn.type == "identifier"),
-                                    None
-                                )
-                                if meth_name:
-                                    public_meths.append(text(meth_name))
-            feats.append({
-                "filepath": str(filepath),
-                "lang": "csharp",
-                "type": "class",
-                "name": cls_name,
-                "public_methods": public_meths,
-                "source": text(node)
-            })
 
-        # Recurse
-        for n in node.children:
-            walk(n)
+CONVERT = {"class.public_methods": _public}
 
-    walk(root)
-    return feats
+
+def extract_csharp_features(filepath):
+    return extract_features(Path(filepath), LANG_ID, LANG, QUERY, FIELDS, CONVERT)
 
 # Optional CLI:
 if __name__ == "__main__":
@@ -62,4 +46,4 @@ if __name__ == "__main__":
     p = pathlib.Path(sys.argv[1])
     out = p.with_suffix(p.suffix + ".features.json")
     json.dump(extract_csharp_features(p), out.open("w"), indent=2)
-    print("Wrote ->", out)
\ No newline at end of file
+    print("Wrote ->", out)
@@ -1,34 +1,18 @@
 from pathlib import Path
-from tree_sitter import Parser
-from src.extractors.utils.tree_sitter_loader import get_language
-from src.extractors.utils import robust_get_text
+from src.extractors.lang.engine import extract_features
 
-CSS = get_language("css")
+LANG_ID = "css"
+LANG = "css"
 
-def extract_css_features(filepath: Path):
-    parser = Parser(); parser.set_language(CSS)
-    code   = filepath.read_bytes()
-    tree   = parser.parse(code)
-    feats  = []
-    def txt(n): return robust_get_text(code, n, filepath)
+QUERY = """
+(rule_set (selectors) @rule_set.selector) @rule_set
+(media_statement) @media_statement
+"""
+
+FIELDS = {
+    "rule_set": {"selector": ""},
+    "media_statement": {},
+}
 
-    def walk(n):
-        if n.type == "rule_set":
-            selector = next((txt(c) for c in n.children if c.type == "selectors"), "")
-            feats.append({
-                "filepath": str(filepath),
-                "lang": "css",
-                "type": "rule_set",
-                "selector": selector,
-                "source": txt(n)
-            })
-        elif n.type == "media_statement":
-            feats.append({
-                "filepath": str(filepath),
-                "lang": "css",
-                "type": "media_statement",
-                "source": txt(n)
-            })
-        for c in n.children: walk(c)
-    walk(tree.root_node)
-    return feats
\ No newline at end of file
+def extract_css_features(filepath: Path):
+    return extract_features(filepath, LANG_ID, LANG, QUERY, FIELDS)
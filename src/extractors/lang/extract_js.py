@@ -1,36 +1,29 @@
 from pathlib import Path
-from tree_sitter import Parser
-from src.extractors.utils.tree_sitter_loader import get_language
-from src.extractors.utils import robust_get_text
+from src.extractors.lang.engine import extract_features
 
-TSX = get_language("tsx")  # covers tsx/jsx; for pure ts use "typescript"
+LANG_ID = "tsx"  # covers tsx/jsx; for pure ts use "typescript"
+LANG = "typescript"
 
-def extract_js_features(filepath: Path):
-    parser = Parser(); parser.set_language(TSX)
-    code   = filepath.read_bytes()
-    tree   = parser.parse(code)
-    feats  = []
-    def txt(n): return robust_get_text(code, n, filepath)
+QUERY = """
+(class_declaration name: (_) @class.name) @class
+(class_declaration body: (class_body
+  (method_definition name: (property_identifier) @class.methods)))
+(class_declaration (class_heritage (extends_clause value: (_) @class.bases)))
+(class_declaration (class_heritage (implements_clause (_) @class.bases)))
+(function_declaration name: (identifier) @function.name) @function
+(call_expression function: (identifier) @function.calls @class.calls)
+(call_expression function: (member_expression property: (_) @function.calls @class.calls))
+(new_expression constructor: (identifier) @function.calls @class.calls)
+(import_statement source: (string) @import.source) @import
+"""
+
+FIELDS = {
+    "class": {"name": None, "methods": [], "bases": [], "calls": ()},
+    "function": {"name": None, "calls": ()},
+    "import": {"source": None},
+}
 
-    def walk(n):
-        if n.type == "class_declaration":
-            cls = next((txt(c) for c in n.children if c.type == "identifier"), None)
-            meths = [
-                txt(mn) for m in n.walk().node.children
-                if m.type == "method_definition"
-                for mn in m.children if mn.type == "property_identifier"
-            ]
-            feats.append({
-                "filepath": str(filepath), "lang": "typescript",
-                "type": "class", "name": cls, "methods": meths,
-                "source": txt(n)
-            })
-        elif n.type == "function_declaration":
-            fn = next((txt(c) for c in n.children if c.type == "identifier"), None)
-            feats.append({
-                "filepath": str(filepath), "lang": "typescript",
-                "type": "function", "name": fn, "source": txt(n)
-            })
-        for c in n.children: walk(c)
-    walk(tree.root_node)
-    return feats
\ No newline at end of file
+CONVERT = {"import.source": lambda node, text: text.strip("'\"`")}
+
+def extract_js_features(filepath: Path):
+    return extract_features(filepath, LANG_ID, LANG, QUERY, FIELDS, CONVERT)
@@ -1,26 +1,155 @@
-from pathlib import Path, PurePath
+"""
+Streaming JSON extractor.
+
+The file is memory-mapped and tokenized with compiled regexes (values below
+`max_depth` are only scanned for their closing bracket), so nothing ever
+holds a parsed copy of the document: a multi-megabyte
+`package-lock.json` costs the mapped pages plus one feature per emitted path.
+Features are emitted for object keys / array items down to `max_depth`
+(1 = top-level keys), carry byte spans of their value, and keep only a
+`max_value_bytes` preview of it as `source`. At most `max_features` features
+are emitted per file.
+"""
+from pathlib import Path
 import json
+import mmap
+import re
+
+DEFAULT_MAX_DEPTH = 1
+DEFAULT_MAX_VALUE_BYTES = 4096
+DEFAULT_MAX_FEATURES = 5000
+
+# strings (with escapes), structural characters, or any other run (numbers, literals)
+TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\],:]|[^\s{}\[\],:"]+', re.DOTALL)
+# inside a value below max_depth only strings and brackets matter
+SKIP = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]]', re.DOTALL)
+
+_SCALARS = {b"t": "bool", b"f": "bool", b"n": "null", b'"': "string"}
+
+
+def _value_type(token: bytes) -> str:
+    return _SCALARS.get(token[:1], "number")
+
+
+def _path(parts) -> str:
+    out = ""
+    for p in parts:
+        out += f"[{p}]" if isinstance(p, int) else (f".{p}" if out else p)
+    return out
+
+
+class _Frame:
+    __slots__ = ("is_obj", "key", "index", "expect_key", "start", "path", "children")
 
-def extract_json_features(filepath: Path):
+    def __init__(self, is_obj: bool, start: int, path: list) -> None:
+        self.is_obj = is_obj
+        self.key = None
+        self.index = 0
+        self.expect_key = is_obj
+        self.start = start
+        self.path = path
+        self.children = 0
+
+
+def _skip_container(mm, pos: int) -> int:
+    """End offset of the container whose opening bracket ends at `pos`."""
+    nested = 1
+    while True:
+        m = SKIP.search(mm, pos)
+        if m is None:
+            raise ValueError("unexpected end of JSON document")
+        pos = m.end()
+        c = m.group()[:1]
+        if c in b"{[":
+            nested += 1
+        elif c in b"}]":
+            nested -= 1
+            if nested == 0:
+                return pos
+
+
+def extract_json_features(filepath: Path, max_depth: int = DEFAULT_MAX_DEPTH,
+                          max_value_bytes: int = DEFAULT_MAX_VALUE_BYTES,
+                          max_features: int = DEFAULT_MAX_FEATURES):
     feats = []
+    filepath = Path(filepath)
+
+    def emit(mm, path, start, end, value_type):
+        if len(feats) >= max_features:
+            return
+        cut = min(end, start + max_value_bytes)
+        preview = mm[start:cut].decode("utf-8", errors="replace")
+        key = _path(path)
+        feats.append({
+            "filepath": str(filepath),
+            "lang": "json",
+            "type": "kv" if path else "document",
+            "key": key,
+            "value_type": value_type,
+            "size": end - start,
+            "start_byte": start,
+            "end_byte": end,
+            "truncated": cut < end,
+            "source": f"{json.dumps(key)}: {preview}" if path else preview,
+        })
+
     try:
-        data = json.loads(filepath.read_text(encoding="utf-8"))
-        if isinstance(data, dict):
-            for k, v in data.items():
-                feats.append({
-                    "filepath": str(filepath),
-                    "lang": "json",
-                    "type": "kv",
-                    "key": k,
-                    "source": json.dumps({k: v}, indent=2)
-                })
-        else:
-            feats.append({
-                "filepath": str(filepath),
-                "lang": "json",
-                "type": str(type(data)),
-                "source": json.dumps(data, indent=2)
-            })
+        with open(filepath, "rb") as f:
+            if f.seek(0, 2) == 0:
+                raise ValueError("empty JSON file")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                stack = []
+                done = False
+                pos = 0
+                while True:
+                    m = TOKEN.search(mm, pos)
+                    if m is None:
+                        break
+                    pos = m.end()
+                    tok = m.group()
+                    if done:
+                        raise ValueError(f"extra data at byte {m.start()}")
+                    top = stack[-1] if stack else None
+                    if tok in (b",", b":"):
+                        if top is None:
+                            raise ValueError(f"unexpected {tok.decode()} at byte {m.start()}")
+                        if tok == b":":
+                            top.expect_key = False
+                        elif top.is_obj:
+                            top.expect_key = True
+                        else:
+                            top.index += 1
+                        continue
+                    if tok in (b"}", b"]"):
+                        if top is None or top.is_obj != (tok == b"}"):
+                            raise ValueError(f"unbalanced {tok.decode()} at byte {m.start()}")
+                        stack.pop()
+                        if top.children == 0:  # empty containers above max_depth
+                            emit(mm, top.path, top.start, m.end(), "object" if top.is_obj else "array")
+                        done = not stack
+                        continue
+                    if top is not None and top.is_obj and top.expect_key:
+                        top.key = json.loads(tok)
+                        continue
+                    # a value starts here
+                    path = [] if top is None else top.path + [top.key if top.is_obj else top.index]
+                    if top is not None:
+                        top.children += 1
+                    if tok in (b"{", b"["):
+                        if len(path) >= max_depth:
+                            # Emitted whole: only find where it ends (brackets are
+                            # not checked for kind inside it)
+                            pos = _skip_container(mm, pos)
+                            emit(mm, path, m.start(), pos, "object" if tok == b"{" else "array")
+                            done = not stack
+                            continue
+                        stack.append(_Frame(tok == b"{", m.start(), path))
+                        continue
+                    if len(path) <= max_depth:
+                        emit(mm, path, m.start(), m.end(), _value_type(tok))
+                    done = not stack
+                if stack or not done:
+                    raise ValueError("unexpected end of JSON document")
     except Exception as e:
         feats.append({
             "filepath": str(filepath),
@@ -29,4 +158,4 @@ def extract_json_features(filepath: Path):
             "error": str(e),
             "source": ""
         })
-    return feats
\ No newline at end of file
+    return feats
@@ -0,0 +1,190 @@
+"""
+Python extractor on the stdlib `ast` module.
+
+No grammar is needed: `ast.parse` runs in C and reports UTF-8 byte columns,
+which are turned into byte spans over the file's `SourceBuffer`. One
+`module` feature is emitted per file, plus one `class` and one `function`
+feature per definition at any depth, with `qualname`s following Python's
+own (`Outer.method`, `func.<locals>.helper`). Spans start at the first
+decorator, like tree-sitter's `decorated_definition`. Functions list the
+names they call (`helper`, `self.save`, `os.path.join`), leaving out calls in
+nested definitions, which are listed on those.
+
+Files that do not parse (Python 2 sources, deliberate syntax-error fixtures)
+still get their `module` feature, with the parser message under `error`.
+"""
+from __future__ import annotations
+
+import ast
+import codecs
+import tokenize
+from io import BytesIO
+from itertools import accumulate
+from pathlib import Path
+
+from src.extractors.utils.spans import Feature, SourceBuffer, to_utf8
+
+LANG = "python"
+
+_FUNCTIONS = (ast.FunctionDef, ast.AsyncFunctionDef)
+_DEFINITIONS = (*_FUNCTIONS, ast.ClassDef)
+# statement lists of compound statements (if/for/while/try/with/match) that can hold definitions
+_BLOCK_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
+
+
+def _utf8(data: bytes) -> bytes:
+    """`data` as UTF-8, honouring a coding cookie (see `to_utf8`); `ast` columns count UTF-8 bytes."""
+    try:
+        encoding, _ = tokenize.detect_encoding(BytesIO(data).readline)
+    except SyntaxError:
+        encoding = None
+    return to_utf8(data, encoding)
+
+
+def _line_starts(data: bytes) -> list:
+    # bytes.splitlines breaks on \n, \r and \r\n only, like the tokenizer
+    return list(accumulate(map(len, data.splitlines(keepends=True)), initial=0))
+
+
+def _summary(node) -> str | None:
+    doc = ast.get_docstring(node, clean=True)
+    return doc.split("\n", 1)[0] if doc else None
+
+
+def _signature(node) -> str:
+    sig = f"({ast.unparse(node.args)})"
+    return f"{sig} -> {ast.unparse(node.returns)}" if node.returns else sig
+
+
+def _call_name(func) -> str | None:
+    parts = []
+    while isinstance(func, ast.Attribute):
+        parts.append(func.attr)
+        func = func.value
+    if isinstance(func, ast.Name):
+        parts.append(func.id)
+    elif not parts:
+        return None  # `f()()`, `fs[0]()`, ...
+    return ".".join(reversed(parts))
+
+
+def _calls(node) -> list:
+    """Distinct names called in the body of function `node`, outside nested definitions."""
+    names = {}
+    stack = list(reversed(node.body))
+    while stack:
+        child = stack.pop()
+        if isinstance(child, _DEFINITIONS):
+            continue
+        if isinstance(child, ast.Call):
+            name = _call_name(child.func)
+            if name:
+                names[name] = None
+        stack.extend(reversed(list(ast.iter_child_nodes(child))))
+    return list(names)
+
+
+def _imports(tree) -> list:
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            names.append("." * node.level + (node.module or ""))
+    return names
+
+
+def extract_python_features(filepath):
+    filepath = Path(filepath)
+    buf = SourceBuffer(_utf8(filepath.read_bytes()), filepath)
+    starts = _line_starts(buf.data)
+    name = filepath.parent.name if filepath.stem == "__init__" else filepath.stem
+
+    def feature(kind, **fields):
+        return Feature(buf, filepath=str(filepath), lang=LANG, type=kind, **fields)
+
+    def span(node):
+        first = min([node] + node.decorator_list, key=lambda n: (n.lineno, n.col_offset))
+        line = starts[first.lineno - 1]
+        start = line + first.col_offset
+        if first is not node:
+            # decorator expressions start after their `@`
+            start = buf.data.rfind(b"@", line, start)
+        end = starts[node.end_lineno - 1] + node.end_col_offset
+        return {
+            "start_byte": start,
+            "end_byte": end,
+            "start_point": [first.lineno - 1, start - line],
+            "end_point": [node.end_lineno - 1, node.end_col_offset],
+        }
+
+    module = feature("module", name=name, docstring=None, imports=[])
+    module.update({
+        "start_byte": 0,
+        "end_byte": len(buf),
+        "start_point": [0, 0],
+        "end_point": [len(starts) - 1, len(buf) - starts[-1]],
+    })
+    # Parse the decoded text: from bytes, `ast` would apply the coding cookie a second time
+    text = buf.text(0, len(buf))
+    if text.startswith("\ufeff"):
+        text = text[1:]
+        starts[0] = len(codecs.BOM_UTF8)  # columns of the first line start after the BOM
+    try:
+        tree = ast.parse(text, filename=str(filepath))
+    except (SyntaxError, ValueError) as e:
+        module["error"] = str(e)
+        return [module]
+    module["docstring"] = _summary(tree)
+    module["imports"] = _imports(tree)
+
+    feats = [module]
+    # (node, qualname prefix of its children), walked without recursion
+    stack = [(child, "") for child in reversed(tree.body)]
+    while stack:
+        node, prefix = stack.pop()
+        if isinstance(node, ast.ClassDef):
+            qualname = prefix + node.name
+            feat = feature(
+                "class",
+                name=node.name,
+                qualname=qualname,
+                bases=[ast.unparse(b) for b in node.bases],
+                decorators=[ast.unparse(d) for d in node.decorator_list],
+                docstring=_summary(node),
+                methods=[n.name for n in node.body if isinstance(n, _FUNCTIONS)],
+            )
+            child_prefix = qualname + "."
+        elif isinstance(node, _FUNCTIONS):
+            qualname = prefix + node.name
+            feat = feature(
+                "function",
+                name=node.name,
+                qualname=qualname,
+                signature=_signature(node),
+                is_async=isinstance(node, ast.AsyncFunctionDef),
+                decorators=[ast.unparse(d) for d in node.decorator_list],
+                docstring=_summary(node),
+                calls=_calls(node),
+            )
+            child_prefix = qualname + ".<locals>."
+        else:
+            # definitions nested in if/try/with/... blocks keep the current prefix
+            for field in reversed(_BLOCK_FIELDS):
+                block = getattr(node, field, None)
+                if block:
+                    stack.extend((child, prefix) for child in reversed(block))
+            continue
+        feat.update(span(node))
+        feats.append(feat)
+        stack.extend((child, child_prefix) for child in reversed(node.body))
+    return sorted(feats, key=lambda f: (f["start_byte"], -f["end_byte"]))
+
+
+# Optional CLI:
+if __name__ == "__main__":
+    import sys, json
+    p = Path(sys.argv[1])
+    out = p.with_suffix(p.suffix + ".features.json")
+    json.dump([dict(f, source=f.text()) for f in extract_python_features(p)], out.open("w"), indent=2)
+    print("Wrote ->", out)
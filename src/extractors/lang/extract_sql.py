@@ -0,0 +1,164 @@
+"""
+Streaming T-SQL extractor.
+
+Scripts are read line by line (lines longer than `CHUNK` arrive in pieces),
+split into batches on `GO` lines, and one feature is emitted per
+`CREATE [OR ALTER] PROCEDURE | VIEW | TABLE | FUNCTION` with its byte and
+point span. String literals and comments are tracked across lines so a `GO`
+or `CREATE` inside them does not count.
+
+Only the text of the definition being collected is buffered, capped at
+`max_source_bytes`; bulk `INSERT` data is streamed past and only counted per
+target table into one trailing `data` feature. Multi-hundred-megabyte seed
+scripts therefore cost a fixed amount of memory.
+
+Procedures, views and functions run to the end of their batch (T-SQL allows
+only one per batch), so `CREATE`s in their bodies, such as `#temp` tables,
+stay part of them; tables end where their column list closes. Temp tables
+(`#name`) never become features, and inserts into them are not seed data.
+"""
+from pathlib import Path
+import re
+
+CHUNK = 1 << 20
+DEFAULT_MAX_SOURCE_BYTES = 64 * 1024
+
+CREATE = re.compile(
+    rb"\s*CREATE\s+(?:OR\s+ALTER\s+)?(PROCEDURE|PROC|VIEW|TABLE|FUNCTION)\s+([\w\[\]\.\"#@$]+)",
+    re.IGNORECASE,
+)
+GO = re.compile(rb"\s*GO(?:\s+\d+)?\s*(?:--.*)?$", re.IGNORECASE)
+INSERT = re.compile(rb"\s*INSERT\s+(?:INTO\s+)?([\w\[\]\.\"#@$]+)", re.IGNORECASE)
+_LEXEMES = re.compile(rb"'|/\*|\*/|--")
+
+KINDS = {b"procedure": "procedure", b"proc": "procedure", b"view": "view",
+         b"table": "table", b"function": "function"}
+BODY_KINDS = frozenset({"procedure", "view", "function"})  # open until GO
+
+
+def _scan(line: bytes, in_string: bool, in_comment: bool):
+    """String/comment state after `line`, given the state before it."""
+    if not in_comment and b"/*" not in line and b"--" not in line:
+        # Fast path: only quotes can change the state
+        return in_string != (line.count(b"'") % 2 == 1), False
+    for m in _LEXEMES.finditer(line):
+        tok = m.group()
+        if in_comment:
+            if tok == b"*/":
+                in_comment = False
+        elif in_string:
+            if tok == b"'":
+                in_string = False
+        elif tok == b"'":
+            in_string = True
+        elif tok == b"/*":
+            in_comment = True
+        elif tok == b"--":
+            break
+    return in_string, in_comment
+
+
+def _name(raw: bytes) -> str:
+    return raw.decode("utf-8", errors="replace").replace("[", "").replace("]", "").replace('"', "")
+
+
+def extract_sql_features(filepath: Path, max_source_bytes: int = DEFAULT_MAX_SOURCE_BYTES):
+    filepath = Path(filepath)
+    feats = []
+    inserts = {}
+    current = None          # feature being collected
+    buf = bytearray()       # its (capped) source
+    depth = 0               # paren depth inside a CREATE TABLE
+    opened = False
+    batch = 0
+
+    def finish(end_byte: int, end_point):
+        nonlocal current
+        if current is None:
+            return
+        current["end_byte"] = end_byte
+        current["end_point"] = list(end_point)
+        current["truncated"] = end_byte - current["start_byte"] > len(buf)
+        current["source"] = bytes(buf).rstrip().decode("utf-8", errors="replace")
+        feats.append(current)
+        current = None
+        buf.clear()
+
+    offset = 0
+    row = 0
+    line_start = 0          # byte offset where the current line began
+    at_line_start = True
+    in_string = in_comment = False
+    last_end = (0, (0, 0))  # end of the last non-blank line: (byte, point)
+    with open(filepath, "rb") as f:
+        while True:
+            line = f.readline(CHUNK)
+            if not line:
+                break
+            start = offset
+            offset += len(line)
+            complete = line.endswith(b"\n")
+            if at_line_start:
+                line_start = start
+            if at_line_start and not in_string and not in_comment:
+                # Dispatch on the first letter so data lines cost one regex at most
+                lead = line.lstrip()[:1].upper()
+                if lead == b"G" and GO.match(line.rstrip(b"\r\n")):
+                    finish(*last_end)
+                    batch += 1
+                    row += complete
+                    at_line_start = complete
+                    continue
+                in_body = current is not None and current["type"] in BODY_KINDS
+                m = CREATE.match(line) if lead == b"C" and not in_body else None
+                if m and m.group(2).lstrip(b'["').startswith(b"#"):
+                    m = None
+                if m:
+                    finish(*last_end)
+                    current = {
+                        "filepath": str(filepath),
+                        "lang": "sql",
+                        "type": KINDS[m.group(1).lower()],
+                        "name": _name(m.group(2)),
+                        "batch": batch,
+                        "start_byte": start,
+                        "start_point": [row, 0],
+                    }
+                    depth, opened = 0, False
+                elif current is None and lead == b"I":
+                    m = INSERT.match(line)
+                    if m and not m.group(1).lstrip(b'["').startswith(b"#"):
+                        table = m.group(1)
+                        inserts[table] = inserts.get(table, 0) + 1
+            in_string, in_comment = _scan(line, in_string, in_comment)
+            if current is not None and len(buf) < max_source_bytes:
+                buf += line[:max_source_bytes - len(buf)]
+            if current is not None:
+                content = line.rstrip()
+                if content:
+                    end = start + len(content)
+                    last_end = (end, (row, end - line_start))
+            if current is not None and current["type"] == "table" and not in_string:
+                code = line if b"'" in line else line.split(b"--", 1)[0]
+                depth += code.count(b"(") - code.count(b")")
+                opened = opened or b"(" in code
+                if opened and depth <= 0:
+                    finish(*last_end)
+            row += complete
+            at_line_start = complete
+    finish(*last_end)
+
+    if inserts:
+        tables = {}
+        for raw, n in inserts.items():
+            name = _name(raw)
+            tables[name] = tables.get(name, 0) + n
+        feats.append({
+            "filepath": str(filepath),
+            "lang": "sql",
+            "type": "data",
+            "tables": tables,
+            "statements": sum(inserts.values()),
+            "source": "",
+        })
+    return feats
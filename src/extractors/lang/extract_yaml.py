@@ -0,0 +1,200 @@
+"""
+Streaming YAML extractor.
+
+The file is fed to the YAML event parser (libyaml when PyYAML was built with
+it) in `CHUNK`-sized pieces and no document is ever composed into Python
+objects. One `document` feature is emitted per document of a multi-document
+stream (`---` separated CI pipelines, k8s manifests) and one `kv` feature per
+key of a top-level mapping, with byte and point spans. `source` is only a
+`max_value_bytes` preview read back from the file, so huge generated values
+cost one parser event while they stream past, not a copy per feature. At most
+`max_features` features are emitted per file; parsing stops at the first
+document boundary after that.
+
+The parser reports character offsets; `_TextStream` remembers where each
+decoded chunk starts in the file so they can be mapped back to bytes.
+"""
+from __future__ import annotations
+
+import bisect
+import codecs
+from pathlib import Path
+
+import yaml
+
+CHUNK = 1 << 16
+DEFAULT_MAX_VALUE_BYTES = 4096
+DEFAULT_MAX_FEATURES = 5000
+
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_RESOLVER = yaml.resolver.Resolver()
+
+_COLLECTIONS = {yaml.MappingStartEvent: "mapping", yaml.SequenceStartEvent: "sequence"}
+
+
+class _TextStream:
+    """
+    Decoded text of `raw` for the parser, recording the character and byte
+    offset at which each chunk starts.
+    """
+
+    def __init__(self, raw, src) -> None:
+        self.raw = raw
+        self.src = src          # second handle for seeking back into the file
+        self._decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self._chars = [0]
+        self._bytes = [0]
+        self._ascii = []
+        self._read = 0
+        self._cached = (-1, "")
+
+    def read(self, size: int = -1) -> str:
+        data = self.raw.read(CHUNK)
+        self._read += len(data)
+        text = self._decoder.decode(data, final=not data)
+        if text:
+            # bytes of a character split across chunks stay in the decoder
+            end = self._read - len(self._decoder.getstate()[0])
+            self._ascii.append(end - self._bytes[-1] == len(text))
+            self._chars.append(self._chars[-1] + len(text))
+            self._bytes.append(end)
+        return text
+
+    def byte_offset(self, index: int) -> int:
+        """Byte offset of character `index`."""
+        i = bisect.bisect_right(self._chars, index) - 1
+        if i >= len(self._ascii):
+            return self._bytes[-1]
+        rel = index - self._chars[i]
+        if self._ascii[i]:
+            return self._bytes[i] + rel
+        if self._cached[0] != i:
+            self.src.seek(self._bytes[i])
+            data = self.src.read(self._bytes[i + 1] - self._bytes[i])
+            self._cached = (i, data.decode("utf-8", errors="replace"))
+        return self._bytes[i] + len(self._cached[1][:rel].encode("utf-8"))
+
+    def span(self, start, end) -> dict:
+        """Byte and point span between two parser marks."""
+        start_byte, end_byte = self.byte_offset(start.index), self.byte_offset(end.index)
+        return {
+            "start_byte": start_byte,
+            "end_byte": end_byte,
+            "start_point": [start.line, start_byte - self.byte_offset(start.index - start.column)],
+            "end_point": [end.line, end_byte - self.byte_offset(end.index - end.column)],
+        }
+
+    def preview(self, start: int, end: int, limit: int) -> str:
+        self.src.seek(start)
+        return self.src.read(min(end, start + limit) - start).decode("utf-8", errors="replace")
+
+
+def _scalar_type(event) -> str:
+    if event.tag is None and not event.implicit[0]:
+        return "str"  # quoted
+    tag = event.tag or _RESOLVER.resolve(yaml.ScalarNode, event.value, event.implicit)
+    return tag.rsplit(":", 1)[-1]
+
+
+def _node_type(event) -> str:
+    if isinstance(event, yaml.AliasEvent):
+        return "alias"
+    return _COLLECTIONS.get(type(event)) or _scalar_type(event)
+
+
+def extract_yaml_features(filepath: Path, max_value_bytes: int = DEFAULT_MAX_VALUE_BYTES,
+                          max_features: int = DEFAULT_MAX_FEATURES):
+    feats = []
+    filepath = Path(filepath)
+
+    with open(filepath, "rb") as raw, open(filepath, "rb") as src:
+        stream = _TextStream(raw, src)
+
+        def emit(kind, start, end, **fields):
+            if len(feats) >= max_features:
+                return None
+            feat = {"filepath": str(filepath), "lang": "yaml", "type": kind, **fields}
+            feats.append(feat)
+            if end is not None:
+                finish(feat, start, end)
+            return feat
+
+        def finish(feat, start, end):
+            feat.update(stream.span(start, end))
+            size = feat["end_byte"] - feat["start_byte"]
+            feat["size"] = size
+            feat["truncated"] = size > max_value_bytes
+            feat["source"] = stream.preview(feat["start_byte"], feat["end_byte"], max_value_bytes)
+
+        doc = -1
+        doc_feat = doc_start = None
+        root = None
+        depth = 0
+        flow = []             # flow_style of each open collection
+        last_end = None       # end mark of the last node content
+        in_map = False        # inside a top-level mapping
+        expect_key = True
+        key = key_start = value_type = None
+        keys = 0
+
+        def close_document():
+            nonlocal doc_feat
+            if doc_feat is not None:
+                doc_feat["value_type"] = root or "null"
+                doc_feat["keys"] = keys
+                finish(doc_feat, doc_start, last_end)
+                doc_feat = None
+
+        try:
+            for ev in yaml.parse(stream, Loader=Loader):
+                if isinstance(ev, yaml.DocumentStartEvent):
+                    doc += 1
+                    doc_start = last_end = ev.start_mark
+                    root, in_map, expect_key, keys = None, False, True, 0
+                    doc_feat = emit("document", None, None, document=doc)
+                    continue
+                if isinstance(ev, yaml.DocumentEndEvent):
+                    close_document()
+                    if len(feats) >= max_features:
+                        break  # nothing more would be kept
+                    continue
+                if isinstance(ev, yaml.CollectionEndEvent):
+                    depth -= 1
+                    if flow.pop():
+                        last_end = ev.end_mark
+                    done = depth == 1 and in_map
+                elif isinstance(ev, (yaml.ScalarEvent, yaml.AliasEvent, yaml.CollectionStartEvent)):
+                    if depth == 0:
+                        root = _node_type(ev)
+                        in_map = root == "mapping"
+                    elif depth == 1 and in_map:
+                        if expect_key:
+                            key_start = ev.start_mark
+                            key = ev.value[:max_value_bytes] if isinstance(ev, yaml.ScalarEvent) else None
+                        else:
+                            value_type = _node_type(ev)
+                    if isinstance(ev, yaml.CollectionStartEvent):
+                        flow.append(ev.flow_style)
+                        depth += 1
+                        done = False
+                    else:
+                        last_end = ev.end_mark
+                        done = depth == 1 and in_map
+                else:
+                    continue
+                if done:
+                    # a key or value node of the top-level mapping is complete
+                    if not expect_key:
+                        keys += 1
+                        emit("kv", key_start, last_end, document=doc, key=key, value_type=value_type)
+                    expect_key = not expect_key
+        except yaml.YAMLError as e:
+            close_document()  # up to the last node parsed
+            feats.append({
+                "filepath": str(filepath),
+                "lang": "yaml",
+                "type": "error",
+                "error": str(e),
+                "source": ""
+            })
+    return feats
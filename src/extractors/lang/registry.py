@@ -0,0 +1,68 @@
+"""
+Suffix → extractor registry for the per-language extractors.
+
+Extractor modules are imported on first use, so a worker only loads the
+grammars it actually needs; parsers come from `tree_sitter_loader.get_parser`,
+which keeps one per language per process.
+"""
+from __future__ import annotations
+
+import importlib
+from functools import lru_cache
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, Dict, Optional, Tuple
+
+# suffix -> (module, function)
+EXTRACTORS: Dict[str, Tuple[str, str]] = {
+    ".cs":   ("src.extractors.lang.extract_csharp", "extract_csharp_features"),
+    ".ts":   ("src.extractors.lang.extract_js", "extract_js_features"),
+    ".tsx":  ("src.extractors.lang.extract_js", "extract_js_features"),
+    ".js":   ("src.extractors.lang.extract_js", "extract_js_features"),
+    ".jsx":  ("src.extractors.lang.extract_js", "extract_js_features"),
+    ".css":  ("src.extractors.lang.extract_css", "extract_css_features"),
+    ".html": ("src.extractors.lang.extract_html", "extract_html_features"),
+    ".c":    ("src.extractors.lang.extract_c", "extract_c_features"),
+    ".h":    ("src.extractors.lang.extract_cpp", "extract_cpp_features"),
+    ".cc":   ("src.extractors.lang.extract_cpp", "extract_cpp_features"),
+    ".cpp":  ("src.extractors.lang.extract_cpp", "extract_cpp_features"),
+    ".cxx":  ("src.extractors.lang.extract_cpp", "extract_cpp_features"),
+    ".hh":   ("src.extractors.lang.extract_cpp", "extract_cpp_features"),
+    ".hpp":  ("src.extractors.lang.extract_cpp", "extract_cpp_features"),
+    ".py":   ("src.extractors.lang.extract_python", "extract_python_features"),
+    ".pyi":  ("src.extractors.lang.extract_python", "extract_python_features"),
+    ".json": ("src.extractors.lang.extract_json", "extract_json_features"),
+    ".sql":  ("src.extractors.lang.extract_sql", "extract_sql_features"),
+    ".yaml": ("src.extractors.lang.extract_yaml", "extract_yaml_features"),
+    ".yml":  ("src.extractors.lang.extract_yaml", "extract_yaml_features"),
+}
+
+# Extractors that stream their input in bounded memory, so no size ceiling
+# needs to apply to these suffixes
+STREAMING = frozenset({".json", ".sql", ".yaml", ".yml"})
+
+
+def register(suffix: str, module: str, function: str) -> None:
+    """Route `suffix` (lower-case, with dot) to `module.function`."""
+    EXTRACTORS[suffix] = (module, function)
+    _load.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def _load(module: str, function: str) -> Callable:
+    return getattr(importlib.import_module(module), function)
+
+
+def get_module(path: Path) -> Optional[ModuleType]:
+    """
+    The module behind `path`'s extractor. Engine-based modules expose
+    `LANG_ID`, `LANG`, `QUERY`, `FIELDS` and optionally `CONVERT`.
+    """
+    entry = EXTRACTORS.get(Path(path).suffix.lower())
+    return importlib.import_module(entry[0]) if entry else None
+
+
+def get_extractor(path: Path) -> Optional[Callable[[Path], list]]:
+    """The registered extractor for `path`'s suffix, or None."""
+    entry = EXTRACTORS.get(Path(path).suffix.lower())
+    return _load(*entry) if entry else None
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Paths/sec of Stage-1 pattern matching, before and after `PatternIndex`.
+
+"before" replays the old `SummaryExtractor.find_pattern` loop (`fnmatch` per
+glob per pattern, lower-casing the path per directory hint); "after" asks a
+`PatternIndex` built from the same patterns, cold (empty memo) and warm
+(every path seen once). Both run over the corpus paths and must agree on
+every verdict. Patterns are the inline set from `pattern_loader.py`, so no
+database is needed.
+
+Usage:
+    python src/extractors/pattern_benchmark.py --source pyxis [--limit 200000]
+"""
+import argparse
+import fnmatch
+import os
+import sys
+import time
+from pathlib import Path
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.extractors.utils.patterns import PatternIndex
+from src.extractors.utils.walker import walk_files
+from src.storage.pattern_loader import PATTERNS
+
+
+def legacy_find(patterns, file_path):
+    """The old `find_pattern`: every glob of every pattern, in order."""
+    basename = Path(file_path).name.lower()
+    if basename.endswith('.json'):
+        basename = basename[:-5]
+    for pat in patterns:
+        if not any(fnmatch.fnmatch(basename, g.lower()) for g in pat["file_patterns"]):
+            continue
+        if dirs := pat.get("directories"):
+            if not any(d.lower() in file_path.lower() for d in dirs):
+                continue
+        return pat
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pattern matching paths/sec benchmark")
+    parser.add_argument("--source", "-s", type=Path, required=True, help="Corpus root, e.g. pyxis")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many paths")
+    args = parser.parse_args()
+
+    paths = []
+    for fp, _ in walk_files(args.source.resolve()):
+        paths.append(str(fp))
+        if args.limit and len(paths) >= args.limit:
+            break
+
+    t0 = time.perf_counter()
+    before = [legacy_find(PATTERNS, p) for p in paths]
+    legacy = time.perf_counter() - t0
+
+    index = PatternIndex(PATTERNS)
+    t0 = time.perf_counter()
+    after = [index.find(p) for p in paths]
+    cold = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for p in paths:
+        index.find(p)
+    warm = time.perf_counter() - t0
+
+    mismatches = sum(1 for a, b in zip(before, after) if a is not b)
+    matched = sum(1 for a in after if a is not None)
+    print(f"{len(paths)} paths, {len(PATTERNS)} patterns, {matched} matched, {mismatches} mismatches")
+    print(f"before (fnmatch loop):      {len(paths) / legacy if legacy else 0:,.0f} paths/sec")
+    print(f"after  (index, cold memo):  {len(paths) / cold if cold else 0:,.0f} paths/sec")
+    print(f"after  (index, warm memo):  {len(paths) / warm if warm else 0:,.0f} paths/sec")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,20 +2,63 @@
 """
 Refactored Tree-sitter Sidecar AST Extractor
 
-- Walks SOURCE_IN tree, posts eligible files to the TS_API sidecar
-- Emits raw AST JSON for each file under OUT_DIR preserving directory structure
+- Streams SOURCE_IN with the shared walker (excluded dirs and .gitignore
+  matches pruned during descent), posts eligible files to the TS_API sidecar
+- Packs files into size-bounded batches for `/parse/batch` (NDJSON results)
+- Reuses keep-alive connections per worker thread, or runs an asyncio driver
+  with a bounded number of in-flight requests (`--async`)
+- `--local` skips the sidecar and runs the per-language extractors from
+  `src.extractors.lang.registry` directly in a process pool (one cached parser
+  per language per worker), emitting structured, span-based features
+- Classifies files by content before parsing (magic bytes, NUL sniffing, size
+  ceiling, shebangs, minified/generated markers) and skips binary, minified,
+  generated and oversize files; verdicts are cached per content hash
+- Keeps a manifest in OUT_DIR so reruns only extract new or changed files and
+  delete outputs for removed ones (`--full` ignores it)
+- Stamps every record with its file's content hash (`hash`, BLAKE2b-128),
+  the one the manifest computed while planning, so later stages can key,
+  dedupe and skip by content
+- Emits size-capped JSONL shards with a path → (shard, offset) index under
+  OUT_DIR/shards (`--format shards`, default), or one AST JSON per file
+  preserving directory structure (`--format files`)
+- Keeps OUT_DIR/symbols.sqlite (`src.storage.symbol_index`) in step with the
+  outputs, for exact and prefix symbol lookups and reference-graph
+  neighborhoods by the API, and notes each output's path entries in the
+  manifest so Stage 1 does not have to read the outputs
 - Includes robust logging, error handling, concurrency, and filetype mapping
 
 Usage:
     python src/extractors/sidecar_ast_extractor.py --source pyxis --out generated/ast_output/output
 """
 import os
+import sys
 import json
 import argparse
 import requests
 import logging
+import threading
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Collection, Iterable, Iterator, List, Tuple
+from concurrent.futures import (
+    FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait,
+)
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.extractors.lang.registry import STREAMING
+from src.extractors.utils.classify import DEFAULT_MAX_BYTES, SKIP_KINDS, VerdictCache
+from src.extractors.utils.manifest import ExtractionManifest
+from src.extractors.utils.shards import (
+    DEFAULT_SHARD_BYTES, SHARD_DIR, ShardIndex, ShardReader, compact, shard_dir,
+)
+from src.extractors.utils.sidecar import (
+    DEFAULT_BATCH_BYTES, DEFAULT_BATCH_FILES, FALLBACK_MIME, LANG_MAP, fallback_features,
+    iter_batches, iter_jobs, make_sink, sidecar_lang, with_hash,
+)
+from src.extractors.utils.walker import walk_files
+from src.storage.symbol_index import SYMBOLS_NAME, SymbolIndex
 
 # Configure logging
 logging.basicConfig(
@@ -24,32 +67,88 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Supported languages mapping
-LANG_MAP = {
-    ".cs":  "c_sharp",
-    ".ts":  "typescript",
-    ".tsx": "tsx",
-    ".js":  "javascript",
-    ".css": "css",
-    ".html":"html",
-    ".json":"json",
-}
+# Bump whenever the output format changes so the manifest invalidates old outputs
+EXTRACTOR_VERSION = "9"
+
+_local = threading.local()
+
+
+def _session() -> requests.Session:
+    """
+    One keep-alive `requests.Session` per worker thread.
+    """
+    sess = getattr(_local, "session", None)
+    if sess is None:
+        sess = _local.session = requests.Session()
+    return sess
+
+
+def run_bounded(executor: Executor, calls: Iterable[Tuple[Callable, ...]], window: int) -> Iterator[Any]:
+    """
+    Submit `(fn, *args)` calls to `executor` keeping at most `window` pending,
+    yielding results as they finish, so a lazy call stream is never
+    materialized.
+    """
+    pending = set()
+    for fn, *fn_args in calls:
+        if len(pending) >= window:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield fut.result()
+        pending.add(executor.submit(fn, *fn_args))
+    for fut in as_completed(pending):
+        yield fut.result()
+
 
-# Fallback MIME type
-FALLBACK_MIME = "text/plain"
+def extract_batch(batch: List[Path], source_root: Path, sink, ts_api: str) -> List[Tuple[Path, Any]]:
+    """
+    Send a batch of sidecar-supported files to `/parse/batch` in one request and
+    write each NDJSON result to `sink` as it streams back. Returns
+    `(relative path, output location)` for every file written.
+    """
+    rels = [fp.relative_to(source_root) for fp in batch]
+    written: List[Tuple[Path, Any]] = []
+    handles = []
+    try:
+        for fp, rel in zip(batch, rels):
+            handles.append(("files", (rel.as_posix(), fp.open("rb"), FALLBACK_MIME)))
+        resp = _session().post(
+            f"{ts_api}/parse/batch",
+            data={"lang_ids": [sidecar_lang(fp) for fp in batch]},
+            files=handles,
+            stream=True,
+            timeout=30 + len(batch),
+        )
+        resp.raise_for_status()
+        with resp:
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                row = json.loads(line)
+                rel = rels[row["index"]]
+                if "error" in row:
+                    logger.error(f"Failed to extract {batch[row['index']]}: {row['error']}")
+                    continue
+                written.append((rel, sink.write(rel, row.get("features", []))))
+    except Exception as e:
+        logger.error(f"Failed to extract batch of {len(batch)} files starting at {batch[0]}: {e}")
+    finally:
+        for _, (_, fh, _) in handles:
+            fh.close()
+    return written
 
 
-def extract_file(fp: Path, source_root: Path, out_root: Path, ts_api: str) -> None:
+def extract_file(fp: Path, source_root: Path, sink, ts_api: str) -> Tuple[Path, Any] | None:
     """
-    Send a file to Tree-sitter sidecar and write out AST JSON.
+    Send a file to Tree-sitter sidecar and write its features to `sink`.
+    Returns `(relative path, output location)` on success.
     """
     try:
         rel = fp.relative_to(source_root)
-        ext = fp.suffix.lower()
-        if ext in LANG_MAP:
-            lang_id = LANG_MAP[ext]
+        lang_id = sidecar_lang(fp)
+        if lang_id is not None:
             with fp.open("rb") as f:
-                resp = requests.post(
+                resp = _session().post(
                     f"{ts_api}/parse",
                     params={"lang_id": lang_id},
                     files={"file": (fp.name, f, FALLBACK_MIME)},
@@ -59,20 +158,103 @@ def extract_file(fp: Path, source_root: Path, out_root: Path, ts_api: str) -> No
             feats = resp.json().get("features", [])
         else:
             # Fallback for unsupported extensions
-            text = fp.read_text("utf-8", errors="ignore")
-            feats = [{
-                "filepath": str(rel),
-                "lang": ext.lstrip('.'),
-                "source": text,
-            }]
-        # Write output
-        out_path = out_root / rel
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        out_file = out_path.with_suffix(ext + ".json")
-        out_file.write_text(json.dumps(feats, ensure_ascii=False, indent=2), encoding="utf-8")
-        logger.debug(f"Extracted AST for {rel} → {out_file.relative_to(out_root)}")
+            feats = fallback_features(fp, rel)
+        return rel, sink.write(rel, feats)
     except Exception as e:
         logger.error(f"Failed to extract {fp}: {e}")
+        return None
+
+
+def parse_local(fp: Path, rel: Path, lang_id: str) -> list:
+    """
+    Parse `fp` in-process with this worker's cached parser; same record shape
+    as the sidecar's `/parse`.
+    """
+    from src.extractors.utils.tree_sitter_loader import get_parser
+
+    code = fp.read_bytes()
+    get_parser(lang_id).parse(code)
+    return [{
+        "filepath": str(rel),
+        "lang": lang_id,
+        "source": code.decode("utf-8", errors="replace"),
+    }]
+
+
+def structured_features(fp: Path, rel: Path) -> list:
+    """
+    `--local` features for `fp`: the registered per-language extractor when
+    there is one (see `spans.to_records` for the record layout), else a
+    parse-checked raw record for other sidecar languages, else the raw-text
+    fallback.
+    """
+    from src.extractors.lang.registry import get_extractor
+    from src.extractors.utils.spans import to_records
+
+    extract = get_extractor(fp)
+    if extract is not None:
+        return to_records(extract(fp), str(rel))
+    lang_id = sidecar_lang(fp)
+    if lang_id is not None:
+        return parse_local(fp, rel, lang_id)
+    return fallback_features(fp, rel)
+
+
+_worker_sink = None
+
+
+def extract_local_batch(batch: List[Path], source_root: Path, out_root: Path,
+                        fmt: str, shard_bytes: int,
+                        digests: List[str | None] | None = None) -> List[Tuple[Path, Any]]:
+    """
+    Process-pool task for `--local`: extract every file in `batch` with
+    `structured_features` and write it to this worker's own sink, flushed before returning
+    since workers are recycled without notice. `digests` are the content
+    hashes of the files, in order. Returns
+    `(relative path, output location)` for every file written.
+    """
+    global _worker_sink
+    if _worker_sink is None:
+        _worker_sink = make_sink(fmt, out_root, shard_bytes)
+    written: List[Tuple[Path, Any]] = []
+    for fp, digest in zip(batch, digests or [None] * len(batch)):
+        try:
+            rel = fp.relative_to(source_root)
+            feats = with_hash(structured_features(fp, rel), digest)
+            written.append((rel, _worker_sink.write(rel, feats)))
+        except Exception as e:
+            logger.error(f"Failed to extract {fp}: {e}")
+    _worker_sink.flush()
+    return written
+
+
+def classify_files(files: Iterable[Path], source_root: Path, manifest: ExtractionManifest,
+                   cache: VerdictCache, max_bytes: int = DEFAULT_MAX_BYTES,
+                   skipped: List[Tuple[str, str | None]] | None = None,
+                   uncapped: Collection[str] = frozenset()) -> Iterator[Path]:
+    """
+    Lazily drop planned files the classifier rejects (binary, minified,
+    generated, oversize), marking them skipped in `manifest`. Each skip is
+    appended to `skipped` as `(key, earlier output or None)`. Suffixes in
+    `uncapped` are exempt from the size ceiling.
+    """
+    for fp in files:
+        rel = fp.relative_to(source_root)
+        digest = manifest.pending_hash(rel)
+        try:
+            limit = None if fp.suffix.lower() in uncapped else max_bytes
+            kind = (cache.classify(fp, fp.stat().st_size, digest, LANG_MAP, limit)[0]
+                    if digest else "text")
+        except OSError as e:
+            logger.error(f"Failed to classify {fp}: {e}")
+            continue
+        if kind not in SKIP_KINDS:
+            yield fp
+            continue
+        logger.debug(f"Skipping {kind} file {rel}")
+        previous = manifest.skip(rel, kind)
+        if skipped is not None:
+            skipped.append((rel.as_posix(), previous))
 
 
 def main():
@@ -90,8 +272,52 @@ def main():
         help="Tree-sitter sidecar API endpoint"
     )
     parser.add_argument(
-        "--workers", "-w", type=int, default=8,
-        help="Number of parallel workers"
+        "--workers", "-w", type=int, default=None,
+        help="Number of parallel workers (default: 8 threads, or one process per core with --local)"
+    )
+    parser.add_argument(
+        "--batch-bytes", type=int, default=DEFAULT_BATCH_BYTES,
+        help="Approximate upper bound on bytes per /parse/batch request"
+    )
+    parser.add_argument(
+        "--batch-files", type=int, default=DEFAULT_BATCH_FILES,
+        help="Maximum files per /parse/batch request (1 = per-file /parse)"
+    )
+    parser.add_argument(
+        "--async", dest="use_async", action="store_true",
+        help="Use the asyncio driver with a pooled HTTP client instead of worker threads"
+    )
+    parser.add_argument(
+        "--max-in-flight", type=int, default=64,
+        help="Maximum concurrent sidecar requests in --async mode"
+    )
+    parser.add_argument(
+        "--write-queue", type=int, default=256,
+        help="Parsed results buffered ahead of disk writes in --async mode"
+    )
+    parser.add_argument(
+        "--local", action="store_true",
+        help="Parse in a local process pool instead of calling the sidecar"
+    )
+    parser.add_argument(
+        "--recycle-after", type=int, default=200,
+        help="Restart each --local worker process after this many batches"
+    )
+    parser.add_argument(
+        "--format", choices=["shards", "files"], default="shards",
+        help="Output layout: JSONL shards with an index, or one JSON file per source file"
+    )
+    parser.add_argument(
+        "--shard-bytes", type=int, default=DEFAULT_SHARD_BYTES,
+        help="Maximum size of one output shard"
+    )
+    parser.add_argument(
+        "--max-file-bytes", type=int, default=DEFAULT_MAX_BYTES,
+        help="Skip source files larger than this"
+    )
+    parser.add_argument(
+        "--full", action="store_true",
+        help="Ignore the manifest and re-extract every file"
     )
     parser.add_argument(
         "--clean", action="store_true",
@@ -115,16 +341,136 @@ def main():
     out_root.mkdir(parents=True, exist_ok=True)
     logger.info(f"Scanning source: {source_root}")
 
-    files = [p for p in source_root.rglob("*") if p.is_file()]
-    logger.info(f"Found {len(files)} files to process.")
+    manifest = ExtractionManifest.load(out_root, EXTRACTOR_VERSION)
+    verdicts = VerdictCache.load(out_root)
+    skipped: List[Tuple[str, str | None]] = []
+    todo = classify_files(
+        manifest.plan(walk_files(source_root), source_root, force=args.full),
+        source_root, manifest, verdicts, args.max_file_bytes, skipped,
+        # --local extractors stream these, so huge seed/lock files are fine
+        uncapped=STREAMING if args.local else frozenset(),
+    )
+
+    sharded = args.format == "shards"
+    index = ShardIndex.load(shard_dir(out_root)) if sharded else None
+
+    written = run_extraction(args, todo, source_root, out_root, ts_api, manifest.pending_hash)
+
+    for rel, loc in written:
+        if sharded:
+            index.update(rel.as_posix(), loc)
+            loc = f"{SHARD_DIR}/{loc[0]}"
+        manifest.record(rel, loc)
+    for key, previous in skipped:
+        if previous is None:
+            continue
+        if sharded:
+            index.remove(key)
+        else:
+            (out_root / previous).unlink(missing_ok=True)
+    removed = manifest.prune(manifest.seen, delete_outputs=not sharded)
+    if sharded:
+        for key in removed:
+            index.remove(key)
+        if compact(out_root, index, args.shard_bytes):
+            logger.info("Compacted output shards.")
+            for key, (shard, _, _) in index.entries.items():
+                if key in manifest.files:
+                    manifest.files[key]["output"] = f"{SHARD_DIR}/{shard}"
+        index.save()
+    index_outputs(out_root, manifest, index, [rel.as_posix() for rel, _ in written],
+                  removed + [key for key, _ in skipped])
+    manifest.save()
+    # Verdicts of deleted or since-changed files would otherwise pile up forever
+    verdicts.prune(entry["hash"] for entry in manifest.files.values())
+    verdicts.save()
+    logger.info(
+        f"✅ AST extraction complete: {len(manifest.seen)} files seen, {len(written)} written, "
+        f"{len(skipped)} skipped, {manifest.unchanged} unchanged, {len(removed)} removed."
+    )
+
+
+def index_outputs(out_root: Path, manifest: ExtractionManifest, index: ShardIndex | None,
+                  written: List[str], removed: Iterable[str]) -> None:
+    """
+    Bring the symbol index in `out_root` up to date with this run: re-index
+    the `written` paths and drop the `removed` ones. A newly created index is
+    filled from every output in the manifest instead. The same pass notes
+    each output's path entries in the manifest, for Stage 1.
+    """
+    symbols = SymbolIndex.open(out_root / SYMBOLS_NAME)
+    reader = ShardReader(out_root, index) if index is not None else None
+
+    def load(key: str) -> list:
+        if reader is not None:
+            return reader.get(key)
+        return json.loads((out_root / manifest.files[key]["output"]).read_text(encoding="utf-8"))
+
+    outputs = [k for k, entry in manifest.files.items()
+               if entry.get("output") and (reader is None or k in index.entries)]
+    if symbols.is_new:
+        written = outputs
+    else:
+        # outputs of runs from before the manifest kept their paths
+        written = list(dict.fromkeys(written + [k for k in outputs if "paths" not in manifest.files[k]]))
+    try:
+        for key in removed:
+            symbols.remove_file(key)
+        count = 0
+        for key in written:
+            try:
+                records = load(key)
+                manifest.set_paths(key, records)
+                count += symbols.replace_file(key, records)
+            except Exception as e:
+                logger.error(f"Failed to index symbols of {key}: {e}")
+        logger.info(f"Indexed {count} symbols from {len(written)} files.")
+    finally:
+        symbols.close()
 
-    # Parallel extraction
-    with ThreadPoolExecutor(max_workers=args.workers) as executor:
-        futures = [executor.submit(extract_file, fp, source_root, out_root, ts_api) for fp in files]
-        for _ in as_completed(futures):
-            pass  # errors logged in extract_file
 
-    logger.info("✅ Sidecar AST extraction complete.")
+def run_extraction(args: argparse.Namespace, files: Iterator[Path], source_root: Path,
+                   out_root: Path, ts_api: str,
+                   digests: Callable[[Path], str | None] | None = None) -> List[Tuple[Path, Any]]:
+    """
+    Extract the (lazy) `files` stream with the mode selected on the command
+    line and return `(relative path, output location)` for every file written.
+    `digests` maps a relative path to the file's content hash for `with_hash`.
+    """
+    if args.local:
+        workers = args.workers or os.cpu_count()
+        calls = ((extract_local_batch, b, source_root, out_root, args.format, args.shard_bytes,
+                  [digests(fp.relative_to(source_root)) for fp in b] if digests else None)
+                 for b in iter_batches(files, args.batch_bytes, max(args.batch_files, 1)))
+        with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=args.recycle_after) as executor:
+            return [rel for res in run_bounded(executor, calls, workers * 4) for rel in res]
+
+    # Sidecar-supported files go out in batches; everything else is a local fallback
+    jobs = iter_jobs(files, args.batch_bytes, args.batch_files)
+    sink = make_sink(args.format, out_root, args.shard_bytes, digests)
+    try:
+        if args.use_async:
+            import asyncio
+            from src.extractors.sidecar_async_client import extract_async
+            return asyncio.run(extract_async(
+                jobs, source_root, sink, ts_api,
+                max_in_flight=args.max_in_flight, write_queue=args.write_queue,
+            ))
+
+        # Parallel extraction
+        workers = args.workers or 8
+        calls = ((extract_batch if kind == "batch" else extract_file, work, source_root, sink, ts_api)
+                 for kind, work in jobs)
+        written: List[Tuple[Path, Any]] = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for res in run_bounded(executor, calls, workers * 4):  # errors logged in extract_*
+                if isinstance(res, list):
+                    written.extend(res)
+                elif res is not None:
+                    written.append(res)
+        return written
+    finally:
+        sink.close()
 
 
 if __name__ == "__main__":
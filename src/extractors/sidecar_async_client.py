@@ -0,0 +1,140 @@
+"""
+Asyncio driver for the Tree-sitter sidecar.
+
+Keeps many requests in flight over a keep-alive connection pool instead of one
+thread per request:
+
+- `max_in_flight` caps concurrent requests (and pooled connections)
+- parsed results go through a bounded queue to a few disk writers, so slow
+  writes stall new requests instead of buffering results in memory
+- file reads, sink writes and pulling the next job (which plans, hashes and
+  classifies files) run on the default thread pool so the event loop only
+  ever waits on the network
+
+Used by `sidecar_ast_extractor.py --async`.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from pathlib import Path
+from typing import Any, Iterable, List, Tuple
+
+import httpx
+
+from src.extractors.utils.sidecar import FALLBACK_MIME, fallback_features, sidecar_lang
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_IN_FLIGHT = 64
+DEFAULT_WRITE_QUEUE = 256
+DEFAULT_WRITERS = 4
+
+_DONE = object()
+
+
+async def _writer(queue: asyncio.Queue, sink, written: List[Tuple[Path, Any]]) -> None:
+    while True:
+        item = await queue.get()
+        try:
+            if item is _DONE:
+                return
+            rel, feats = item
+            written.append((rel, await asyncio.to_thread(sink.write, rel, feats)))
+        except Exception as e:
+            logger.error(f"Failed to write {item[0]}: {e}")
+        finally:
+            queue.task_done()
+
+
+async def _fetch_batch(client: httpx.AsyncClient, batch: List[Path], source_root: Path,
+                       queue: asyncio.Queue) -> None:
+    rels = [fp.relative_to(source_root) for fp in batch]
+    try:
+        blobs = await asyncio.to_thread(lambda: [fp.read_bytes() for fp in batch])
+        files = [("files", (rel.as_posix(), blob, FALLBACK_MIME)) for rel, blob in zip(rels, blobs)]
+        del blobs
+        data = {"lang_ids": [sidecar_lang(fp) for fp in batch]}
+        async with client.stream("POST", "/parse/batch", data=data, files=files) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line:
+                    continue
+                row = json.loads(line)
+                if "error" in row:
+                    logger.error(f"Failed to extract {batch[row['index']]}: {row['error']}")
+                    continue
+                await queue.put((rels[row["index"]], row.get("features", [])))
+    except Exception as e:
+        logger.error(f"Failed to extract batch of {len(batch)} files starting at {batch[0]}: {e}")
+
+
+async def _fetch_file(client: httpx.AsyncClient, fp: Path, source_root: Path,
+                      queue: asyncio.Queue) -> None:
+    try:
+        rel = fp.relative_to(source_root)
+        lang_id = sidecar_lang(fp)
+        if lang_id is not None:
+            blob = await asyncio.to_thread(fp.read_bytes)
+            resp = await client.post(
+                "/parse",
+                params={"lang_id": lang_id},
+                files={"file": (fp.name, blob, FALLBACK_MIME)},
+            )
+            resp.raise_for_status()
+            feats = resp.json().get("features", [])
+        else:
+            feats = await asyncio.to_thread(fallback_features, fp, rel)
+        await queue.put((rel, feats))
+    except Exception as e:
+        logger.error(f"Failed to extract {fp}: {e}")
+
+
+async def extract_async(
+    jobs: Iterable[Tuple[str, Any]],
+    source_root: Path,
+    sink,
+    ts_api: str,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    write_queue: int = DEFAULT_WRITE_QUEUE,
+    writers: int = DEFAULT_WRITERS,
+    timeout: float = 60.0,
+) -> List[Tuple[Path, Any]]:
+    """
+    Run `utils.sidecar.iter_jobs` jobs: `("batch", paths)` via
+    `/parse/batch` and `("file", path)` via `/parse` or the local fallback,
+    with at most `max_in_flight` requests outstanding. `jobs` is consumed
+    lazily, off the event loop. Results go to `sink` (see `utils.sidecar.make_sink`).
+    Returns `(relative path, output location)` for every file written.
+    """
+    written: List[Tuple[Path, Any]] = []
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=write_queue)
+    slots = asyncio.Semaphore(max_in_flight)
+    pending: set[asyncio.Task] = set()
+
+    def _release(task: asyncio.Task) -> None:
+        pending.discard(task)
+        slots.release()
+
+    async with httpx.AsyncClient(base_url=ts_api, limits=limits, timeout=timeout) as client:
+        writer_tasks = [asyncio.create_task(_writer(queue, sink, written)) for _ in range(writers)]
+        jobs = iter(jobs)
+        while True:
+            # The job stream plans, hashes and classifies files as it goes
+            job = await asyncio.to_thread(next, jobs, None)
+            if job is None:
+                break
+            kind, work = job
+            fetch = _fetch_batch if kind == "batch" else _fetch_file
+            await slots.acquire()  # backpressure: wait for a free request slot
+            task = asyncio.create_task(fetch(client, work, source_root, queue))
+            pending.add(task)
+            task.add_done_callback(_release)
+        if pending:
+            await asyncio.gather(*pending)
+        for _ in writer_tasks:
+            await queue.put(_DONE)
+        await asyncio.gather(*writer_tasks)
+    return written
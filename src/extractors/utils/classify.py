@@ -0,0 +1,253 @@
+"""
+Content-based file classification ahead of parsing.
+
+`LANG_MAP` only looks at suffixes, so images, shared objects, minified bundles
+and vendored generated code used to be read as text and written out as
+"source", then tokenized and embedded downstream. `classify` looks at the
+bytes instead: magic numbers, NUL bytes and control-character density,
+a size ceiling, shebang lines, minified-line heuristics and generated-file
+markers. It returns `(kind, lang_id)` where kind is one of
+
+- `source`: parse with the sidecar grammar `lang_id`
+- `text`: keep as a raw-text fallback record
+- `binary`, `minified`, `generated`, `oversize`: skip
+
+Verdicts only depend on content (plus the file name for suffix routing), so
+`VerdictCache` keeps them per content hash in the output directory; vendored
+copies of the same blob and unchanged files are classified once.
+"""
+from __future__ import annotations
+
+import codecs
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Verdict = Tuple[str, Optional[str]]  # (kind, lang_id)
+
+SKIP_KINDS = frozenset({"binary", "minified", "generated", "oversize"})
+CACHE_NAME = ".classify-cache"  # no .json suffix so output globs skip it
+
+HEAD_BYTES = 8192
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+MINIFIED_LINE = 1000       # a head line this long in code is treated as minified
+MINIFIED_AVG_LINE = 300    # ... as is this average line length
+
+# Short printable prefixes ("MZ", "ID3", "RIFF", ...) also start ordinary text,
+# so those formats must match more of their header structure.
+MAGIC = (
+    b"\x89PNG", b"\xff\xd8\xff", b"GIF87a", b"GIF89a", b"II*\x00", b"MM\x00*",
+    b"\x00\x00\x01\x00", b"%PDF-", b"PK\x03\x04", b"PK\x05\x06", b"\x1f\x8b",
+    b"\xfd7zXZ\x00", b"7z\xbc\xaf\x27\x1c", b"Rar!\x1a\x07", b"\x7fELF",
+    b"\xca\xfe\xba\xbe", b"\xfe\xed\xfa\xce", b"\xfe\xed\xfa\xcf", b"\xcf\xfa\xed\xfe",
+    b"\xce\xfa\xed\xfe", b"\x00asm", b"SQLite format 3\x00", b"wOFF\x00", b"wOFFOTTO", b"wOF2",
+    b"\x00\x01\x00\x00\x00", b"OTTO\x00", b"ID3\x02\x00", b"ID3\x03\x00", b"ID3\x04\x00",
+    b"fLaC\x00", b"fLaC\x80", b"OggS\x00",
+)
+MAGIC_STRUCTURED = re.compile(
+    rb"RIFF.{4}(?:WAVE|AVI |WEBP|RMID|ACON|CDXA)"  # size, then form type
+    rb"|BZh[1-9](?:1AY&SY|\x17rE8P\x90)"              # block size, then block or end magic
+    rb"|MZ.{58}(?P<pe>.{4})",                        # DOS header; checked for "PE\0\0" below
+    re.DOTALL,
+)
+
+TEXT_BOMS = (codecs.BOM_UTF8, codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE,
+             codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+
+BINARY_SUFFIXES = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".tif", ".tiff", ".pdf",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".jar", ".war", ".nupkg",
+    ".so", ".dll", ".exe", ".dylib", ".a", ".lib", ".o", ".obj", ".pdb", ".bin", ".class",
+    ".pyc", ".wasm", ".woff", ".woff2", ".ttf", ".otf", ".eot", ".mp3", ".mp4", ".wav",
+    ".snk", ".pfx", ".db", ".sqlite",
+})
+
+MINIFIED_SUFFIXES = (".min.js", ".min.css", ".min.mjs", ".bundle.js", ".js.map", ".css.map")
+MINIFIABLE_SUFFIXES = frozenset({".js", ".mjs", ".cjs", ".css"})
+
+# Matched case-sensitively, one marker per line, in the leading comment block
+GENERATED_MARKERS = re.compile(
+    rb"^\W*(?:Code generated .* DO NOT EDIT\.\r?$|@generated\b|<auto-generated\b"
+    rb"|This (?:code|file) was (?:automatically |auto-)?generated\b"
+    rb"|Generated by the protocol buffer compiler\.)",
+    re.MULTILINE,
+)
+HEADER_BYTES = 2048
+COMMENT_PREFIXES = (b"//", b"#", b"/*", b"*", b"<!--", b"--", b";", b"<?xml")
+BLOCK_COMMENTS = ((b"/*", b"*/"), (b"<!--", b"-->"))
+
+SHEBANG_LANGS = {
+    "node": "javascript",
+    "nodejs": "javascript",
+    "deno": "typescript",
+    "ts-node": "typescript",
+}
+
+_TEXT_CONTROL = {7, 8, 9, 10, 12, 13, 27}
+
+
+def shebang_lang(head: bytes) -> Optional[str]:
+    """Sidecar language for a `#!` interpreter line in `head`, if supported."""
+    if not head.startswith(b"#!"):
+        return None
+    words = head[2:].split(b"\n", 1)[0].decode("utf-8", errors="ignore").split()
+    if words and os.path.basename(words[0]) == "env":
+        words = [w for w in words[1:] if not w.startswith("-")]
+    return SHEBANG_LANGS.get(os.path.basename(words[0])) if words else None
+
+
+def is_binary(head: bytes) -> bool:
+    """
+    Magic numbers, NUL bytes, or mostly non-text control characters. Text
+    with a Unicode BOM never is: UTF-16 (common for SQL Server scripts) is
+    full of NULs.
+    """
+    if head.startswith(TEXT_BOMS):
+        return False
+    if head.startswith(MAGIC):
+        return True
+    m = MAGIC_STRUCTURED.match(head)
+    if m and (m["pe"] is None or head[int.from_bytes(m["pe"], "little"):][:4] == b"PE\x00\x00"):
+        return True
+    if b"\x00" in head:
+        return True
+    if not head:
+        return False
+    control = sum(1 for b in head if b < 32 and b not in _TEXT_CONTROL)
+    return control / len(head) > 0.1
+
+
+def header_comments(head: bytes) -> bytes:
+    """The blank and comment lines at the top of `head` (within `HEADER_BYTES`)."""
+    end, close = 0, None
+    for line in head[:HEADER_BYTES].splitlines(keepends=True):
+        stripped = line.strip()
+        if close is None and stripped and not stripped.startswith(COMMENT_PREFIXES):
+            break
+        end += len(line)
+        if close is not None:
+            if close in stripped:
+                close = None
+            continue
+        for start, stop in BLOCK_COMMENTS:
+            if stripped.startswith(start) and stop not in stripped[len(start):]:
+                close = stop
+    return head[:end]
+
+
+def is_generated(head: bytes) -> bool:
+    """A generated-code marker in the header comment, e.g. Go's `// Code generated ... DO NOT EDIT.`"""
+    return GENERATED_MARKERS.search(header_comments(head)) is not None
+
+
+def is_minified(name: str, head: bytes) -> bool:
+    lower = name.lower()
+    if lower.endswith(MINIFIED_SUFFIXES):
+        return True
+    if os.path.splitext(lower)[1] not in MINIFIABLE_SUFFIXES:
+        return False
+    lines = head.split(b"\n")
+    if len(head) == HEAD_BYTES and len(lines) > 1:
+        lines = lines[:-1]  # last line is cut off by the head limit
+    longest = max(len(line) for line in lines)
+    return longest >= MINIFIED_LINE or len(head) / len(lines) >= MINIFIED_AVG_LINE
+
+
+def lang_for(path: Path, lang_map: Mapping[str, str], head: Optional[bytes] = None) -> Optional[str]:
+    """
+    Sidecar language for `path`: by suffix, or by shebang for suffixless
+    files (reading the first line when `head` is not given).
+    """
+    lang = lang_map.get(path.suffix.lower())
+    if lang is not None or path.suffix:
+        return lang
+    if head is None:
+        try:
+            with open(path, "rb") as f:
+                head = f.readline(256)
+        except OSError:
+            return None
+    return shebang_lang(head)
+
+
+def classify(path: Path, size: int, lang_map: Mapping[str, str],
+             max_bytes: Optional[int] = DEFAULT_MAX_BYTES) -> Verdict:
+    """
+    Classify `path` (of `size` bytes) from its name and first `HEAD_BYTES`
+    bytes. See the module docstring for the possible kinds. `max_bytes=None`
+    disables the size ceiling.
+    """
+    if path.suffix.lower() in BINARY_SUFFIXES:
+        return "binary", None
+    with open(path, "rb") as f:
+        head = f.read(HEAD_BYTES)
+    if is_binary(head):
+        return "binary", None
+    if max_bytes is not None and size > max_bytes:
+        return "oversize", None
+    if head and is_minified(path.name, head):
+        return "minified", None
+    if is_generated(head):
+        return "generated", None
+    lang = lang_for(path, lang_map, head)
+    return ("source", lang) if lang else ("text", None)
+
+
+class VerdictCache:
+    """
+    Classification verdicts keyed by content hash, name suffixes and size
+    ceiling, persisted as one JSON file in the output directory.
+    """
+
+    def __init__(self, out_root: Path, entries: Dict[str, list] | None = None) -> None:
+        self.out_root = out_root
+        self.entries: Dict[str, list] = entries or {}
+        self.hits = 0
+
+    @property
+    def path(self) -> Path:
+        return self.out_root / CACHE_NAME
+
+    @classmethod
+    def load(cls, out_root: Path) -> "VerdictCache":
+        path = out_root / CACHE_NAME
+        try:
+            entries = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            entries = {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable classification cache {path}: {e}")
+            entries = {}
+        return cls(out_root, entries)
+
+    def save(self) -> None:
+        self.out_root.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.entries, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def prune(self, digests: Iterable[str]) -> int:
+        """Drop verdicts for content hashes not in `digests`; returns how many."""
+        keep = set(digests)
+        stale = [key for key in self.entries if key.split(":", 1)[0] not in keep]
+        for key in stale:
+            del self.entries[key]
+        return len(stale)
+
+    def classify(self, path: Path, size: int, digest: str, lang_map: Mapping[str, str],
+                 max_bytes: Optional[int] = DEFAULT_MAX_BYTES) -> Verdict:
+        """`classify`, answered from the cache when this content was seen before."""
+        # Suffixes take part in routing (`.cs`) and minified detection (`.min.js`)
+        key = f"{digest}:{''.join(path.suffixes[-2:]).lower()}:{max_bytes}"
+        hit = self.entries.get(key)
+        if hit is not None:
+            self.hits += 1
+            return hit[0], hit[1]
+        kind, lang = classify(path, size, lang_map, max_bytes)
+        self.entries[key] = [kind, lang]
+        return kind, lang
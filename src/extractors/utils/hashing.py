@@ -0,0 +1,18 @@
+from __future__ import annotations
+import hashlib
+from pathlib import Path
+
+HASH_NAME = "blake2b-128"
+_CHUNK = 1 << 20
+
+def content_hash(data: bytes) -> str:
+    """Hex BLAKE2b-128 digest of `data`."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def file_hash(path: Path) -> str:
+    """`content_hash` of a file, read in 1 MiB chunks."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(_CHUNK):
+            h.update(chunk)
+    return h.hexdigest()
@@ -0,0 +1,189 @@
+"""
+Persistent record of what the AST extractor already produced.
+
+One JSON file in the output directory maps each source path (relative, posix)
+to `{size, mtime_ns, hash, output, version, paths}`, where `output` is the
+file (or shard) holding its features and `paths` the path entries of those
+records (see `path_entries`) as `[path, count]` runs, or to `{..., skipped}`
+for files the classifier left out (binary, minified, ...). Stage 1 reads
+`paths` from here instead of loading every output with its source text.
+On a rerun a file is skipped when its size and mtime are unchanged, or when they changed but the content hash did
+not; outputs of files that disappeared from the source tree are deleted.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple
+
+from src.extractors.utils.hashing import file_hash
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".extract-manifest"  # no .json suffix so output globs skip it
+
+
+def _path_of(item: Any, found: List[Any]) -> None:
+    if isinstance(item, str):
+        found.append(item)
+    elif isinstance(item, dict):
+        if "filepath" in item:
+            found.append(item["filepath"])
+        elif "value" in item:
+            found.append(item["value"])
+
+
+def path_entries(data: Any) -> List[Any]:
+    """
+    The path of each record in one AST output: strings as they are, dicts by
+    their `filepath` (else `value`); in a dict output, also the items of its
+    list values.
+    """
+    found: List[Any] = []
+    if isinstance(data, list):
+        for item in data:
+            _path_of(item, found)
+    elif isinstance(data, dict):
+        for value in data.values():
+            if isinstance(value, list):
+                for item in value:
+                    _path_of(item, found)
+            else:
+                _path_of(value, found)
+    return found
+
+
+def path_runs(entries: List[Any]) -> List[list]:
+    """`entries` as `[value, count]` runs (every record of a file has the same path)."""
+    runs: List[list] = []
+    for entry in entries:
+        if runs and runs[-1][0] == entry:
+            runs[-1][1] += 1
+        else:
+            runs.append([entry, 1])
+    return runs
+
+
+def expand_runs(runs: List[list]) -> List[Any]:
+    return [value for value, count in runs for _ in range(count)]
+
+
+class ExtractionManifest:
+    def __init__(self, out_root: Path, version: str, files: Dict[str, Dict[str, Any]] | None = None) -> None:
+        self.out_root = out_root
+        self.version = version
+        self.files: Dict[str, Dict[str, Any]] = files or {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self.seen: Set[str] = set()
+        self.unchanged = 0
+
+    @property
+    def path(self) -> Path:
+        return self.out_root / MANIFEST_NAME
+
+    @classmethod
+    def load(cls, out_root: Path, version: str) -> "ExtractionManifest":
+        path = out_root / MANIFEST_NAME
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            files = data.get("files", {})
+        except FileNotFoundError:
+            files = {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable manifest {path}: {e}")
+            files = {}
+        return cls(out_root, version, files)
+
+    def save(self) -> None:
+        self.out_root.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"version": self.version, "files": self.files}, separators=(",", ":")),
+                       encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def plan(self, files: Iterable[Tuple[Path, os.stat_result]], source_root: Path,
+             force: bool = False) -> Iterator[Path]:
+        """
+        Lazily yield the files from `(path, stat)` pairs that need
+        (re)extraction; `force` yields every file. Every key seen is kept in
+        `seen` for `prune`, and skips are counted in `unchanged`. Stat and hash
+        of each yielded file are held until `record`; files that cannot be
+        read are logged and left out.
+        """
+        for fp, st in files:
+            key = fp.relative_to(source_root).as_posix()
+            self.seen.add(key)
+            entry = self.files.get(key)
+            current = (not force and entry is not None and entry.get("version") == self.version
+                       and ("skipped" in entry or (self.out_root / entry["output"]).exists()))
+            if current and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+                self.unchanged += 1
+                continue
+            try:
+                digest = file_hash(fp)
+            except OSError as e:
+                # vanished or unreadable since the walk: keep its old entry
+                logger.error(f"Failed to hash {fp}: {e}")
+                continue
+            if current and entry["hash"] == digest:
+                entry["size"], entry["mtime_ns"] = st.st_size, st.st_mtime_ns
+                self.unchanged += 1
+                continue
+            self._pending[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest}
+            yield fp
+
+    def pending_hash(self, rel: Path) -> str | None:
+        """Content hash computed by `plan` for `rel`, until it is recorded."""
+        entry = self._pending.get(rel.as_posix())
+        return entry["hash"] if entry else None
+
+    def skip(self, rel: Path, kind: str) -> str | None:
+        """
+        Mark `rel` (planned earlier) as deliberately not extracted, so reruns
+        skip it until its content changes. Returns the output of an earlier
+        extraction of `rel`, which the caller should drop.
+        """
+        key = rel.as_posix()
+        entry = self._pending.pop(key, None)
+        if entry is None:
+            return None
+        entry["skipped"] = kind
+        entry["version"] = self.version
+        previous = self.files.get(key, {}).get("output")
+        self.files[key] = entry
+        return previous
+
+    def record(self, rel: Path, output: str) -> None:
+        """
+        Mark `rel` (planned earlier) as extracted to `output`, a posix path
+        relative to the output directory.
+        """
+        key = rel.as_posix()
+        entry = self._pending.pop(key, None)
+        if entry is None:
+            return
+        entry["output"] = output
+        entry["version"] = self.version
+        self.files[key] = entry
+
+    def set_paths(self, key: str, records: Any) -> None:
+        """Note the path entries of the output of `key`, a recorded source path."""
+        entry = self.files.get(key)
+        if entry is not None:
+            entry["paths"] = path_runs(path_entries(records))
+
+    def prune(self, present: Iterable[str], delete_outputs: bool = True) -> List[str]:
+        """
+        Drop manifest entries not in `present` (posix relative source paths)
+        and return their keys. Their output files are deleted unless
+        `delete_outputs` is False (shared outputs such as shards).
+        """
+        keep = set(present)
+        removed = [k for k in self.files if k not in keep]
+        for key in removed:
+            output = self.files.pop(key).get("output")
+            if delete_outputs and output:
+                (self.out_root / output).unlink(missing_ok=True)
+        return removed
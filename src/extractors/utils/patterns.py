@@ -0,0 +1,83 @@
+"""
+Compiled index over the Stage-1 pattern buckets.
+
+`SummaryExtractor.find_pattern` used to try every pattern's globs with
+`fnmatch` in turn, lower-casing the path again for each directory hint.
+`PatternIndex` compiles the lower-cased globs once:
+
+- names without wildcards (`Program.cs`, `web.config`) go in a dict
+- `*<literal>` globs (`*Controller.cs`, `*.tsx`) go in a trie over reversed
+  suffixes, so one walk from the end of the name finds all of them
+- the rest (`use*.ts`, `sp*.sql`) go in one combined regex, which only has
+  to be taken apart when it matches
+
+Candidates from all three are then tried in pattern order against the
+pre-lowered directory hints (still substring checks), so the first pattern
+whose glob and directory both match wins, as before. Verdicts are memoized
+per lower-cased path: every record of a file carries the same `filepath`.
+"""
+from __future__ import annotations
+
+import fnmatch
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+_WILDCARDS = re.compile(r"[*?\[]")
+_HITS = ""  # trie key holding the patterns whose suffix ends at a node; never a character
+
+
+class PatternIndex:
+    def __init__(self, patterns: Sequence[Mapping[str, Any]], cache_size: int = 1 << 16) -> None:
+        self.patterns = list(patterns)
+        self._dirs = [tuple(d.lower() for d in p.get("directories") or ()) for p in self.patterns]
+        self._exact: Dict[str, List[int]] = {}
+        self._suffixes: Dict[str, Any] = {}
+        rest = []
+        for i, pat in enumerate(self.patterns):
+            for glob in pat.get("file_patterns") or ():
+                glob = glob.lower()
+                if not _WILDCARDS.search(glob):
+                    self._exact.setdefault(glob, []).append(i)
+                elif glob.startswith("*") and not _WILDCARDS.search(glob, 1):
+                    node = self._suffixes
+                    for ch in reversed(glob[1:]):
+                        node = node.setdefault(ch, {})
+                    node.setdefault(_HITS, []).append(i)
+                else:
+                    rest.append((i, fnmatch.translate(glob)))
+        self._rest = [(i, re.compile(rx)) for i, rx in rest]
+        self._combined = re.compile("|".join(f"(?:{rx})" for _, rx in rest)) if rest else None
+        self._lookup = lru_cache(maxsize=cache_size)(self._match)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def find(self, file_path: str) -> Optional[Mapping[str, Any]]:
+        """The first pattern whose glob matches the file name and whose directories (if any) the path."""
+        i = self._lookup(file_path.lower())
+        return None if i is None else self.patterns[i]
+
+    def _suffix_hits(self, name: str) -> List[int]:
+        node = self._suffixes
+        hits = list(node.get(_HITS, ()))
+        for ch in reversed(name):
+            node = node.get(ch)
+            if node is None:
+                break
+            hits.extend(node.get(_HITS, ()))
+        return hits
+
+    def _match(self, path: str) -> Optional[int]:
+        name = path.rstrip("/").rpartition("/")[2]
+        if name.endswith(".json"):
+            name = name[:-5]
+        candidates = set(self._exact.get(name, ()))
+        candidates.update(self._suffix_hits(name))
+        if self._combined is not None and self._combined.match(name):
+            candidates.update(i for i, rx in self._rest if rx.match(name))
+        for i in sorted(candidates):
+            dirs = self._dirs[i]
+            if not dirs or any(d in path for d in dirs):
+                return i
+        return None
@@ -0,0 +1,200 @@
+"""
+Sharded, record-oriented AST output.
+
+Instead of one pretty-printed JSON file per source file, the extractor appends
+one compact JSONL record per source file, `{"path": <rel>, "features": [...]}`,
+to size-capped shard files under `<out>/shards/`. `index.jsonl` maps each path
+to `[path, shard, offset, length]`, so readers can stream shards sequentially
+or seek straight to one file's record.
+
+Shards are never rewritten in place: re-extracted files get new records in new
+shards and the index moves to them. `compact` rewrites live records once most
+shard bytes are dead.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+SHARD_DIR = "shards"
+INDEX_NAME = "index.jsonl"
+DEFAULT_SHARD_BYTES = 64 * 1024 * 1024
+
+Location = Tuple[str, int, int]  # (shard file name, byte offset, byte length)
+
+
+def shard_dir(out_root: Path) -> Path:
+    return out_root / SHARD_DIR
+
+
+def has_shards(out_root: Path) -> bool:
+    return (shard_dir(out_root) / INDEX_NAME).exists()
+
+
+class ShardWriter:
+    """
+    Append records to size-capped JSONL shards. Thread-safe; every writer
+    instance uses its own shard names, so separate processes can write into
+    the same directory without coordinating.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_SHARD_BYTES, prefix: str = "ast") -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+        self._tag = uuid.uuid4().hex[:8]
+        self._seq = 0
+        self._fh = None
+        self._name: Optional[str] = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _roll(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._seq += 1
+        self._name = f"{self.prefix}-{self._tag}-{self._seq:05d}.jsonl"
+        self._fh = open(self.directory / self._name, "ab")
+        self._size = 0
+
+    def write_raw(self, line: bytes) -> Location:
+        with self._lock:
+            if self._fh is None or (self._size and self._size + len(line) > self.max_bytes):
+                self._roll()
+            offset = self._size
+            self._fh.write(line)
+            self._size += len(line)
+            return self._name, offset, len(line)
+
+    def write(self, rel: str, feats: list) -> Location:
+        record = {"path": rel, "features": feats}
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        return self.write_raw(line)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+
+class ShardIndex:
+    """path → (shard, offset, length), persisted as `index.jsonl`."""
+
+    def __init__(self, directory: Path, entries: Optional[Dict[str, Location]] = None) -> None:
+        self.directory = directory
+        self.entries: Dict[str, Location] = entries or {}
+
+    @classmethod
+    def load(cls, directory: Path) -> "ShardIndex":
+        entries: Dict[str, Location] = {}
+        try:
+            with open(directory / INDEX_NAME, encoding="utf-8") as f:
+                for line in f:
+                    path, shard, offset, length = json.loads(line)
+                    entries[path] = (shard, offset, length)
+        except FileNotFoundError:
+            pass
+        return cls(directory, entries)
+
+    def save(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.directory / (INDEX_NAME + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for path, loc in self.entries.items():
+                f.write(json.dumps([path, *loc], ensure_ascii=False, separators=(",", ":")) + "\n")
+        os.replace(tmp, self.directory / INDEX_NAME)
+
+    def update(self, rel: str, loc: Location) -> None:
+        self.entries[rel] = tuple(loc)
+
+    def remove(self, rel: str) -> None:
+        self.entries.pop(rel, None)
+
+    def live_bytes(self) -> int:
+        return sum(length for _, _, length in self.entries.values())
+
+    def shard_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self.directory.glob("*.jsonl") if p.name != INDEX_NAME)
+
+
+class ShardReader:
+    """Stream or seek AST records written by `ShardWriter`."""
+
+    def __init__(self, out_root: Path, index: Optional[ShardIndex] = None) -> None:
+        self.directory = shard_dir(out_root)
+        self.index = index if index is not None else ShardIndex.load(self.directory)
+
+    def __len__(self) -> int:
+        return len(self.index.entries)
+
+    def paths(self) -> Iterator[str]:
+        return iter(self.index.entries)
+
+    def raw(self, rel: str) -> bytes:
+        shard, offset, length = self.index.entries[rel]
+        with open(self.directory / shard, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def get(self, rel: str) -> list:
+        """Features for one source path, read with a single seek."""
+        return json.loads(self.raw(rel))["features"]
+
+    def __iter__(self) -> Iterator[Tuple[str, list]]:
+        """Yield `(path, features)` for every live record, one shard at a time."""
+        by_shard: Dict[str, set] = {}
+        for shard, offset, _ in self.index.entries.values():
+            by_shard.setdefault(shard, set()).add(offset)
+        for shard in sorted(by_shard):
+            live = by_shard[shard]
+            offset = 0
+            with open(self.directory / shard, "rb") as f:
+                for line in f:
+                    if offset in live:
+                        rec = json.loads(line)
+                        yield rec["path"], rec["features"]
+                    offset += len(line)
+
+
+def compact(out_root: Path, index: ShardIndex, max_bytes: int = DEFAULT_SHARD_BYTES,
+            threshold: float = 0.5) -> bool:
+    """
+    Rewrite live records into fresh shards and delete the old ones when less
+    than `threshold` of shard bytes are still referenced. Updates `index` in
+    place and saves it before the old shards go, so a crash in between
+    leaves at worst unreferenced shards. Returns True if it compacted.
+    """
+    directory = shard_dir(out_root)
+    total = index.shard_bytes()
+    if not total or index.live_bytes() >= threshold * total:
+        return False
+    old = {p.name for p in directory.glob("*.jsonl") if p.name != INDEX_NAME}
+    writer = ShardWriter(directory, max_bytes)
+    src_name, src = None, None
+    try:
+        for rel, (shard, offset, length) in sorted(index.entries.items(), key=lambda kv: kv[1][:2]):
+            if shard != src_name:
+                if src is not None:
+                    src.close()
+                src_name, src = shard, open(directory / shard, "rb")
+            src.seek(offset)
+            index.update(rel, writer.write_raw(src.read(length)))
+    finally:
+        if src is not None:
+            src.close()
+        writer.close()
+    index.save()
+    for name in old:
+        (directory / name).unlink(missing_ok=True)
+    return True
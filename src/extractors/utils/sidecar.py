@@ -0,0 +1,190 @@
+"""
+Helpers shared by the sidecar extractor and its asyncio driver: language
+routing, batching of the file stream into jobs, and the output sinks.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Tuple
+
+from src.extractors.utils.classify import lang_for
+from src.extractors.utils.shards import DEFAULT_SHARD_BYTES, ShardWriter, shard_dir
+
+logger = logging.getLogger(__name__)
+
+# Supported languages mapping
+LANG_MAP = {
+    ".cs":  "c_sharp",
+    ".ts":  "typescript",
+    ".tsx": "tsx",
+    ".js":  "javascript",
+    ".css": "css",
+    ".html":"html",
+    ".json":"json",
+}
+
+# Fallback MIME type
+FALLBACK_MIME = "text/plain"
+
+# Batch limits for /parse/batch
+DEFAULT_BATCH_BYTES = 4 * 1024 * 1024
+DEFAULT_BATCH_FILES = 64
+
+
+def sidecar_lang(fp: Path) -> str | None:
+    """
+    Sidecar grammar for `fp` by suffix, or by shebang for suffixless scripts.
+    """
+    return lang_for(fp, LANG_MAP)
+
+
+def fallback_features(fp: Path, rel: Path) -> list:
+    """
+    Raw-text record for extensions the sidecar does not parse.
+    """
+    text = fp.read_text("utf-8", errors="ignore")
+    return [{
+        "filepath": str(rel),
+        "lang": fp.suffix.lower().lstrip('.'),
+        "source": text,
+    }]
+
+
+def with_hash(feats: list, digest: str | None) -> list:
+    """
+    Set `hash` on every record of `feats` to `digest`, the content hash of
+    their source file (left alone when unknown).
+    """
+    if digest is not None:
+        for feat in feats:
+            if isinstance(feat, dict):
+                feat["hash"] = digest
+    return feats
+
+
+def output_path(rel: Path, out_root: Path) -> Path:
+    """
+    AST JSON location for source path `rel`, mirroring the source tree.
+    """
+    return (out_root / rel).with_suffix(rel.suffix.lower() + ".json")
+
+
+def write_features(rel: Path, feats: list, out_root: Path) -> Path:
+    """
+    Write AST JSON for `rel` under `out_root`, mirroring the source tree.
+    """
+    out_file = output_path(rel, out_root)
+    out_file.parent.mkdir(parents=True, exist_ok=True)
+    out_file.write_text(json.dumps(feats, ensure_ascii=False, indent=2), encoding="utf-8")
+    logger.debug(f"Extracted AST for {rel} → {out_file.relative_to(out_root)}")
+    return out_file
+
+
+class FileSink:
+    """
+    Legacy layout: one pretty-printed AST JSON per source file. `write`
+    returns the output path relative to `out_root`. With `digests`, records
+    get the content hash it returns for their path (see `with_hash`).
+    """
+
+    def __init__(self, out_root: Path, digests: Callable[[Path], str | None] | None = None) -> None:
+        self.out_root = out_root
+        self.digests = digests
+
+    def write(self, rel: Path, feats: list) -> str:
+        if self.digests is not None:
+            with_hash(feats, self.digests(rel))
+        return write_features(rel, feats, self.out_root).relative_to(self.out_root).as_posix()
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class ShardSink:
+    """
+    Record-oriented layout: compact JSONL shards under `out_root/shards`.
+    `write` returns the record's `(shard, offset, length)`; `digests` as for
+    `FileSink`.
+    """
+
+    def __init__(self, out_root: Path, max_bytes: int = DEFAULT_SHARD_BYTES,
+                 digests: Callable[[Path], str | None] | None = None) -> None:
+        self.writer = ShardWriter(shard_dir(out_root), max_bytes)
+        self.digests = digests
+
+    def write(self, rel: Path, feats: list):
+        if self.digests is not None:
+            with_hash(feats, self.digests(rel))
+        return self.writer.write(rel.as_posix(), feats)
+
+    def flush(self) -> None:
+        self.writer.flush()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def make_sink(fmt: str, out_root: Path, shard_bytes: int = DEFAULT_SHARD_BYTES,
+              digests: Callable[[Path], str | None] | None = None):
+    return ShardSink(out_root, shard_bytes, digests) if fmt == "shards" else FileSink(out_root, digests)
+
+
+def _size(fp: Path) -> int | None:
+    """Size of `fp`, or None (logged) when it vanished since the walk."""
+    try:
+        return fp.stat().st_size
+    except OSError as e:
+        logger.error(f"Failed to stat {fp}: {e}")
+        return None
+
+
+def iter_batches(files: Iterable[Path], max_bytes: int = DEFAULT_BATCH_BYTES,
+                 max_files: int = DEFAULT_BATCH_FILES) -> Iterator[List[Path]]:
+    """
+    Pack files into batches of at most `max_files` files and roughly `max_bytes`
+    bytes. A file larger than `max_bytes` is sent on its own; files that can
+    no longer be stat'ed are skipped.
+    """
+    batch: List[Path] = []
+    size = 0
+    for fp in files:
+        fsize = _size(fp)
+        if fsize is None:
+            continue
+        if batch and (len(batch) >= max_files or size + fsize > max_bytes):
+            yield batch
+            batch, size = [], 0
+        batch.append(fp)
+        size += fsize
+    if batch:
+        yield batch
+
+
+def iter_jobs(files: Iterable[Path], max_bytes: int = DEFAULT_BATCH_BYTES,
+              max_files: int = DEFAULT_BATCH_FILES) -> Iterator[Tuple[str, Any]]:
+    """
+    Lazily turn a file stream into extraction jobs: `("batch", [paths])` for
+    sidecar-supported files (packed like `iter_batches`) and `("file", path)`
+    for everything else, or for every file when `max_files <= 1`.
+    """
+    batch: List[Path] = []
+    size = 0
+    for fp in files:
+        if max_files <= 1 or sidecar_lang(fp) is None:
+            yield "file", fp
+            continue
+        fsize = _size(fp)
+        if fsize is None:
+            continue
+        if batch and (len(batch) >= max_files or size + fsize > max_bytes):
+            yield "batch", batch
+            batch, size = [], 0
+        batch.append(fp)
+        size += fsize
+    if batch:
+        yield "batch", batch
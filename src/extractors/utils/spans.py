@@ -0,0 +1,142 @@
+"""
+Span-based feature records over one shared per-file buffer.
+
+Features used to carry their own decoded `source`, so nested definitions (an
+HTML element inside an element inside ...) copied the same bytes once per
+nesting level. A `Feature` instead stores `start_byte`, `end_byte`,
+`start_point` and `end_point` into the file's `SourceBuffer` (always UTF-8,
+see `to_utf8`); `feat["source"]` (or `feat.text()`) decodes that slice
+through a `memoryview` only when asked and is never stored, so memory stays
+proportional to the file size.
+
+On disk (`to_records`) the file text is stored once, as a leading
+`{"type": "file"}` record, and features keep only their spans; readers call
+`with_sources` to slice `source` back out of it.
+"""
+from __future__ import annotations
+
+import codecs
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+# UTF-32 first: its little-endian BOM starts with UTF-16's
+_BOMS = ((codecs.BOM_UTF32_LE, "utf-32"), (codecs.BOM_UTF32_BE, "utf-32"),
+         (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+
+
+def to_utf8(data: bytes, encoding: Optional[str] = None) -> bytes:
+    """
+    `data` as UTF-8, so byte spans over it match the text written by
+    `to_records`. Valid UTF-8 is returned as is; anything else is decoded by
+    its UTF-16/32 BOM, else by `encoding` (e.g. a coding cookie), else as
+    cp1252, with undecodable bytes replaced.
+    """
+    try:
+        data.decode("utf-8")
+        return data
+    except UnicodeDecodeError:
+        pass
+    encoding = next((codec for bom, codec in _BOMS if data.startswith(bom)), encoding)
+    try:
+        text = data.decode(encoding or "cp1252", errors="replace")
+    except LookupError:
+        text = data.decode("cp1252", errors="replace")
+    return text.encode("utf-8")
+
+
+class SourceBuffer:
+    """The bytes of one source file, shared by all of its features."""
+
+    __slots__ = ("path", "data", "view")
+
+    def __init__(self, data: bytes, path: Path | str = "") -> None:
+        self.path = str(path)
+        self.data = data
+        self.view = memoryview(data)
+
+    @classmethod
+    def read(cls, path: Path) -> "SourceBuffer":
+        """The file at `path`, converted to UTF-8 if needed (see `to_utf8`)."""
+        return cls(to_utf8(Path(path).read_bytes()), path)
+
+    def text(self, start: int, end: int, max_bytes: Optional[int] = None) -> str:
+        """
+        Decode `[start:end)` as UTF-8 without copying the slice first. With
+        `max_bytes`, longer slices become a placeholder instead.
+        """
+        if max_bytes is not None and end - start > max_bytes:
+            return f"<large-slice in {Path(self.path).name}  {start}-{end}>"
+        return str(self.view[start:end], "utf-8", "replace")
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __reduce__(self):
+        return SourceBuffer, (self.data, self.path)
+
+
+def node_span(node) -> dict:
+    return {
+        "start_byte": node.start_byte,
+        "end_byte": node.end_byte,
+        "start_point": list(node.start_point),
+        "end_point": list(node.end_point),
+    }
+
+
+class Feature(dict):
+    """
+    A feature dict whose `source` is read lazily from `buffer` via its span.
+    """
+
+    __slots__ = ("buffer",)
+
+    def __init__(self, buffer: SourceBuffer, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.buffer = buffer
+
+    def __missing__(self, key):
+        if key == "source":
+            return self.text()
+        raise KeyError(key)
+
+    def text(self) -> str:
+        return self.buffer.text(self["start_byte"], self["end_byte"])
+
+    def __reduce__(self):
+        return Feature, (self.buffer, dict(self))
+
+
+def to_records(feats: Iterable[dict], filepath: str) -> List[dict]:
+    """
+    Plain, serializable records for `feats` with `filepath` set. If any of
+    them is a span-only `Feature`, the file text is stored once up front as
+    `{"filepath", "lang", "type": "file", "source"}`.
+    """
+    records: List[dict] = []
+    head: Optional[dict] = None
+    for feat in feats:
+        if head is None and isinstance(feat, Feature):
+            head = {"filepath": filepath, "lang": feat.get("lang"), "type": "file",
+                    "source": feat.buffer.text(0, len(feat.buffer))}
+            records.append(head)
+        records.append(dict(feat, filepath=filepath))
+    return records
+
+
+def with_sources(records: List[dict]) -> List[dict]:
+    """
+    Fill in `source` of span-only records from the list's `file` record
+    (see `to_records`; spans index its UTF-8 encoding, which `to_utf8`
+    makes identical to the bytes the extractor saw). Other lists are
+    returned unchanged.
+    """
+    head = next((r for r in records if isinstance(r, dict) and r.get("type") == "file"), None)
+    if head is None:
+        return records
+    buf = SourceBuffer(head.get("source", "").encode("utf-8"), head.get("filepath", ""))
+    return [
+        r if r is head or "source" in r or "start_byte" not in r
+        else dict(r, source=buf.text(r["start_byte"], r["end_byte"]))
+        for r in records
+    ]
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from functools import lru_cache
 from pathlib import Path
+from tree_sitter import Parser
 try:
     from tree_sitter_languages import get_language as _wheel_get_language
     _WHEEL = True
@@ -19,4 +20,16 @@ except ModuleNotFoundError:
 @lru_cache(maxsize=None)
 def get_language(lang: str):
     """Return a tree_sitter.Language for `lang`."""
-    return _wheel_get_language(lang) if _WHEEL else _lib_get_language(lang)
\ No newline at end of file
+    return _wheel_get_language(lang) if _WHEEL else _lib_get_language(lang)
+
+@lru_cache(maxsize=None)
+def get_parser(lang: str, timeout_micros: int = 0) -> Parser:
+    """
+    Return a tree_sitter.Parser for `lang`, created once per process (and per
+    timeout). With `timeout_micros`, `parse` raises ValueError once it runs
+    longer; call `reset()` before reusing the parser.
+    """
+    parser = Parser(); parser.set_language(get_language(lang))
+    if timeout_micros:
+        parser.set_timeout_micros(timeout_micros)
+    return parser
@@ -0,0 +1,207 @@
+"""
+Streaming repository walker shared by the ingestion stages.
+
+`walk_files` descends with `os.scandir`, prunes excluded directories and
+`.gitignore` matches *before* entering them, and yields `(path, stat)` pairs as
+it goes, so callers start working on the first file immediately and memory
+stays proportional to tree depth rather than file count.
+"""
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from typing import Collection, Iterator, List, Optional, Tuple
+
+EXCLUDE_DIRS = frozenset({
+    "dist", "build", "obj", "bin", "node_modules", "coverage", "test-results", "__pycache__", ".git",
+})
+
+
+def _glob_to_regex(glob: str) -> str:
+    out, i, n = [], 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if c == "*":
+            if glob.startswith("**/", i):
+                out.append("(?:.*/)?"); i += 3; continue
+            if glob.startswith("**", i):
+                out.append(".*"); i += 2; continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = glob.find("]", i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = glob[i + 1:j]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(glob[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class GitIgnore:
+    """
+    Rules from one `.gitignore`, matched against paths relative to the
+    directory that contains it. Supports negation, directory-only rules,
+    anchoring and `**`; the last matching rule wins.
+    """
+
+    def __init__(self, lines: List[str]) -> None:
+        self.rules: List[Tuple[re.Pattern, bool, bool]] = []
+        for raw in lines:
+            line = raw.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            elif line.startswith("\\"):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            body = _glob_to_regex(line.lstrip("/"))
+            prefix = "" if anchored else "(?:.*/)?"
+            self.rules.append((re.compile(f"^{prefix}{body}(?:/.*)?$"), negate, dir_only))
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["GitIgnore"]:
+        try:
+            with open(os.path.join(directory, ".gitignore"), encoding="utf-8", errors="ignore") as f:
+                ign = cls(f.readlines())
+        except OSError:
+            return None
+        return ign if ign.rules else None
+
+    def match(self, rel: str, is_dir: bool) -> Optional[bool]:
+        """True/False if a rule decides `rel`, None if no rule matches."""
+        verdict = None
+        for rx, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if rx.match(rel):
+                verdict = not negate
+        return verdict
+
+
+def _ignored(stack: List[Tuple[str, GitIgnore]], rel: str, is_dir: bool) -> bool:
+    # Deeper .gitignore files take precedence over shallower ones
+    for base, ign in reversed(stack):
+        sub = rel[len(base) + 1:] if base else rel
+        verdict = ign.match(sub, is_dir)
+        if verdict is not None:
+            return verdict
+    return False
+
+
+class IgnoreRules:
+    """
+    The pruning of `walk_files` for single paths under `root`: whether a
+    walk would skip `rel` because a directory on its way is excluded by
+    name or a `.gitignore` matches. Each directory's `.gitignore` is read
+    once; call `forget` when one changes.
+    """
+
+    def __init__(self, root: Path, exclude_dirs: Collection[str] = EXCLUDE_DIRS,
+                 gitignore: bool = True) -> None:
+        self.root = os.fspath(root)
+        self.exclude_dirs = exclude_dirs
+        self.gitignore = gitignore
+        self._loaded: dict = {}
+
+    def _own(self, rel_dir: str) -> Optional[GitIgnore]:
+        if rel_dir not in self._loaded:
+            self._loaded[rel_dir] = GitIgnore.load(os.path.join(self.root, rel_dir))
+        return self._loaded[rel_dir]
+
+    def forget(self, rel_dir: str) -> None:
+        self._loaded.pop(rel_dir, None)
+
+    def ignored(self, rel: str, is_dir: bool = False) -> bool:
+        """Whether `walk_files(root)` skips `rel` (posix, relative to `root`)."""
+        parts = rel.split("/")
+        ignores: List[Tuple[str, GitIgnore]] = []
+        for i, name in enumerate(parts):
+            rel_dir = "/".join(parts[:i])
+            if self.gitignore:
+                own = self._own(rel_dir)
+                if own is not None:
+                    ignores.append((rel_dir, own))
+            sub_is_dir = is_dir if i == len(parts) - 1 else True
+            if sub_is_dir and name in self.exclude_dirs:
+                return True
+            if ignores and _ignored(ignores, "/".join(parts[:i + 1]), sub_is_dir):
+                return True
+        return False
+
+
+def walk_files(
+    root: Path,
+    exclude_dirs: Collection[str] = EXCLUDE_DIRS,
+    *,
+    suffixes: Optional[Collection[str]] = None,
+    skip_hidden: bool = False,
+    gitignore: bool = True,
+) -> Iterator[Tuple[Path, os.stat_result]]:
+    """
+    Yield `(path, stat)` for every regular file under `root`, depth-first in
+    name order. Directories named in `exclude_dirs` (and hidden ones when
+    `skip_hidden`) are never entered; `.gitignore` rules are honoured unless
+    `gitignore=False`. `suffixes` (lower-case, with dot) filters files.
+    Symlinked directories are not followed.
+    """
+    root_str = os.fspath(root)
+    # (absolute dir, path relative to root, active .gitignore stack)
+    todo: List[Tuple[str, str, List[Tuple[str, GitIgnore]]]] = [(root_str, "", [])]
+    while todo:
+        directory, rel_dir, ignores = todo.pop()
+        if gitignore:
+            own = GitIgnore.load(directory)
+            if own is not None:
+                ignores = ignores + [(rel_dir, own)]
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            name = entry.name
+            rel = f"{rel_dir}/{name}" if rel_dir else name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if not is_dir and not entry.is_file(follow_symlinks=False):
+                    continue
+            except OSError:
+                continue
+            if is_dir:
+                if name in exclude_dirs or (skip_hidden and name.startswith(".")):
+                    continue
+                if ignores and _ignored(ignores, rel, True):
+                    continue
+                subdirs.append((entry.path, rel, ignores))
+                continue
+            if skip_hidden and name.startswith("."):
+                continue
+            if suffixes is not None and os.path.splitext(name)[1].lower() not in suffixes:
+                continue
+            if ignores and _ignored(ignores, rel, False):
+                continue
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            yield Path(entry.path), st
+        todo.extend(reversed(subdirs))
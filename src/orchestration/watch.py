@@ -0,0 +1,586 @@
+"""
+Watch mode: keep the index within seconds of the working tree.
+
+Instead of re-running the batch pipeline, a long-running watcher follows the
+configured repo roots and pushes only what changed:
+
+- changes are detected with inotify/FSEvents through `watchdog` when it is
+  installed, else by polling `(size, mtime)` with the shared walker
+- for every edited file the previous bytes and tree are kept (bounded LRU), so
+  the edit is applied with `Tree.edit` and tree-sitter re-parses only the
+  touched region; features outside `changed_ranges` are not re-hashed
+- features are keyed per file by `(type, name, ordinal)` and compared by
+  content hash, so only added/changed/removed features become deltas
+- deltas go to the Qdrant collection (delete by `path` + `feature` payload,
+  then embed and upsert) and the Mongo `features` collection (one Stage-1 doc
+  per file, upserted whenever the file changes and deleted when it goes
+  away); both carry the file's content `hash`, taken from the bytes already
+  read for parsing
+
+Files without a cached tree (first edit after start-up, evicted from the LRU,
+or extractors without a query such as JSON) are re-extracted whole; their
+deltas are still computed against the features seen last.
+
+Usage:
+    python -m src.orchestration.watch --root pyxis [--root other] [--dry-run]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.extractors.utils.hashing import content_hash
+from src.extractors.utils.walker import IgnoreRules, walk_files
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)-8s %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 1.0
+DEFAULT_MAX_TREES = 2000
+
+_BLOCK = 4096
+
+Point = Tuple[int, int]
+Edit = Tuple[int, int, int, Point, Point, Point]  # tree.edit(...) arguments, in order
+
+
+# -----------------------------------------------------------------------------
+# Change detection
+# -----------------------------------------------------------------------------
+class PollingWatcher:
+    """
+    Detect changed and removed files under `roots` by comparing
+    `(size, mtime_ns)` between walks.
+    """
+
+    def __init__(self, roots: Iterable[Path]) -> None:
+        self.roots = [Path(r).resolve() for r in roots]
+        self.snapshot: Dict[Path, Tuple[int, int]] = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        return {fp: (st.st_size, st.st_mtime_ns)
+                for root in self.roots for fp, st in walk_files(root)}
+
+    def changes(self) -> Tuple[Set[Path], Set[Path]]:
+        """`(changed or added, removed)` since the previous call."""
+        current = self._scan()
+        changed = {fp for fp, sig in current.items() if self.snapshot.get(fp) != sig}
+        removed = set(self.snapshot) - set(current)
+        self.snapshot = current
+        return changed, removed
+
+    def close(self) -> None:
+        pass
+
+
+class EventWatcher:
+    """
+    `watchdog` (inotify/FSEvents/ReadDirectoryChanges) backed watcher with
+    the `PollingWatcher` interface. Events are collected between calls.
+    """
+
+    def __init__(self, roots: Iterable[Path]) -> None:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        self.roots = [Path(r).resolve() for r in roots]
+        self._rules = {root: IgnoreRules(root) for root in self.roots}
+        self._lock = threading.Lock()
+        self._touched: Set[Path] = set()
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                # A directory's own "modified" events say nothing about its files
+                if event.is_directory and event.event_type not in {"created", "moved", "deleted"}:
+                    return
+                with watcher._lock:
+                    for attr in ("src_path", "dest_path"):
+                        path = getattr(event, attr, None)
+                        if path:
+                            watcher._touched.add(Path(os.fsdecode(path)))
+
+        self._observer = Observer()
+        for root in self.roots:
+            self._observer.schedule(_Handler(), str(root), recursive=True)
+        self._observer.start()
+
+    def _relevant(self, fp: Path) -> bool:
+        """Whether the walk `PollingWatcher` does would see `fp` (same exclusions and .gitignore rules)."""
+        for root, rules in self._rules.items():
+            try:
+                rel = fp.relative_to(root).as_posix()
+            except ValueError:
+                continue
+            if fp.name == ".gitignore":
+                rules.forget(fp.parent.relative_to(root).as_posix() if fp.parent != root else "")
+            return rel != "." and not rules.ignored(rel, fp.is_dir())
+        return False
+
+    def changes(self) -> Tuple[Set[Path], Set[Path]]:
+        """
+        `(changed or added files, removed paths)`; a removed path may be a
+        directory, in which case everything under it is gone.
+        """
+        with self._lock:
+            touched, self._touched = self._touched, set()
+        changed: Set[Path] = set()
+        removed: Set[Path] = set()
+        for fp in touched:
+            if not self._relevant(fp):
+                continue
+            if fp.is_dir():
+                changed.update(p for p, _ in walk_files(fp))  # created or moved in
+            elif fp.is_file():
+                changed.add(fp)
+            else:
+                removed.add(fp)
+        return changed, removed
+
+    def close(self) -> None:
+        self._observer.stop()
+        self._observer.join()
+
+
+def make_watcher(roots: Iterable[Path], poll: bool = False):
+    """`EventWatcher` when `watchdog` is importable and `poll` is off, else polling."""
+    if not poll:
+        try:
+            return EventWatcher(roots)
+        except ModuleNotFoundError:
+            logger.info("watchdog not installed; falling back to polling.")
+    return PollingWatcher(roots)
+
+
+# -----------------------------------------------------------------------------
+# Incremental re-parse and feature diff
+# -----------------------------------------------------------------------------
+def _point(data: bytes, offset: int) -> Point:
+    row = data.count(b"\n", 0, offset)
+    return row, offset - (data.rfind(b"\n", 0, offset) + 1)
+
+
+def text_edit(old: bytes, new: bytes) -> Optional[Edit]:
+    """
+    The single edit turning `old` into `new` (common prefix and suffix
+    trimmed) as `(start_byte, old_end_byte, new_end_byte, start_point,
+    old_end_point, new_end_point)`, or None when they are equal.
+    """
+    if old == new:
+        return None
+    limit = min(len(old), len(new))
+    start = 0
+    # Skip equal 4 KiB blocks before comparing byte by byte, from both ends
+    while start + _BLOCK <= limit and old[start:start + _BLOCK] == new[start:start + _BLOCK]:
+        start += _BLOCK
+    while start < limit and old[start] == new[start]:
+        start += 1
+    tail, room = 0, limit - start
+    while tail + _BLOCK <= room and old[len(old) - tail - _BLOCK:len(old) - tail] == new[len(new) - tail - _BLOCK:len(new) - tail]:
+        tail += _BLOCK
+    while tail < room and old[-1 - tail] == new[-1 - tail]:
+        tail += 1
+    old_end, new_end = len(old) - tail, len(new) - tail
+    return start, old_end, new_end, _point(old, start), _point(old, old_end), _point(new, new_end)
+
+
+def feature_keys(feats: Iterable[dict], fields: Optional[Dict[str, Dict[str, Any]]] = None) -> List[str]:
+    """
+    Stable per-file keys `type:name#ordinal`, where `name` is the feature's
+    first string field (`name`, `selector`, `tag`, `key`, ...).
+    """
+    keys: List[str] = []
+    seen: Dict[str, int] = {}
+    for feat in feats:
+        kind = feat.get("type", "")
+        names = fields.get(kind, {}) if fields else feat
+        name = next((feat[f] for f in names if f in feat and isinstance(feat[f], str)
+                     and f not in {"filepath", "lang", "type", "source"}), "")
+        base = f"{kind}:{name}"
+        seen[base] = seen.get(base, 0) + 1
+        keys.append(f"{base}#{seen[base] - 1}")
+    return keys
+
+
+def feature_digest(feat: dict) -> str:
+    """Content hash of a feature's text and extracted fields (not its position)."""
+    parts = [str(feat.get("source", ""))]
+    parts += [f"{k}={feat[k]!r}" for k in sorted(feat)
+              if k not in {"source", "filepath", "start_byte", "end_byte", "start_point", "end_point"}]
+    return content_hash("\x00".join(parts).encode("utf-8", errors="replace"))
+
+
+class FileState:
+    """What the watcher remembers about one file between edits."""
+
+    __slots__ = ("data", "tree", "digests")
+
+    def __init__(self, data: bytes, tree, digests: Dict[str, str]) -> None:
+        self.data = data
+        self.tree = tree
+        self.digests = digests
+
+
+class FileDelta:
+    """Index changes for one file: features to (re)index and keys to drop."""
+
+    __slots__ = ("rel", "upserts", "deletes", "added", "removed", "hash")
+
+    def __init__(self, rel: str, upserts: List[Tuple[str, dict]], deletes: List[str],
+                 added: bool = False, removed: bool = False, hash: Optional[str] = None) -> None:
+        self.rel = rel
+        self.upserts = upserts
+        self.deletes = deletes
+        self.added = added
+        self.removed = removed
+        self.hash = hash  # content hash of the file's new bytes
+
+    def __bool__(self) -> bool:
+        return bool(self.upserts or self.deletes or self.added or self.removed)
+
+
+class IncrementalExtractor:
+    """
+    Per-file trees, bytes and feature digests, with up to `max_trees` files
+    kept (least recently edited dropped first). Digests of every file seen
+    are kept so deltas stay minimal even after a tree is evicted.
+
+    The state `update` computes is held in `pending` until `commit` confirms
+    its delta was pushed; `failed` drops it instead and lists the file in
+    `retrying`, so the next delta is taken against what the index holds.
+    """
+
+    def __init__(self, max_trees: int = DEFAULT_MAX_TREES) -> None:
+        self.max_trees = max_trees
+        self.states: "OrderedDict[str, FileState]" = OrderedDict()
+        self.digests: Dict[str, Dict[str, str]] = {}
+        self.removing: Set[str] = set()
+        self.pending: Dict[str, FileState] = {}
+        self.retrying: Dict[str, Path] = {}
+
+    def _remember(self, rel: str, state: FileState) -> None:
+        self.digests[rel] = state.digests
+        self.states[rel] = state
+        self.states.move_to_end(rel)
+        while len(self.states) > self.max_trees:
+            self.states.popitem(last=False)
+
+    def update(self, fp: Path, rel: str) -> FileDelta:
+        """Re-extract `fp` after a change and return its feature delta."""
+        from src.extractors.lang.registry import get_extractor, get_module
+        from src.extractors.utils.spans import SourceBuffer, to_utf8
+
+        self.removing.discard(rel)  # back before its removal was pushed
+        module = get_module(fp)
+        if module is None:
+            return FileDelta(rel, [], [])
+        raw = fp.read_bytes()
+        digest = content_hash(raw)
+        data = to_utf8(raw)  # what `SourceBuffer.read` would hold, so spans match batch runs
+        old = self.states.get(rel)
+        previous = self.digests.get(rel)
+        added = previous is None
+        previous = previous or {}
+        tree = None
+
+        if hasattr(module, "QUERY"):
+            from src.extractors.lang.engine import extract_tree
+            from src.extractors.utils.tree_sitter_loader import get_parser
+
+            # Same budget as batch runs (C/C++), so a pathological header cannot stall the watcher
+            parser = get_parser(module.LANG_ID, getattr(module, "DEFAULT_TIMEOUT_MICROS", 0))
+            ranges = None
+            try:
+                if old is not None and old.tree is not None:
+                    edit = text_edit(old.data, data)
+                    if edit is None:
+                        return FileDelta(rel, [], [])
+                    # the old tree is edited in place: drop it until this state is committed
+                    self.states.pop(rel)
+                    old.tree.edit(*edit)
+                    tree = parser.parse(data, old.tree)
+                    ranges = [(r.start_byte, r.end_byte) for r in old.tree.changed_ranges(tree)]
+                    ranges.append((edit[0], edit[2]))
+                else:
+                    tree = parser.parse(data)
+            except ValueError:
+                parser.reset()
+                tree = ranges = None
+        if tree is not None:
+            buf = SourceBuffer(data, rel)
+            feats = extract_tree(buf, tree, module.LANG_ID, module.LANG, module.QUERY,
+                                 module.FIELDS, getattr(module, "CONVERT", None))
+            keys = feature_keys(feats, module.FIELDS)
+        else:
+            # no query, or the parse timed out: the extractor's own fallback
+            feats = get_extractor(fp)(fp)
+            keys = feature_keys(feats, getattr(module, "FIELDS", None))
+            ranges = None
+
+        digests: Dict[str, str] = {}
+        upserts: List[Tuple[str, dict]] = []
+        for key, feat in zip(keys, feats):
+            untouched = (ranges is not None and key in previous and not any(
+                feat["start_byte"] < end and start < feat["end_byte"] or start == end == feat["start_byte"]
+                for start, end in ranges))
+            if untouched:
+                # Outside every edited range: same text, at most shifted
+                digests[key] = previous[key]
+                continue
+            digests[key] = feature_digest(feat)
+            if previous.get(key) != digests[key]:
+                feat = dict(feat, filepath=rel, source=feat["source"], hash=digest)
+                upserts.append((key, feat))
+        deletes = [key for key in previous if key not in digests]
+        self.pending[rel] = FileState(data, tree, digests)
+        return FileDelta(rel, upserts, deletes, added=added, hash=digest)
+
+    def commit(self, rel: str) -> None:
+        """Keep the state of the last `update` of `rel`, whose delta was pushed."""
+        self.retrying.pop(rel, None)
+        state = self.pending.pop(rel, None)
+        if state is not None:
+            self._remember(rel, state)
+
+    def failed(self, rel: str, fp: Path) -> None:
+        """Drop the state of the last `update` of `rel`, whose push failed, and retry it."""
+        self.pending.pop(rel, None)
+        self.retrying[rel] = fp
+
+    def remove(self, rel: str) -> FileDelta:
+        """
+        Delta for deleting `rel`. Its digests are kept, and `rel` listed in
+        `removing`, until `forget` confirms the delta was applied.
+        """
+        self.removing.add(rel)
+        return FileDelta(rel, [], list(self.digests.get(rel, {})), removed=True)
+
+    def forget(self, rel: str) -> None:
+        self.removing.discard(rel)
+        self.retrying.pop(rel, None)
+        self.states.pop(rel, None)
+        self.digests.pop(rel, None)
+
+
+# -----------------------------------------------------------------------------
+# Index sinks
+# -----------------------------------------------------------------------------
+class LogSink:
+    """`--dry-run`: log deltas instead of pushing them."""
+
+    def apply(self, delta: FileDelta) -> None:
+        logger.info(
+            f"{delta.rel}: +{len(delta.upserts)} features, -{len(delta.deletes)} features"
+            + (" (new file)" if delta.added else "") + (" (removed)" if delta.removed else "")
+        )
+
+    def close(self) -> None:
+        pass
+
+
+class IndexSink:
+    """
+    Push deltas to Qdrant (the collection `ast_loader` builds, with a
+    `feature` payload key added) and to the Mongo `features` collection.
+    """
+
+    def __init__(self, collection: Optional[str] = None, mongo_collection: str = "features") -> None:
+        from pymongo import MongoClient
+        from src.config.settings import settings
+        from src.storage import ast_loader
+
+        self.loader = ast_loader
+        self.collection = collection or ast_loader.COLLECTION
+        self.qdrant = ast_loader.QdrantClient(
+            host=ast_loader.QDRANT_HOST, port=ast_loader.QDRANT_PORT,
+            api_key=ast_loader.QDRANT_API_KEY, https=False,
+        )
+        self.features = MongoClient(settings.mongodb_uri)[settings.mongodb_database][mongo_collection]
+        self._summary = None
+
+    def _summarizer(self):
+        if self._summary is None:
+            from src.extractors.code_summary_extractor import SummaryExtractor
+            self._summary = SummaryExtractor()
+        return self._summary
+
+    def _delete_points(self, rel: str, keys: Optional[List[str]] = None) -> None:
+        from qdrant_client.http.models import (
+            FieldCondition, Filter, FilterSelector, MatchAny, MatchValue,
+        )
+        must = [FieldCondition(key="path", match=MatchValue(value=rel))]
+        if keys is not None:
+            must.append(FieldCondition(key="feature", match=MatchAny(any=keys)))
+        self.qdrant.delete(collection_name=self.collection,
+                           points_selector=FilterSelector(filter=Filter(must=must)))
+
+    def _upsert_points(self, rel: str, upserts: List[Tuple[str, dict]]) -> None:
+        import torch
+        from qdrant_client.http.models import PointStruct
+
+        loader = self.loader
+        parts = Path(rel).parts
+        repo = parts[0] if parts else ""
+        kind = "test" if any(p in {"test", "tests"} for p in parts) else "source"
+        windows, payloads, ids = [], [], []
+        for key, feat in upserts:
+            for window in list(loader.sliding_windows_tokenizer(feat.get("source", ""))) or [None]:
+                if window is None:
+                    window, chunk_start = torch.tensor([], dtype=torch.long), ""
+                else:
+                    chunk_start = loader.tok.decode(window[:32], skip_special_tokens=True)
+                payloads.append({"repo": repo, "path": rel, "lang": feat.get("lang", ""),
+                                 "feature": key, "hash": feat.get("hash"),
+                                 "chunk_start": chunk_start, "kind": kind})
+                ids.append(loader.make_point_id(rel, key + chunk_start))
+                windows.append(window)
+        for i in range(0, len(windows), loader.BATCH_SIZE):
+            chunk = windows[i:i + loader.BATCH_SIZE]
+            try:
+                vectors = loader.embed_code_batch(chunk)
+            except Exception as e:
+                logger.error(f"Embedding failed for {rel}: {e}")
+                vectors = [loader.dummy_embed("") for _ in chunk]
+            self.qdrant.upsert(collection_name=self.collection, points=[
+                PointStruct(id=pid, vector=vec, payload=pld)
+                for pid, vec, pld in zip(ids[i:i + len(chunk)], vectors, payloads[i:i + len(chunk)])
+            ])
+
+    def apply(self, delta: FileDelta) -> None:
+        rel = delta.rel
+        if delta.removed:
+            self._delete_points(rel)
+            self.features.delete_many({"value": rel})
+            return
+        if delta.added:
+            # First delta for this file in this session: replace whatever the
+            # batch loader (or an earlier session) indexed for it
+            self._delete_points(rel)
+        else:
+            stale = delta.deletes + [key for key, _ in delta.upserts]
+            if stale:
+                self._delete_points(rel, stale)
+        if delta.upserts:
+            self._upsert_points(rel, delta.upserts)
+        doc = self._summarizer().summarize(rel, Path(rel).name + ".json", delta.hash)
+        self.features.replace_one({"repo": doc["repo"], "value": rel}, doc, upsert=True)
+
+    def close(self) -> None:
+        close = getattr(self.qdrant, "close", None)
+        if close is not None:
+            close()
+
+
+# -----------------------------------------------------------------------------
+# Loop
+# -----------------------------------------------------------------------------
+def _rel(fp: Path, roots: List[Path]) -> Optional[str]:
+    for root in roots:
+        try:
+            return fp.relative_to(root).as_posix()
+        except ValueError:
+            continue
+    return None
+
+
+def run(watcher, extractor: IncrementalExtractor, sink, interval: float = DEFAULT_INTERVAL,
+        once: bool = False) -> None:
+    """Poll `watcher` every `interval` seconds and push each file's delta to `sink`."""
+    roots = watcher.roots
+    while True:
+        changed, removed = watcher.changes()
+        gone = set(extractor.removing)  # earlier removals whose push failed
+        for fp in sorted(removed):
+            rel = _rel(fp, roots)
+            if rel is None:
+                continue
+            gone.update(k for k in extractor.digests if k == rel or k.startswith(rel + "/"))
+        for key in sorted(gone):
+            try:
+                sink.apply(extractor.remove(key))
+            except Exception as e:
+                # digests kept, so the stale points are deleted on the next pass
+                logger.error(f"Failed to push removal of {key}: {e}")
+                continue
+            extractor.forget(key)
+        # earlier updates whose push failed, unless they changed again anyway
+        changed = set(changed) | {fp for rel, fp in extractor.retrying.items() if rel not in gone}
+        for fp in sorted(changed):
+            rel = _rel(fp, roots)
+            if rel is None:
+                continue
+            try:
+                delta = extractor.update(fp, rel)
+            except Exception as e:
+                logger.error(f"Failed to re-extract {fp}: {e}")
+                continue
+            if delta:
+                try:
+                    sink.apply(delta)
+                except Exception as e:
+                    # digests not advanced, so the retry pushes this change too
+                    logger.error(f"Failed to push delta for {rel}: {e}")
+                    extractor.failed(rel, fp)
+                    continue
+            extractor.commit(rel)
+        if once:
+            return
+        time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch repo roots and push index deltas")
+    parser.add_argument(
+        "--root", "-r", type=Path, action="append", required=True,
+        help="Repo root to watch (repeatable); paths are indexed relative to it"
+    )
+    parser.add_argument(
+        "--interval", type=float, default=DEFAULT_INTERVAL,
+        help="Seconds between change checks"
+    )
+    parser.add_argument(
+        "--poll", action="store_true",
+        help="Poll (size, mtime) even when watchdog is installed"
+    )
+    parser.add_argument(
+        "--max-trees", type=int, default=DEFAULT_MAX_TREES,
+        help="Files whose parse tree is kept for incremental re-parsing"
+    )
+    parser.add_argument(
+        "--collection", type=str, default=None,
+        help="Qdrant collection (default: ast_loader's QDRANT_COLLECTION)"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true",
+        help="Log deltas instead of pushing them to Mongo and Qdrant"
+    )
+    args = parser.parse_args()
+
+    watcher = make_watcher(args.root, poll=args.poll)
+    sink = LogSink() if args.dry_run else IndexSink(args.collection)
+    logger.info(f"Watching {', '.join(str(r) for r in watcher.roots)} ({type(watcher).__name__})")
+    try:
+        run(watcher, IncrementalExtractor(args.max_trees), sink, args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        sink.close()
+
+
+if __name__ == "__main__":
+    main()
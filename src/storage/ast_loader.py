@@ -1,4 +1,5 @@
 import os
+import sys
 import json
 import hashlib
 import logging
@@ -10,6 +11,14 @@ from transformers import AutoTokenizer, AutoModel
 import torch
 from tqdm import tqdm
 
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.extractors.utils.shards import ShardReader, has_shards
+from src.extractors.utils.spans import SourceBuffer, with_sources
+from src.extractors.utils.walker import EXCLUDE_DIRS, walk_files
+
 # ───── Configuration ─────
 load_dotenv(dotenv_path=Path('src/.env.qdrant'))
 QDRANT_API_KEY = os.getenv('QDRANT__SERVICE__API_KEY', None)
@@ -24,7 +33,6 @@ INCLUDE_SUFFIXES = (".json",)  # Only index files ending with .json
 
 # --- File Filtering and Tagging Utilities ---
 INCLUDE_EXTS = {".cs", ".ts", ".tsx", ".js", ".jsx", ".py", ".java", ".cpp", ".c", ".h", ".html", ".css"}
-EXCLUDE_DIRS = {"dist", "build", "obj", "bin", "node_modules", "coverage", "test-results", "__pycache__", ".git"}
 EXCLUDE_FILES = {"readme.md", "license", ".gitignore", ".gitattributes", ".env"}
 
 def should_include(path: Path):
@@ -119,6 +127,53 @@ def extract_repo_from_path(json_file: Path):
     except Exception:
         return json_file.parent.name
 
+# ───── AST Input ─────
+def feature_entries(data):
+    """
+    Records to embed from one extractor output: features with their sources
+    filled in. The whole-file record of span-based outputs is dropped when
+    the features cover it (it would only be windowed again, ignoring symbol
+    boundaries); a file without features keeps it, and top-level code
+    outside every feature is kept as one remainder record.
+    """
+    if not isinstance(data, list):
+        return [data]
+    records = with_sources(data)
+    head = next((r for r in records if isinstance(r, dict) and r.get("type") == "file"), None)
+    feats = [r for r in records if r is not head]
+    if head is None or not feats:
+        return records
+    rest = uncovered_source(head, feats)
+    return feats + [dict(head, source=rest)] if rest else feats
+
+def uncovered_source(head, feats):
+    """The non-blank parts of `head`'s source outside every feature span, joined."""
+    buf = SourceBuffer(head.get("source", "").encode("utf-8"), head.get("filepath", ""))
+    parts, pos = [], 0
+    spans = sorted((r["start_byte"], r["end_byte"]) for r in feats if isinstance(r, dict) and "start_byte" in r)
+    for start, end in spans + [(len(buf), len(buf))]:
+        if start > pos:
+            part = buf.text(pos, start).strip()
+            if part:
+                parts.append(part)
+        pos = max(pos, end)
+    return "\n".join(parts)
+
+def list_ast_inputs(data_dir: Path):
+    """
+    Return `(json_files, load)` for the extractor output in `data_dir`.
+    With shards, `json_files` are the paths the per-file layout would use (so
+    filtering, tagging and repo detection are unchanged) and `load` seeks to
+    the record through the shard index.
+    """
+    if has_shards(data_dir):
+        reader = ShardReader(data_dir)
+        files = [data_dir / (rel + ".json") for rel in reader.paths()]
+        return files, lambda p: reader.get(p.relative_to(data_dir).as_posix()[:-len(".json")])
+    # Excluded and hidden dirs are pruned during the walk, not filtered afterwards
+    files = [p for p, _ in walk_files(data_dir, EXCLUDE_DIRS, suffixes=INCLUDE_SUFFIXES, skip_hidden=True)]
+    return files, lambda p: json.loads(p.read_text(encoding="utf-8"))
+
 # ───── Main Indexing ─────
 def main():
     if not QDRANT_API_KEY:
@@ -136,7 +191,7 @@ def main():
     )
     print(f"Collection '{COLLECTION}' created.")
 
-    all_json_files = [p for p in DATA_DIR.rglob("*") if p.suffix in INCLUDE_SUFFIXES and p.is_file()]
+    all_json_files, load_ast = list_ast_inputs(DATA_DIR)
     print(f"Found {len(all_json_files)} JSON files to process.")
 
     log_excluded = []
@@ -154,11 +209,11 @@ def main():
             continue
         log_included.append((str(json_file), kind))
         try:
-            data = json.loads(json_file.read_text(encoding="utf-8"))
+            data = load_ast(json_file)
         except Exception as e:
             logging.warning(f"Failed to load {json_file}: {e}")
             continue
-        entries = data if isinstance(data, list) else [data]
+        entries = feature_entries(data)
         for feat in entries:
             text = feat.get("source", "")
             # Always use sliding_windows_tokenizer to get windows of <=512 tokens
@@ -183,13 +238,13 @@ def main():
         if kind not in {"source", "test"}:
             continue
         try:
-            data = json.loads(json_file.read_text(encoding="utf-8"))
+            data = load_ast(json_file)
         except Exception as e:
             logging.warning(f"Failed to load {json_file}: {e}")
             skipped_files.append(str(json_file))
             continue
         repo = extract_repo_from_path(json_file)
-        entries = data if isinstance(data, list) else [data]
+        entries = feature_entries(data)
         for feat in entries:
             text = feat.get("source", "")
             token_windows = list(sliding_windows_tokenizer(text))
@@ -208,7 +263,7 @@ def main():
                     "repo": repo,
                     "path": feat.get("filepath", ""),
                     "lang": feat.get("lang", ""),
-                    **{k: feat[k] for k in ("group", "notes") if k in feat},
+                    **{k: feat[k] for k in ("group", "notes", "hash") if k in feat},
                     "chunk_start": chunk_start,
                     "kind": kind
                 }
@@ -244,7 +299,7 @@ def main():
                 "repo": repo,
                 "path": feat.get("filepath", ""),
                 "lang": feat.get("lang", ""),
-                **{k: feat[k] for k in ("group", "notes") if k in feat},
+                **{k: feat[k] for k in ("group", "notes", "hash") if k in feat},
                 "chunk_start": "",
                 "kind": kind
             }
@@ -2,9 +2,11 @@
 Feature Loader: Loads code features into MongoDB.
 
 USAGE:
+    python src/storage/feature_loader.py --input generated/ast_output/features
     python src/storage/feature_loader.py --input <path_to_features_and_patterns.json>
 
-Expected input file format:
+Input is a directory of JSONL shards as written by `code_summary_extractor.py`
+(one feature per line), a single .jsonl file, or a JSON array:
 [
   {
     "repo": "phg-server",
@@ -18,14 +20,16 @@ Expected input file format:
   ...
 ]
 
-Each item is a code feature (usually from features_and_patterns.json).
+Each item is a code feature. JSONL input is streamed and inserted in batches
+of BATCH_SIZE, so memory stays flat however many features there are (bar the
+`(repo, value, hash)` keys kept to drop duplicates across shards).
 """
 
 import json
 from pathlib import Path
 import argparse
 from pymongo import MongoClient
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator
 import os
 import sys
 import os
@@ -36,12 +40,49 @@ if project_root not in sys.path:
 
 from src.config.settings import settings
 
+BATCH_SIZE = 1000
+
 class FeatureLoader:
     def __init__(self):
         self.client = MongoClient(settings.mongodb_uri)
         self.db = self.client[settings.mongodb_database]
         self.collection = self.db["features"]
 
+def iter_features(input_path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the features in `input_path` one at a time, each with its
+    `source_file` set to the name of the file it was read from.
+    """
+    if input_path.is_dir():
+        files = sorted(input_path.glob("*.jsonl"))
+    else:
+        files = [input_path]
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            if path.suffix != ".jsonl":
+                rows = json.load(f)
+            else:
+                rows = (json.loads(line) for line in f if line.strip())
+            for item in rows:
+                item["source_file"] = path.name
+                yield item
+
+
+def unique_features(features: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Drop features whose `(repo, value, hash)` was already seen: the key of
+    the unique `meta_uniq` index, which Stage-1 shards only guarantee within
+    one shard.
+    """
+    seen = set()
+    for item in features:
+        key = (item.get("repo"), item.get("value"), item.get("hash"))
+        if key in seen:
+            continue
+        seen.add(key)
+        yield item
+
+
 def load_features(input_path: Path, test_mode=False):
     collection_name = "features_test" if test_mode else "features"
     client = MongoClient(settings.mongodb_uri)
@@ -52,18 +93,24 @@ def load_features(input_path: Path, test_mode=False):
     print(f"🧹 Cleared all existing features in collection '{collection_name}'.")
 
     if input_path.exists():
-        with open(input_path, "r", encoding="utf-8") as f:
-            feature_data = json.load(f)
-            for item in feature_data:
-                item["source_file"] = input_path.name
-            features_col.insert_many(feature_data)
-            print(f"✅ Inserted {len(feature_data)} features from {input_path} into collection '{collection_name}'.")
+        count = 0
+        batch = []
+        for item in unique_features(iter_features(input_path)):
+            batch.append(item)
+            if len(batch) >= BATCH_SIZE:
+                features_col.insert_many(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            features_col.insert_many(batch)
+            count += len(batch)
+        print(f"✅ Inserted {count} features from {input_path} into collection '{collection_name}'.")
     else:
         print(f"❌ Could not find {input_path}.")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Load code features into MongoDB.")
-    parser.add_argument("--input", "-i", type=str, required=True, help="Path to features JSON file")
+    parser.add_argument("--input", "-i", type=str, required=True, help="Features directory (JSONL shards) or JSON/JSONL file")
     parser.add_argument("--test", action="store_true", help="Use the _test collection")
     args = parser.parse_args()
     load_features(Path(args.input), test_mode=args.test)
\ No newline at end of file
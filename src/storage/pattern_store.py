@@ -0,0 +1,198 @@
+"""
+Stage-1 pattern buckets, loaded on first use and kept current.
+
+`code_summary_extractor` used to query the Mongo `patterns` collection at
+import time, so importing it blocked on a live database and pattern edits
+needed a restart. `PatternStore.snapshot()` instead returns the current
+`PatternSnapshot`, loading it on the first call:
+
+- from Mongo when reachable, and then also saved to a JSON snapshot on disk
+- otherwise from that snapshot (so runs work fully offline), or from the
+  inline defaults in `pattern_loader.py` when none was saved yet
+
+Every `refresh_seconds` a later call checks for edits: through a change
+stream where the server offers them (replica sets), else by reloading the
+collection and comparing versions. The version is a content hash, so
+unchanged patterns never produce a new snapshot. Callbacks registered with
+`subscribe` are called with each new snapshot.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from functools import cached_property, lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from src.config.settings import settings
+from src.extractors.utils.hashing import content_hash
+from src.extractors.utils.patterns import PatternIndex
+
+logger = logging.getLogger(__name__)
+
+SERVER_TIMEOUT_MS = 2000
+
+
+def patterns_version(patterns: List[Dict[str, Any]]) -> str:
+    """Content hash of `patterns`, in order (order decides the first match)."""
+    return content_hash(json.dumps(patterns, sort_keys=True, default=str).encode("utf-8"))
+
+
+class PatternSnapshot:
+    """One version of the pattern set, with its compiled `index`."""
+
+    def __init__(self, patterns: List[Dict[str, Any]], source: str, version: Optional[str] = None) -> None:
+        self.patterns = patterns
+        self.source = source        # "mongo", "cache" or "defaults"
+        self.version = version or patterns_version(patterns)
+
+    @cached_property
+    def index(self) -> PatternIndex:
+        return PatternIndex(self.patterns)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+
+class PatternStore:
+    def __init__(self, cache_path: Optional[Path] = None, collection=None,
+                 refresh_seconds: Optional[float] = None, offline: bool = False) -> None:
+        """
+        `collection` defaults to `patterns` in the configured database,
+        connected on first use; `offline` never contacts Mongo.
+        """
+        self.cache_path = Path(cache_path or settings.pattern_cache_path)
+        self.refresh_seconds = settings.pattern_refresh_seconds if refresh_seconds is None else refresh_seconds
+        self.offline = offline
+        self._collection = collection
+        self._stream = None         # change stream, once opened
+        self._streams = True        # False once the server turned them down
+        self._current: Optional[PatternSnapshot] = None
+        self._checked = 0.0
+        self._subscribers: List[Callable[[PatternSnapshot], None]] = []
+
+    def snapshot(self) -> PatternSnapshot:
+        """The current patterns; checks for edits at most every `refresh_seconds`."""
+        if self._current is None:
+            self._current = self._load()
+        elif time.monotonic() - self._checked >= self.refresh_seconds:
+            self.refresh()
+        return self._current
+
+    def refresh(self) -> bool:
+        """Check Mongo for edits now; True if a new snapshot was taken."""
+        self._checked = time.monotonic()
+        if self.offline or not self._changed():
+            return False
+        patterns = self._fetch()
+        if patterns is None:
+            return False
+        snap = PatternSnapshot(patterns, "mongo")
+        if self._current is not None and snap.version == self._current.version:
+            return False
+        self._publish(snap)
+        return True
+
+    def subscribe(self, callback: Callable[[PatternSnapshot], None]) -> None:
+        """Call `callback(snapshot)` whenever the patterns change."""
+        self._subscribers.append(callback)
+
+    def _load(self) -> PatternSnapshot:
+        self._checked = time.monotonic()
+        # Watch before reading, so edits made while the collection is read show up as changes
+        patterns = None if self.offline or not self._open_stream() else self._fetch()
+        if patterns is not None:
+            snap = PatternSnapshot(patterns, "mongo")
+            self._save(snap)
+            return snap
+        snap = self._read_cache()
+        if snap is not None:
+            return snap
+        from src.storage.pattern_loader import PATTERNS as DEFAULTS
+        logger.warning(f"No pattern snapshot at {self.cache_path}; using the pattern_loader defaults")
+        return PatternSnapshot(list(DEFAULTS), "defaults")
+
+    def _publish(self, snap: PatternSnapshot) -> None:
+        logger.info(f"Patterns changed: {len(snap)} patterns, version {snap.version}")
+        self._current = snap
+        self._save(snap)
+        for callback in self._subscribers:
+            try:
+                callback(snap)
+            except Exception as e:
+                logger.error(f"Pattern change callback failed: {e}")
+
+    def _coll(self):
+        if self._collection is None:
+            from pymongo import MongoClient
+            client = MongoClient(settings.mongodb_uri, serverSelectionTimeoutMS=SERVER_TIMEOUT_MS)
+            self._collection = client[settings.mongodb_database]["patterns"]
+        return self._collection
+
+    def _fetch(self) -> Optional[List[Dict[str, Any]]]:
+        try:
+            return list(self._coll().find({}, {"_id": 0}))
+        except Exception as e:
+            logger.warning(f"Pattern collection unavailable: {e}")
+            return None
+
+    def _open_stream(self) -> bool:
+        """Open the change stream if the server offers one; False if Mongo looks unreachable."""
+        if not self._streams or self._stream is not None:
+            return True
+        from pymongo.errors import OperationFailure
+        try:
+            self._stream = self._coll().watch()
+        except OperationFailure as e:
+            # standalone servers have no change streams: poll instead
+            logger.info(f"No change stream on patterns ({e}); polling every {self.refresh_seconds}s")
+            self._streams = False
+        except Exception as e:
+            logger.warning(f"Could not watch patterns: {e}")  # retried on the next check
+            return False
+        return True
+
+    def _changed(self) -> bool:
+        """Whether the collection may have changed since the last load."""
+        if self._stream is None:
+            self._open_stream()
+            return True  # polling: reload and compare versions
+        try:
+            if self._stream.try_next() is None:
+                return False
+            while self._stream.try_next() is not None:
+                pass  # one reload covers a burst of edits
+            return True
+        except Exception as e:
+            logger.warning(f"Pattern change stream failed: {e}")
+            self._stream = None
+            self._open_stream()  # before the reload, like `_load`
+            return True
+
+    def _read_cache(self) -> Optional[PatternSnapshot]:
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            return PatternSnapshot(data["patterns"], "cache", data.get("version"))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable pattern snapshot {self.cache_path}: {e}")
+            return None
+
+    def _save(self, snap: PatternSnapshot) -> None:
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path.with_name(self.cache_path.name + ".tmp")
+            tmp.write_text(json.dumps({"version": snap.version, "patterns": snap.patterns}, default=str),
+                           encoding="utf-8")
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not save pattern snapshot {self.cache_path}: {e}")
+
+
+@lru_cache(maxsize=None)
+def default_store() -> PatternStore:
+    """One store per process, for the configured database and snapshot path."""
+    return PatternStore()
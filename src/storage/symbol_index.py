@@ -0,0 +1,345 @@
+"""
+On-disk symbol table: name → kind, repo, path, span and container.
+
+`sidecar_ast_extractor.py` keeps one SQLite file in its output directory
+up to date as files are extracted, skipped or deleted, so "where is
+`WidgetController` defined" is a B-tree lookup instead of a Mongo `$text` or
+vector search. Exact lookups match `name` as written; prefix search is
+case-insensitive through the `folded` column. Both are served by indexes and
+answer in microseconds on millions of rows.
+
+Symbols are the extractor records that carry a `name` (classes, functions,
+structs, macros, procedures, ...); `container` is the name of the smallest
+enclosing symbol in the same file. `repo` is the first component of the
+path relative to the extraction root, as elsewhere in the pipeline.
+
+The same file holds the reference graph: one `refs` row per distinct
+(symbol id, target name, kind) from the `REF_FIELDS` of each record (calls,
+base classes, type usages, imports). Includes, usings and ES imports belong
+to their file as a whole, so files with any get a `file` symbol to hang them
+on. Targets are stored by name and resolved when the graph is read, so
+re-indexing a file only rewrites that file's rows, and edges into it from
+unchanged files stay valid. Resolution is by name within the language
+(C and C++ count as one): a call to `save` reaches every `save`, same-repo
+symbols first.
+"""
+from __future__ import annotations
+
+import re
+import sqlite3
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SYMBOLS_NAME = "symbols.sqlite"
+SCHEMA_VERSION = 2
+
+# Records with a name that are not symbols
+NON_SYMBOL_TYPES = frozenset({"file", "data", "error", "using"})
+
+COLUMNS = ("name", "kind", "repo", "path", "lang", "container",
+           "start_byte", "end_byte", "start_line", "end_line")
+
+# record field -> edge kind, for the records' own references
+REF_FIELDS = {"calls": "call", "bases": "inherit", "types": "type", "imports": "import"}
+# record type -> field naming what the whole file imports
+FILE_REFS = {"include": "path", "using": "name", "import": "source"}
+# fields holding paths (`sys/types.h`, `./util`) rather than dotted names
+_PATH_FIELDS = frozenset({"path", "source"})
+# what an import can resolve to
+_IMPORTABLE = ("file", "module", "namespace")
+
+# languages whose symbols reference each other
+_LANG_FAMILIES = {"c": ("c", "cpp"), "cpp": ("c", "cpp")}
+
+DIRECTIONS = ("out", "in", "both")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS symbols (
+    id         INTEGER PRIMARY KEY,
+    name       TEXT NOT NULL,
+    folded     TEXT NOT NULL,
+    kind       TEXT,
+    repo       TEXT,
+    path       TEXT NOT NULL,
+    lang       TEXT,
+    container  TEXT,
+    start_byte INTEGER,
+    end_byte   INTEGER,
+    start_line INTEGER,
+    end_line   INTEGER
+);
+CREATE INDEX IF NOT EXISTS symbols_name   ON symbols (name);
+CREATE INDEX IF NOT EXISTS symbols_folded ON symbols (folded);
+CREATE INDEX IF NOT EXISTS symbols_path   ON symbols (path);
+CREATE TABLE IF NOT EXISTS refs (
+    src  INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    PRIMARY KEY (src, name, kind)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS refs_name ON refs (name);
+"""
+
+_SELECT = f"SELECT {', '.join(COLUMNS)} FROM symbols"
+_SELECT_NODE = f"SELECT id, {', '.join(COLUMNS)} FROM symbols"
+
+
+def ref_target(text: str, path: bool = False) -> str:
+    """
+    Name a reference resolves by: the file name of an include or import path,
+    else the last component of a dotted or scoped name without type arguments
+    (`self.save` -> `save`, `IRepo<T>` -> `IRepo`, `std::move` -> `move`).
+    """
+    if path:
+        return text.rstrip("/").rsplit("/", 1)[-1]
+    text = re.split(r"[<\[(]", text, maxsplit=1)[0]
+    return re.split(r"\.|::|->", text.strip())[-1].strip()
+
+
+def _same_language(column: str, lang: Optional[str]) -> Tuple[str, list]:
+    """SQL condition (and parameters) on `column` for symbols `lang` code can reference."""
+    if lang is None:
+        return "1", []
+    langs = _LANG_FAMILIES.get(lang, (lang,))
+    return f"{column} IN ({', '.join('?' * len(langs))})", list(langs)
+
+
+def _targets(record: dict) -> List[Tuple[str, str]]:
+    """(target name, edge kind) for the references listed on `record`."""
+    refs = []
+    for field, kind in REF_FIELDS.items():
+        values = record.get(field)
+        if isinstance(values, list):
+            refs.extend((ref_target(v), kind) for v in values if isinstance(v, str))
+    return refs
+
+
+def file_graph(path: str, records: Iterable[dict]) -> Tuple[List[tuple], List[Tuple[int, str, str]]]:
+    """
+    Symbol rows for one file's extractor `records`, and its references as
+    `(row index, target name, kind)`.
+    """
+    repo = path.split("/", 1)[0]
+    records = [r for r in records if isinstance(r, dict)]
+    feats = sorted(
+        (r for r in records
+         if isinstance(r.get("name"), str) and r["name"] and r.get("type") not in NON_SYMBOL_TYPES),
+        key=lambda r: (r.get("start_byte", 0), -r.get("end_byte", 0)),
+    )
+    rows: List[tuple] = []
+    refs: List[Tuple[int, str, str]] = []
+    imports = [ref_target(r[field], field in _PATH_FIELDS)
+               for r in records for field in [FILE_REFS.get(r.get("type"))]
+               if field and isinstance(r.get(field), str)]
+    if imports:
+        lang = next((r.get("lang") for r in records if r.get("lang")), None)
+        rows.append((path.rsplit("/", 1)[-1], path.rsplit("/", 1)[-1].casefold(), "file", repo, path,
+                     lang, None, None, None, None, None))
+        refs.extend((0, name, "import") for name in imports)
+    open_: List[dict] = []  # enclosing symbols, innermost last
+    for r in feats:
+        start, end = r.get("start_byte"), r.get("end_byte")
+        while open_ and start is not None and start >= open_[-1].get("end_byte", 0):
+            open_.pop()
+        container = open_[-1]["name"] if open_ and start is not None else None
+        start_line = (r.get("start_point") or [None])[0]
+        end_line = (r.get("end_point") or [None])[0]
+        refs.extend((len(rows), name, kind) for name, kind in _targets(r))
+        rows.append((r["name"], r["name"].casefold(), r.get("type"), repo, path, r.get("lang"),
+                     container, start, end, start_line, end_line))
+        if start is not None and end is not None:
+            open_.append(r)
+    return rows, [ref for ref in refs if ref[1]]
+
+
+def symbol_rows(path: str, records: Iterable[dict]) -> List[tuple]:
+    """Table rows for the symbols among one file's extractor `records`."""
+    return file_graph(path, records)[0]
+
+
+class SymbolIndex:
+    def __init__(self, conn: sqlite3.Connection, is_new: bool = False) -> None:
+        self.conn = conn
+        self.is_new = is_new
+
+    @classmethod
+    def open(cls, path: Path, readonly: bool = False) -> "SymbolIndex":
+        """
+        Open (or create) the index at `path`. `is_new` tells whether it was
+        just created, so callers can backfill it from existing outputs.
+        """
+        path = Path(path)
+        if readonly:
+            conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            return cls(conn)
+        is_new = not path.exists()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")  # readers (the API) are not blocked by a run
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # built by an older version: start over, the caller backfills it
+            conn.executescript("DROP TABLE IF EXISTS symbols; DROP TABLE IF EXISTS refs;")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            is_new = True
+        conn.executescript(_SCHEMA)
+        return cls(conn, is_new)
+
+    def replace_file(self, path: str, records: Iterable[dict]) -> int:
+        """Replace the symbols and references of `path` with those in its extractor `records`."""
+        rows, refs = file_graph(path, records)
+        self.remove_file(path)
+        self.conn.executemany(
+            f"INSERT INTO symbols (name, folded, {', '.join(COLUMNS[1:])}) VALUES ({', '.join('?' * 11)})",
+            rows)
+        if refs:
+            # rowids are handed out in insertion order
+            ids = [i for i, in self.conn.execute("SELECT id FROM symbols WHERE path = ? ORDER BY id", (path,))]
+            self.conn.executemany("INSERT OR IGNORE INTO refs VALUES (?, ?, ?)",
+                                  ((ids[i], name, kind) for i, name, kind in refs))
+        return len(rows)
+
+    def remove_file(self, path: str) -> None:
+        self.conn.execute("DELETE FROM refs WHERE src IN (SELECT id FROM symbols WHERE path = ?)", (path,))
+        self.conn.execute("DELETE FROM symbols WHERE path = ?", (path,))
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def _query(self, where: str, params: list, repo: Optional[str], kind: Optional[str],
+               limit: int, order: str = "") -> List[Dict[str, Any]]:
+        if repo:
+            where += " AND repo = ?"
+            params.append(repo)
+        if kind:
+            where += " AND kind = ?"
+            params.append(kind)
+        cur = self.conn.execute(f"{_SELECT} WHERE {where} {order} LIMIT ?", [*params, limit])
+        return [dict(zip(COLUMNS, row)) for row in cur]
+
+    def lookup(self, name: str, repo: Optional[str] = None, kind: Optional[str] = None,
+               limit: int = 50) -> List[Dict[str, Any]]:
+        """Symbols named exactly `name`."""
+        return self._query("name = ?", [name], repo, kind, limit)
+
+    def prefix(self, prefix: str, repo: Optional[str] = None, kind: Optional[str] = None,
+               limit: int = 50) -> List[Dict[str, Any]]:
+        """Symbols whose name starts with `prefix`, ignoring case, in name order."""
+        low = prefix.casefold()
+        # a range scan on symbols_folded, which also yields rows in order
+        return self._query("folded >= ? AND folded < ?", [low, low + "\U0010ffff"],
+                           repo, kind, limit, order="ORDER BY folded")
+
+    def symbol_ids(self, name: str, repo: Optional[str] = None, kind: Optional[str] = None,
+                   limit: int = 50) -> List[int]:
+        """Ids of the symbols named exactly `name`, as graph starting points."""
+        where, params = "name = ?", [name]
+        if repo:
+            where += " AND repo = ?"
+            params.append(repo)
+        if kind:
+            where += " AND kind = ?"
+            params.append(kind)
+        return [i for i, in self.conn.execute(f"SELECT id FROM symbols WHERE {where} LIMIT ?", [*params, limit])]
+
+    def _nodes(self, ids: List[int]) -> List[Dict[str, Any]]:
+        nodes = []
+        for i in range(0, len(ids), 500):  # stay under SQLite's variable limit
+            chunk = ids[i:i + 500]
+            cur = self.conn.execute(f"{_SELECT_NODE} WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+            nodes.extend(dict(zip(("id",) + COLUMNS, row)) for row in cur)
+        return nodes
+
+    def _resolve(self, name: str, kind: str, node: Dict[str, Any], fanout: int) -> List[int]:
+        """Ids of the symbols a `kind` reference to `name` from `node` may point at, same repo first."""
+        if kind == "import":
+            where = (f"((name = ? AND kind IN ({', '.join('?' * len(_IMPORTABLE))}))"
+                     " OR (kind = 'file' AND name >= ? AND name < ?))")
+            params = [name, *_IMPORTABLE, name + ".", name + "/"]  # `util` -> `util.ts`
+        else:
+            where, params = "name = ? AND kind != 'file'", [name]
+        lang, lang_params = _same_language("lang", node["lang"])
+        cur = self.conn.execute(
+            f"SELECT id FROM symbols WHERE {where} AND {lang} ORDER BY repo IS ? DESC LIMIT ?",
+            [*params, *lang_params, node["repo"], fanout])
+        return [i for i, in cur]
+
+    def _outgoing(self, node: Dict[str, Any], fanout: int) -> Iterable[tuple]:
+        refs = self.conn.execute("SELECT name, kind FROM refs WHERE src = ?", (node["id"],)).fetchall()
+        for name, kind in refs:
+            for dst in self._resolve(name, kind, node, fanout) or [None]:
+                yield node["id"], dst, kind, name
+
+    def _incoming(self, node: Dict[str, Any], fanout: int) -> Iterable[tuple]:
+        names = [node["name"]]
+        if node["kind"] in _IMPORTABLE:
+            if node["kind"] == "file" and "." in node["name"]:
+                names.append(node["name"].rsplit(".", 1)[0])
+            kinds = "r.kind = 'import'"
+        else:
+            kinds = "r.kind != 'import'"
+        lang, lang_params = _same_language("s.lang", node["lang"])
+        cur = self.conn.execute(
+            f"SELECT r.src, r.kind FROM refs r JOIN symbols s ON s.id = r.src"
+            f" WHERE r.name IN ({', '.join('?' * len(names))}) AND {kinds} AND {lang}"
+            f" ORDER BY s.repo IS ? DESC LIMIT ?", [*names, *lang_params, node["repo"], fanout])
+        for src, kind in cur:
+            yield src, node["id"], kind, node["name"]
+
+    def neighborhood(self, start: Iterable[int], hops: int = 1, direction: str = "out",
+                     max_nodes: int = 200, fanout: int = 50) -> Dict[str, Any]:
+        """
+        The symbols within `hops` references of the `start` ids, breadth first,
+        following references `direction` ("out": what they use, "in": what uses
+        them, or "both"). Returns `{nodes, edges, truncated}`: nodes carry their
+        `id` and `hop`, edges are `{src, dst, kind, name}` with `dst` None for
+        names no indexed symbol carries (library calls, external packages).
+        At most `fanout` targets are followed per reference and `max_nodes`
+        nodes returned; `truncated` tells whether that cut anything off.
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {DIRECTIONS}, not {direction!r}")
+        frontier = self._nodes(list(dict.fromkeys(start))[:max_nodes])
+        hop_of = {node["id"]: 0 for node in frontier}
+        nodes = [dict(node, hop=0) for node in frontier]
+        edges: Dict[tuple, None] = {}
+        truncated = False
+        for hop in range(1, hops + 1):
+            found: List[int] = []
+            for node in frontier:
+                links = []
+                if direction in ("out", "both"):
+                    links.extend(self._outgoing(node, fanout))
+                if direction in ("in", "both"):
+                    links.extend(self._incoming(node, fanout))
+                for src, dst, kind, name in links:
+                    other = dst if src == node["id"] else src
+                    if other is not None and other not in hop_of:
+                        if len(hop_of) >= max_nodes:
+                            truncated = True
+                            continue
+                        hop_of[other] = hop
+                        found.append(other)
+                    edges[(src, dst, kind, name)] = None
+            frontier = self._nodes(found)
+            nodes.extend(dict(node, hop=hop) for node in frontier)
+            if not frontier:
+                break
+        return {
+            "nodes": nodes,
+            "edges": [dict(zip(("src", "dst", "kind", "name"), e)) for e in edges],
+            "truncated": truncated,
+        }
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM symbols").fetchone()[0]
+
+
+@lru_cache(maxsize=None)
+def shared_index(path: str) -> SymbolIndex:
+    """One read-only connection per index file and process (for the API)."""
+    return SymbolIndex.open(Path(path), readonly=True)
@@ -0,0 +1,51 @@
+from fastapi.testclient import TestClient
+
+from src.api.app import app
+from src.api.routes.symbols import get_symbols
+from src.storage.symbol_index import SymbolIndex
+
+def test_symbols_endpoint(tmp_path):
+    index = SymbolIndex.open(tmp_path / "symbols.sqlite")
+    index.replace_file("shop/Widget.cs", [
+        {"type": "class", "name": "WidgetController", "lang": "csharp",
+         "start_byte": 0, "end_byte": 50, "start_point": [0, 0], "end_point": [4, 1]},
+    ])
+    index.commit()
+    app.dependency_overrides[get_symbols] = lambda: index
+    try:
+        client = TestClient(app)
+        exact = client.get("/v1/symbols", params={"name": "WidgetController"}).json()
+        assert exact == [{
+            "name": "WidgetController", "kind": "class", "repo": "shop", "path": "shop/Widget.cs",
+            "lang": "csharp", "container": None, "start_byte": 0, "end_byte": 50,
+            "start_line": 0, "end_line": 4,
+        }]
+        assert client.get("/v1/symbols", params={"prefix": "widg"}).json() == exact
+        assert client.get("/v1/symbols").status_code == 400
+    finally:
+        app.dependency_overrides.clear()
+        index.close()
+
+def test_symbol_graph_endpoint(tmp_path):
+    index = SymbolIndex.open(tmp_path / "symbols.sqlite")
+    index.replace_file("shop/Widget.cs", [
+        {"type": "class", "name": "WidgetController", "lang": "csharp", "bases": ["ControllerBase"],
+         "start_byte": 0, "end_byte": 50, "start_point": [0, 0], "end_point": [4, 1]},
+        {"type": "class", "name": "ControllerBase", "lang": "csharp",
+         "start_byte": 60, "end_byte": 90, "start_point": [5, 0], "end_point": [6, 1]},
+    ])
+    index.commit()
+    app.dependency_overrides[get_symbols] = lambda: index
+    try:
+        client = TestClient(app)
+        graph = client.get("/v1/symbols/graph", params={"name": "ControllerBase", "direction": "in"}).json()
+        assert [(n["name"], n["hop"]) for n in graph["nodes"]] == [("ControllerBase", 0), ("WidgetController", 1)]
+        base, controller = (n["id"] for n in graph["nodes"])
+        assert graph["edges"] == [{"src": controller, "dst": base, "kind": "inherit", "name": "ControllerBase"}]
+        by_id = client.get("/v1/symbols/graph", params={"id": controller, "hops": 2}).json()
+        assert [n["id"] for n in by_id["nodes"]] == [controller, base]
+        assert client.get("/v1/symbols/graph", params={"name": "x", "direction": "up"}).status_code == 422
+        assert client.get("/v1/symbols/graph").status_code == 400
+    finally:
+        app.dependency_overrides.clear()
+        index.close()
@@ -0,0 +1,63 @@
+from src.extractors.utils.classify import VerdictCache, classify
+from src.extractors.utils.hashing import file_hash
+
+LANGS = {".cs": "c_sharp", ".js": "javascript"}
+
+def _write(root, name, data):
+    fp = root / name
+    fp.write_bytes(data)
+    return fp
+
+def _classify(fp, **kw):
+    return classify(fp, fp.stat().st_size, LANGS, **kw)
+
+def test_classify_content(tmp_path):
+    cases = {
+        "a.cs": (b"class A {}\n", ("source", "c_sharp")),
+        "notes.txt": (b"plain text\n", ("text", None)),
+        "run": (b"#!/usr/bin/env -S node --harmony\nconsole.log(1)\n", ("source", "javascript")),
+        "logo.dat": (b"\x89PNG\r\n\x1a\n" + b"\x00" * 32, ("binary", None)),
+        "blob.txt": (b"abc\x00def", ("binary", None)),
+        "app.js": (b"var a=1;" * 200, ("minified", None)),
+        "lib.min.js": (b"var a = 1;\n", ("minified", None)),
+        "Model.Designer.cs": (b"// <auto-generated>\nclass M {}\n", ("generated", None)),
+        "api.pb.cs": (b"/*\n * Generated by the protocol buffer compiler.  DO NOT EDIT!\n */\nclass P {}\n",
+                      ("generated", None)),
+        "song.bin.js": (b"ID3\x03\x00\x00\x00\x00\x00\x10", ("binary", None)),
+        "sound.dat": (b"RIFF\x24\x08\x00\x00WAVEfmt ", ("binary", None)),
+        "schema.sql": ("CREATE TABLE t (id int);\r\nGO\r\n".encode("utf-16"), ("text", None)),
+        "Big.cs": ("\ufeffclass B {}\n".encode("utf-16-be"), ("source", "c_sharp")),
+        # Text that merely starts like a magic number, or mentions a marker in passing
+        "MZ.txt": (b"MZ is the DOS executable signature\n", ("text", None)),
+        "ID3.txt": (b"ID3 tags hold track metadata\n", ("text", None)),
+        "riff.js": (b"RIFF = 'riff';\n", ("source", "javascript")),
+        "tool.cs": (b"class T {}\n// do not edit these defaults\n// DO NOT EDIT below\n", ("source", "c_sharp")),
+        "gen.cs": (b"class G {\n  // <auto-generated> files are skipped\n}\n", ("source", "c_sharp")),
+    }
+    for name, (data, verdict) in cases.items():
+        assert _classify(_write(tmp_path, name, data)) == verdict, name
+    big = _write(tmp_path, "big.cs", b"// x\n" * 100)
+    assert _classify(big, max_bytes=100) == ("oversize", None)
+    assert _classify(big, max_bytes=None) == ("source", "c_sharp")
+
+def test_verdict_cache_keys_on_content(tmp_path):
+    a = _write(tmp_path, "a.cs", b"class A {}\n")
+    cache = VerdictCache.load(tmp_path)
+    assert cache.classify(a, 11, file_hash(a), LANGS) == ("source", "c_sharp")
+    cache.save()
+
+    # Same content elsewhere is answered from the saved cache
+    (tmp_path / "vendor").mkdir()
+    b = _write(tmp_path / "vendor", "b.cs", b"class A {}\n")
+    cache = VerdictCache.load(tmp_path)
+    assert cache.classify(b, 11, file_hash(b), LANGS) == ("source", "c_sharp")
+    assert cache.hits == 1
+
+def test_verdict_cache_prunes_unseen_content(tmp_path):
+    a = _write(tmp_path, "a.cs", b"class A {}\n")
+    b = _write(tmp_path, "b.cs", b"class B {}\n")
+    cache = VerdictCache.load(tmp_path)
+    for fp in (a, b):
+        cache.classify(fp, fp.stat().st_size, file_hash(fp), LANGS)
+    assert cache.prune([file_hash(a)]) == 1
+    assert [key.split(":")[0] for key in cache.entries] == [file_hash(a)]
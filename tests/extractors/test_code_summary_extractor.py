@@ -1,7 +1,6 @@
 import json
-import tempfile
-from pathlib import Path
-from src.extractors.code_summary_extractor import SummaryExtractor, OUT_FILE
+from src.extractors.code_summary_extractor import SummaryExtractor, summarize_part
+from src.extractors.utils.manifest import ExtractionManifest
 
 def test_summary_extractor_basic(tmp_path, monkeypatch):
     # Create a fake input JSON file
@@ -36,3 +35,98 @@ def test_summary_extractor_basic(tmp_path, monkeypatch):
     for f in features:
         assert f["value"].endswith("Controller.cs")
         assert f["group"] == "Controller"
+
+def test_summary_extractor_reads_manifest_paths(tmp_path, monkeypatch):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    # Noted entries are used as they are; the outputs are only read when none were noted
+    (input_dir / "a.cs.json").write_text("not json", encoding="utf-8")
+    (input_dir / "b.cs.json").write_text(json.dumps([{"filepath": "dev/prog/repo/b.cs"}]), encoding="utf-8")
+    ExtractionManifest(input_dir, "8", {
+        "a.cs": {"output": "a.cs.json", "paths": [["dev/prog/repo/Controllers/AController.cs", 2]]},
+        "b.cs": {"output": "b.cs.json"},
+        "logo.png": {"skipped": "binary"},
+    }).save()
+
+    monkeypatch.setattr("src.extractors.code_summary_extractor.INPUT_DIR", input_dir)
+    monkeypatch.setattr("src.extractors.code_summary_extractor.PATTERNS", [
+        {"keyword": "Controller", "file_patterns": ["*Controller.cs"], "directories": ["Controllers/"]}
+    ])
+
+    extractor = SummaryExtractor(debug=False)
+    extractor.walk()
+    assert [(f["value"], f["source_file"], f.get("group")) for f in extractor.features] == [
+        ("dev/prog/repo/Controllers/AController.cs", "a.cs.json", "Controller"),
+        ("dev/prog/repo/Controllers/AController.cs", "a.cs.json", "Controller"),
+        ("dev/prog/repo/b.cs", "b.cs.json", None),
+    ]
+    assert extractor.features[0]["repo"] == "repo" and extractor.features[0]["program"] == "prog"
+
+def test_summary_extractor_run_writes_deduplicated_shards(tmp_path, monkeypatch):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    files = {}
+    for repo in ("alpha", "beta", "gamma"):
+        for name in ("HomeController.cs", "util.cs"):
+            key = f"dev/prog/{repo}/Controllers/{name}"
+            files[key] = {"output": key + ".json", "paths": [[key, 3]]}
+    ExtractionManifest(input_dir, "8", files).save()
+    out_dir = tmp_path / "features"
+    out_dir.mkdir()
+    (out_dir / "part-00009.jsonl").write_text("stale\n", encoding="utf-8")
+
+    monkeypatch.setattr("src.extractors.code_summary_extractor.INPUT_DIR", input_dir)
+    monkeypatch.setattr("src.extractors.code_summary_extractor.PATTERNS", [
+        {"keyword": "Controller", "file_patterns": ["*Controller.cs"], "directories": ["Controllers/"]}
+    ])
+
+    extractor = SummaryExtractor(debug=False)
+    groups = extractor.partition(files, 2)
+    assert sorted(len(g) for g in groups) == [2, 4]
+    assert extractor.run(workers=2, out_dir=out_dir) == (6, 12)
+
+    shards = sorted(out_dir.glob("*.jsonl"))
+    assert [p.name for p in shards] == ["part-00000.jsonl", "part-00001.jsonl"]
+    rows = [json.loads(line) for p in shards for line in p.read_text(encoding="utf-8").splitlines()]
+    assert sorted(r["value"] for r in rows) == sorted(files)
+    assert {r["repo"] for r in rows if r.get("group") == "Controller"} == {"alpha", "beta", "gamma"}
+    # each repo lands in exactly one shard
+    for repo in ("alpha", "beta", "gamma"):
+        assert sum(any(f"/{repo}/" in line for line in p.read_text(encoding="utf-8").splitlines())
+                   for p in shards) == 1
+
+def test_summary_extractor_carries_content_hash(tmp_path, monkeypatch):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    (input_dir / "b.cs.json").write_text(json.dumps([{"filepath": "dev/prog/repo/b.cs", "hash": "bb"}]),
+                                         encoding="utf-8")
+    monkeypatch.setattr("src.extractors.code_summary_extractor.INPUT_DIR", input_dir)
+    monkeypatch.setattr("src.extractors.code_summary_extractor.PATTERNS", [])
+
+    # Without a manifest the hash comes from the records
+    extractor = SummaryExtractor(debug=False)
+    extractor.walk()
+    assert [f["hash"] for f in extractor.features] == ["bb"]
+
+    # With one, from the manifest entry
+    ExtractionManifest(input_dir, "9", {
+        "a.cs": {"output": "a.cs.json", "hash": "aa", "paths": [["dev/prog/repo/a.cs", 2]]},
+        "b.cs": {"output": "b.cs.json"},
+    }).save()
+    extractor = SummaryExtractor(debug=False)
+    extractor.walk()
+    assert [(f["value"], f["hash"]) for f in extractor.features] == [
+        ("dev/prog/repo/a.cs", "aa"), ("dev/prog/repo/a.cs", "aa"), ("dev/prog/repo/b.cs", "bb"),
+    ]
+
+def test_summarize_part_rows_are_unique_on_the_index_key(tmp_path):
+    # Per-file /parse output names files by basename only, so both copies of
+    # util.cs map to the same (repo, value, hash) and only one row is kept
+    files = {
+        f"dev/prog/{repo}/util.cs": {"output": f"{repo}.json", "hash": "hh", "paths": [["util.cs", n]]}
+        for repo, n in (("alpha", 2), ("beta", 1))
+    }
+    out = tmp_path / "part-00000.jsonl"
+    assert summarize_part(tmp_path, files, out, []) == (1, 2)
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [(r["repo"], r["value"], r["hash"]) for r in rows] == [("util.cs", "util.cs", "hh")]
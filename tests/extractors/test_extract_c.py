@@ -0,0 +1,52 @@
+from src.extractors.lang import extract_c
+from src.extractors.lang.extract_c import extract_c_features
+from src.extractors.lang.extract_cpp import extract_cpp_features
+
+HEADER = b"""#include <stdio.h>
+#include "object.h"
+#define SQR(x) \\
+    ((x) * (x))
+#ifdef HAVE_GET
+static PyObject **get(PyObject *self, int n) { PyList *l = 0; return lookup(l, n) ? self->ops->get(n) : 0; }
+#endif
+PyObject *PyObject_Repr(PyObject *);
+typedef struct _obj { int refcnt; char name[8]; } PyObject;
+enum color { RED, GREEN };
+"""
+
+def _types(feats):
+    return [(f["type"], f.get("name") or f.get("path")) for f in feats]
+
+def test_c_definitions_macros_and_includes(tmp_path):
+    fp = tmp_path / "object.c"
+    fp.write_bytes(HEADER)
+    feats = extract_c_features(fp)
+    assert _types(feats) == [
+        ("include", "stdio.h"), ("include", "object.h"), ("macro", "SQR"),
+        ("function", "get"), ("prototype", "PyObject_Repr"),
+        ("typedef", "PyObject"), ("struct", "_obj"), ("enum", "color"),
+    ]
+    by_name = {f.get("name"): f for f in feats}
+    assert feats[0]["system"] and not feats[1]["system"]
+    assert by_name["SQR"]["parameters"] == "(x)" and by_name["SQR"]["end_point"][0] == 4
+    get = by_name["get"]
+    assert get["static"] and get["parameters"] == "(PyObject *self, int n)"
+    assert get["source"].startswith("static PyObject **get(")
+    assert get["calls"] == ["lookup", "get"] and get["types"] == ["PyObject", "PyList"]
+    assert by_name["_obj"]["fields"] == ["refcnt", "name"]
+    assert by_name["color"]["values"] == ["RED", "GREEN"]
+
+def test_cpp_classes_and_parse_timeout(tmp_path, monkeypatch):
+    fp = tmp_path / "widget.hpp"
+    fp.write_bytes(HEADER + b"namespace ui { class Widget : public Base { void draw(); int w() { return 1; } }; }\n")
+    feats = extract_cpp_features(fp)
+    widget = next(f for f in feats if f["type"] == "class")
+    assert widget["name"] == "Widget" and widget["bases"] == ["Base"] and widget["methods"] == ["draw", "w"]
+    assert any(f["type"] == "namespace" and f["name"] == "ui" for f in feats)
+
+    def timeout(*args, **kwargs):
+        raise extract_c.ParseTimeout("too slow")
+    monkeypatch.setattr(extract_c, "extract_features", timeout)
+    assert _types(extract_cpp_features(fp)) == [
+        ("include", "stdio.h"), ("include", "object.h"), ("macro", "SQR"),
+    ]
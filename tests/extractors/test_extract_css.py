@@ -0,0 +1,7 @@
+from src.extractors.lang.extract_css import extract_css_features
+
+def test_css_rule_set_extraction(sample_dir):
+    feats = extract_css_features(sample_dir / "sample.css")
+    assert [f["type"] for f in feats] == ["rule_set"]
+    assert feats[0]["selector"] == "body"
+    assert feats[0]["source"].startswith("body {") and feats[0]["start_point"] == [0, 0]
@@ -0,0 +1,7 @@
+from src.extractors.lang.extract_html import extract_html_features
+
+def test_html_element_extraction(sample_dir):
+    feats = extract_html_features(sample_dir / "sample.html")
+    tags = [f["tag"] for f in feats]
+    assert tags[:2] == ["html", "head"] and "h1" in tags
+    assert feats[0]["attributes"] == {"lang": "en"}
@@ -0,0 +1,5 @@
+from src.extractors.lang.extract_js import extract_js_features
+
+def test_tsx_function_extraction(sample_dir):
+    feats = extract_js_features(sample_dir / "sample.tsx")
+    assert [(f["type"], f["name"]) for f in feats] == [("function", "Hello")]
@@ -0,0 +1,31 @@
+import json
+from src.extractors.lang.extract_json import extract_json_features
+
+def _write(tmp_path, data):
+    fp = tmp_path / "data.json"
+    fp.write_text(data, encoding="utf-8")
+    return fp
+
+def test_json_top_level_keys_with_spans(tmp_path):
+    text = '{"name": "pkg", "deps": {"a": "1.0", "b": [1, 2]}, "empty": {}}'
+    fp = _write(tmp_path, text)
+    feats = extract_json_features(fp)
+    assert [(f["key"], f["value_type"]) for f in feats] == [
+        ("name", "string"), ("deps", "object"), ("empty", "object"),
+    ]
+    deps = feats[1]
+    assert json.loads(text[deps["start_byte"]:deps["end_byte"]]) == {"a": "1.0", "b": [1, 2]}
+    assert deps["source"].startswith('"deps": {')
+
+    nested = extract_json_features(fp, max_depth=2)
+    assert [f["key"] for f in nested] == ["name", "deps.a", "deps.b", "empty"]
+
+def test_json_value_previews_and_feature_count_are_capped(tmp_path):
+    fp = _write(tmp_path, json.dumps({"blob": "x" * 10_000, "items": list(range(50))}))
+    feats = extract_json_features(fp, max_value_bytes=100)
+    assert feats[0]["truncated"] and feats[0]["size"] == 10_002 and len(feats[0]["source"]) < 120
+    assert len(extract_json_features(fp, max_depth=2, max_features=10)) == 10
+
+def test_json_errors_become_error_feature(tmp_path):
+    for bad in ['{"a": [1, 2}', '{"a": 1} 2', '']:
+        assert extract_json_features(_write(tmp_path, bad))[-1]["type"] == "error"
@@ -0,0 +1,65 @@
+from src.extractors.lang.extract_python import extract_python_features
+
+SOURCE = '''"""Widgets. Ünïcode docstring."""
+import os
+from . import util
+
+class Widget(Base, metaclass=Meta):
+    """A widget."""
+
+    @property
+    def size(self) -> int:
+        return 1
+
+    async def fetch(self, url, *, retries=3):
+        data = await self.session.get(url, retries=max(retries, 1))
+        def helper():
+            log(data)
+            pass
+
+try:
+    def fast(): pass
+except ImportError:
+    def fast(): pass
+'''
+
+def test_python_definitions_with_spans(tmp_path):
+    fp = tmp_path / "widgets.py"
+    fp.write_text(SOURCE, encoding="utf-8")
+    feats = extract_python_features(fp)
+    assert [(f["type"], f.get("qualname")) for f in feats] == [
+        ("module", None),
+        ("class", "Widget"),
+        ("function", "Widget.size"),
+        ("function", "Widget.fetch"),
+        ("function", "Widget.fetch.<locals>.helper"),
+        ("function", "fast"),
+        ("function", "fast"),
+    ]
+    module, widget, size, fetch = feats[:4]
+    assert module["name"] == "widgets" and module["imports"] == ["os", "."]
+    assert module["docstring"].startswith("Widgets.")
+    assert widget["bases"] == ["Base"] and widget["methods"] == ["size", "fetch"]
+    assert widget["docstring"] == "A widget."
+    assert size["signature"] == "(self) -> int" and size["decorators"] == ["property"]
+    assert fetch["is_async"] and fetch["signature"] == "(self, url, *, retries=3)"
+    # calls in nested definitions are listed on those
+    assert fetch["calls"] == ["self.session.get", "max"] and feats[4]["calls"] == ["log"]
+    # spans are bytes past the non-ASCII docstring and include decorators
+    assert size["source"].startswith("@property\n    def size")
+    assert size["start_point"] == [7, 4]
+    assert widget["source"].rstrip().endswith("pass")
+
+def test_python_syntax_error_keeps_module(tmp_path):
+    fp = tmp_path / "py2.py"
+    fp.write_text("print 'hello'\n", encoding="utf-8")
+    feats = extract_python_features(fp)
+    assert len(feats) == 1 and "error" in feats[0]
+    assert feats[0]["source"] == "print 'hello'\n"
+
+def test_python_coding_cookie_spans(tmp_path):
+    fp = tmp_path / "legacy.py"
+    fp.write_bytes("# -*- coding: latin-1 -*-\nNAME = 'café'\ndef greet():\n    return 'olé'\n".encode("latin-1"))
+    module, func = extract_python_features(fp)
+    assert "error" not in module and module["end_byte"] == len(module.buffer)
+    assert func["qualname"] == "greet" and func["source"] == "def greet():\n    return 'olé'"
@@ -0,0 +1,58 @@
+from src.extractors.lang.extract_sql import extract_sql_features
+
+SCRIPT = b"""/* CREATE TABLE NotThis (x int)
+GO */
+CREATE TABLE [dbo].[Users] (
+    Id int NOT NULL,
+    Name nvarchar(50) -- (unbalanced comment
+);
+INSERT INTO [dbo].[Users] VALUES (1, 'GO
+CREATE VIEW Nope AS SELECT 1');
+INSERT INTO dbo.Users VALUES (2, 'b');
+GO
+CREATE OR ALTER PROCEDURE dbo.GetUser @id int
+AS
+BEGIN
+    SELECT * FROM dbo.Users WHERE Id = @id;
+END
+
+GO
+CREATE VIEW dbo.ActiveUsers AS SELECT * FROM dbo.Users
+"""
+
+def test_sql_definitions_with_spans_and_insert_summary(tmp_path):
+    fp = tmp_path / "schema.sql"
+    fp.write_bytes(SCRIPT)
+    feats = extract_sql_features(fp)
+    assert [(f["type"], f["name"], f["batch"]) for f in feats[:3]] == [
+        ("table", "dbo.Users", 0), ("procedure", "dbo.GetUser", 1), ("view", "dbo.ActiveUsers", 2),
+    ]
+    for f in feats[:3]:
+        assert SCRIPT[f["start_byte"]:f["end_byte"]].decode() == f["source"]
+    assert feats[0]["source"].endswith(");") and feats[1]["source"].endswith("END")
+    assert feats[1]["start_point"] == [10, 0] and feats[1]["end_point"] == [14, 3]
+    assert feats[3]["type"] == "data" and feats[3]["tables"] == {"dbo.Users": 2}
+
+def test_sql_source_is_capped(tmp_path):
+    fp = tmp_path / "big.sql"
+    fp.write_bytes(b"CREATE PROCEDURE p AS\n" + b"SELECT 1;\n" * 1000)
+    [feat] = extract_sql_features(fp, max_source_bytes=100)
+    assert feat["truncated"] and len(feat["source"]) <= 100 and feat["end_byte"] == fp.stat().st_size - 1
+
+def test_sql_body_keeps_nested_creates_and_temp_tables(tmp_path):
+    fp = tmp_path / "proc.sql"
+    fp.write_bytes(b"""CREATE PROCEDURE dbo.Load AS
+BEGIN
+    CREATE TABLE #tmp (Id int);
+    INSERT INTO #tmp VALUES (1);
+    INSERT INTO dbo.Users SELECT Id, 'x' FROM #tmp;
+END
+GO
+CREATE TABLE #scratch (Id int);
+INSERT INTO #scratch VALUES (1);
+INSERT INTO dbo.Seed VALUES (1);
+""")
+    feats = extract_sql_features(fp)
+    assert [(f["type"], f.get("name")) for f in feats] == [("procedure", "dbo.Load"), ("data", None)]
+    assert feats[0]["source"].endswith("END") and "INSERT INTO dbo.Users" in feats[0]["source"]
+    assert feats[1]["tables"] == {"dbo.Seed": 1}
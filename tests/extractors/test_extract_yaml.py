@@ -0,0 +1,52 @@
+from src.extractors.lang.extract_yaml import extract_yaml_features
+
+MANIFESTS = """# pipeline
+name: CI
+on: [push, pull_request]
+jobs:
+  build:
+    steps:
+      - run: echo "héllo"
+---
+kind: ConfigMap
+data:
+  big: |
+    %s
+---
+- a
+- b
+"""
+
+def test_yaml_documents_and_top_level_keys(tmp_path):
+    fp = tmp_path / "ci.yml"
+    fp.write_text(MANIFESTS % ("x" * 100), encoding="utf-8")
+    data = fp.read_bytes()
+    feats = extract_yaml_features(fp, max_value_bytes=40)
+    assert [(f["type"], f["document"], f.get("key")) for f in feats] == [
+        ("document", 0, None), ("kv", 0, "name"), ("kv", 0, "on"), ("kv", 0, "jobs"),
+        ("document", 1, None), ("kv", 1, "kind"), ("kv", 1, "data"),
+        ("document", 2, None),
+    ]
+    assert [f["value_type"] for f in feats] == [
+        "mapping", "str", "sequence", "mapping", "mapping", "str", "mapping", "sequence",
+    ]
+    assert feats[0]["keys"] == 3
+    jobs = feats[3]
+    # byte spans survive the non-ASCII character
+    assert data[jobs["start_byte"]:jobs["end_byte"]].decode().endswith('echo "héllo"')
+    assert jobs["start_point"] == [3, 0] and jobs["end_point"][0] == 6
+    on = feats[2]
+    assert on["source"] == "on: [push, pull_request]" and not on["truncated"]
+    big = feats[6]
+    assert big["truncated"] and len(big["source"].encode()) == 40
+
+def test_yaml_feature_cap_and_error(tmp_path):
+    fp = tmp_path / "many.yaml"
+    fp.write_text("".join(f"---\nn: {i}\n" for i in range(50)), encoding="utf-8")
+    assert len(extract_yaml_features(fp, max_features=10)) == 10
+
+    bad = tmp_path / "bad.yaml"
+    bad.write_text("a: 1\nb: [1, 2\n", encoding="utf-8")
+    feats = extract_yaml_features(bad)
+    assert [f["type"] for f in feats] == ["document", "kv", "error"]
+    assert feats[0]["end_byte"] == len("a: 1\nb: [1, 2")
@@ -0,0 +1,92 @@
+import os
+from src.extractors.utils.manifest import ExtractionManifest, expand_runs, path_entries
+
+def _extract(manifest, todo, src, out):
+    # Stand-in for the extractor: one output file per source file
+    for fp in todo:
+        rel = fp.relative_to(src)
+        dst = out / (rel.as_posix() + ".json")
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        dst.write_text("[]", encoding="utf-8")
+        manifest.record(rel, dst.relative_to(out).as_posix())
+    manifest.save()
+
+def _plan(manifest, files, src):
+    return list(manifest.plan(((fp, fp.stat()) for fp in files), src))
+
+def test_manifest_skips_unchanged_and_prunes_removed(tmp_path):
+    src, out = tmp_path / "src", tmp_path / "out"
+    (src / "pkg").mkdir(parents=True)
+    a, b = src / "pkg" / "a.cs", src / "b.css"
+    a.write_text("class A {}", encoding="utf-8")
+    b.write_text("body {}", encoding="utf-8")
+
+    m = ExtractionManifest.load(out, "1")
+    todo = _plan(m, [a, b], src)
+    assert sorted(todo) == sorted([a, b]) and m.unchanged == 0
+    _extract(m, todo, src, out)
+
+    # Touched but identical content: skipped on hash
+    st = a.stat()
+    os.utime(a, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+    m = ExtractionManifest.load(out, "1")
+    todo = _plan(m, [a, b], src)
+    assert todo == [] and m.unchanged == 2
+
+    # Edited content is re-extracted; removed file's output is deleted
+    a.write_text("class A { void M() {} }", encoding="utf-8")
+    b.unlink()
+    m = ExtractionManifest.load(out, "1")
+    assert m.prune(["pkg/a.cs"]) == ["b.css"]
+    assert not (out / "b.css.json").exists()
+    todo = _plan(m, [a], src)
+    assert todo == [a]
+
+    # A new extractor version invalidates everything
+    _extract(m, todo, src, out)
+    assert _plan(ExtractionManifest.load(out, "2"), [a], src) == [a]
+
+def test_manifest_remembers_skipped_files(tmp_path):
+    src, out = tmp_path / "src", tmp_path / "out"
+    src.mkdir()
+    png = src / "logo.png"
+    png.write_bytes(b"\x89PNG")
+
+    m = ExtractionManifest.load(out, "1")
+    [fp] = _plan(m, [png], src)
+    assert m.pending_hash(fp.relative_to(src))
+    assert m.skip(fp.relative_to(src), "binary") is None
+    m.save()
+
+    m = ExtractionManifest.load(out, "1")
+    assert _plan(m, [png], src) == [] and m.unchanged == 1
+    assert m.prune([]) == ["logo.png"]
+
+def test_manifest_notes_path_entries_as_runs(tmp_path):
+    src, out = tmp_path / "src", tmp_path / "out"
+    src.mkdir()
+    a = src / "a.py"
+    a.write_text("def f(): pass", encoding="utf-8")
+    records = [{"filepath": "a.py", "type": "function"}] * 3 + ["b.py", {"value": "c.py"}, {"type": "x"}]
+
+    m = ExtractionManifest.load(out, "1")
+    _extract(m, _plan(m, [a], src), src, out)
+    m.set_paths("a.py", records)
+    m.save()
+
+    paths = ExtractionManifest.load(out, "1").files["a.py"]["paths"]
+    assert paths == [["a.py", 3], ["b.py", 1], ["c.py", 1]]
+    assert expand_runs(paths) == path_entries(records) == ["a.py"] * 3 + ["b.py", "c.py"]
+
+def test_manifest_plan_skips_unreadable_files(tmp_path):
+    src, out = tmp_path / "src", tmp_path / "out"
+    src.mkdir()
+    a, gone = src / "a.cs", src / "gone.cs"
+    a.write_text("class A {}", encoding="utf-8")
+    gone.write_text("class B {}", encoding="utf-8")
+    pairs = [(fp, fp.stat()) for fp in (gone, a)]
+    gone.unlink()  # disappears between the walk and the hash
+
+    m = ExtractionManifest.load(out, "1")
+    assert list(m.plan(iter(pairs), src)) == [a]
+    assert m.pending_hash(gone.relative_to(src)) is None
@@ -0,0 +1,24 @@
+from src.extractors.pattern_benchmark import legacy_find
+from src.extractors.utils.patterns import PatternIndex
+from src.storage.pattern_loader import PATTERNS
+
+def _corpus():
+    names = [g.replace("*", "Foo").replace("?", "x") for p in PATTERNS for g in p["file_patterns"]]
+    names += [n.upper() for n in names] + [n + ".json" for n in names] + ["README.md", "foo"]
+    dirs = {d.replace("<FeatureName>", "Cart") for p in PATTERNS for d in p["directories"]}
+    dirs = sorted(dirs) + ["", "lib/", "C:\\dev\\prog\\"]
+    return [f"repo/{d}{n}" for d in dirs for n in names]
+
+def test_pattern_index_matches_fnmatch_loop():
+    index = PatternIndex(PATTERNS)
+    paths = _corpus()
+    verdicts = [index.find(p) for p in paths]
+    assert verdicts == [legacy_find(PATTERNS, p) for p in paths]
+    assert sum(v is not None for v in verdicts) > 500
+    # first match wins; a directory miss falls through to the next pattern
+    assert index.find("src/Views/Home/Index.cshtml")["keyword"] == "View / Partial / Layout"
+    assert index.find("src/Pages/Index.cshtml")["keyword"] == "Razor Page"
+    assert index.find("src/Controllers/HomeController.cs.json")["keyword"] == "Controller"
+    assert index.find("src/HomeController.cs") is None
+    assert index.find("src/hooks/useCart.ts") is None
+    assert index.find("x/ClientApp/src/hooks/useCart.ts")["keyword"] == "React Hook"
@@ -0,0 +1,9 @@
+from pathlib import Path
+from src.extractors.lang import registry
+
+def test_registry_routes_by_suffix(sample_dir):
+    extract = registry.get_extractor(Path("Config.JSON"))
+    assert extract.__name__ == "extract_json_features"
+    assert registry.get_extractor(Path("notes.txt")) is None
+    feats = extract(sample_dir / "sample.json")
+    assert feats and all(f["lang"] == "json" for f in feats)
@@ -0,0 +1,27 @@
+from src.extractors.utils.shards import ShardIndex, ShardReader, ShardWriter, compact, shard_dir
+
+
+def test_shards_round_trip_and_compact(tmp_path):
+    directory = shard_dir(tmp_path)
+    writer = ShardWriter(directory, max_bytes=200)
+    index = ShardIndex(directory)
+    for i in range(10):
+        index.update(f"src/f{i}.cs", writer.write(f"src/f{i}.cs", [{"i": i, "pad": "x" * 40}]))
+    writer.close()
+    index.save()
+    assert len(list(directory.glob("ast-*.jsonl"))) > 1
+
+    reader = ShardReader(tmp_path)
+    assert reader.get("src/f7.cs") == [{"i": 7, "pad": "x" * 40}]
+    assert sorted(rel for rel, _ in reader) == sorted(f"src/f{i}.cs" for i in range(10))
+
+    # Drop most records so the shards are mostly dead bytes
+    for i in range(8):
+        index.remove(f"src/f{i}.cs")
+    assert compact(tmp_path, index, max_bytes=200)
+    reader = ShardReader(tmp_path)
+    assert dict(reader) == {
+        "src/f8.cs": [{"i": 8, "pad": "x" * 40}],
+        "src/f9.cs": [{"i": 9, "pad": "x" * 40}],
+    }
+    assert not compact(tmp_path, index)
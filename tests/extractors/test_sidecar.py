@@ -0,0 +1,18 @@
+from src.extractors.utils.sidecar import iter_jobs
+
+def test_iter_jobs_packs_supported_files_and_skips_vanished(tmp_path):
+    files = []
+    for name in ("a.cs", "b.ts", "gone.js", "notes.txt", "c.css"):
+        fp = tmp_path / name
+        fp.write_text("x = 1\n")
+        files.append(fp)
+    (tmp_path / "gone.js").unlink()
+
+    jobs = list(iter_jobs(files, max_bytes=12, max_files=8))
+    # Unsupported files go out at once; batches when full (6 + 6 bytes here)
+    assert jobs == [
+        ("file", files[3]),
+        ("batch", [files[0], files[1]]),
+        ("batch", [files[4]]),
+    ]
+    assert [kind for kind, _ in iter_jobs(files[:2], max_files=1)] == ["file", "file"]
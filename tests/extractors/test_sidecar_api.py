@@ -0,0 +1,73 @@
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+import tree_sitter_languages
+from fastapi.testclient import TestClient
+
+# The sidecar image builds my-languages.so; the tree_sitter_languages wheel ships the same grammars
+API_DIR = Path(__file__).resolve().parents[2] / "src" / "docker" / "tree_sitter_api"
+os.environ.setdefault("TS_LIB", str(Path(tree_sitter_languages.__file__).with_name("languages.so")))
+sys.path.insert(0, str(API_DIR))
+import app as sidecar  # noqa: E402
+
+CS = b"namespace Shop {\n  public class Cart {\n    public int Total() { return 0; }\n  }\n}\n"
+TS = b"export class Widget {\n  render() {}\n}\nfunction helper() {}\n"
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(sidecar.app) as client:  # runs the startup warm-up
+        yield client
+
+def _symbols(feature):
+    return [(s["kind"], s["name"]) for s in feature["symbols"]]
+
+def test_ready_after_every_parse_thread_is_warm(client):
+    resp = client.get("/ready")
+    assert resp.status_code == 200 and resp.json()["status"] == "ready"
+    assert sorted(resp.json()["languages"]) == sorted(sidecar.SUPPORTED)
+
+    barrier = threading.Barrier(sidecar.PARSE_THREADS)
+    def parsers():
+        barrier.wait(timeout=10)
+        return threading.get_ident(), sorted(getattr(sidecar._local, "parsers", {}))
+    seen = dict(f.result() for f in [sidecar.PARSE_POOL.submit(parsers) for _ in range(sidecar.PARSE_THREADS)])
+    assert len(seen) == sidecar.PARSE_THREADS
+    assert all(langs == sorted(sidecar.SUPPORTED) for langs in seen.values())
+
+def test_parse_returns_symbols(client):
+    resp = client.post("/parse", params={"lang_id": "c_sharp", "include_source": "false"},
+                       files={"file": ("Cart.cs", CS, "text/plain")})
+    [feature] = resp.json()["features"]
+    assert "source" not in feature and feature["filepath"] == "Cart.cs"
+    assert _symbols(feature) == [("namespace", "Shop"), ("class", "Cart"), ("method", "Total")]
+    cart = feature["symbols"][1]
+    assert CS[cart["start_byte"]:cart["end_byte"]].startswith(b"public class Cart")
+
+def test_parse_batch_streams_one_line_per_file(client, monkeypatch):
+    monkeypatch.setattr(sidecar, "log_error", lambda: None)
+    real = sidecar.parse_features
+    def parse_features(code, filename, lang_id, include_source=True):
+        if filename == "bad.ts":
+            raise RuntimeError("boom")
+        return real(code, filename, lang_id, include_source)
+    monkeypatch.setattr(sidecar, "parse_features", parse_features)
+
+    files = [("files", (name, data, "text/plain")) for name, data in
+             (("Cart.cs", CS), ("bad.ts", TS), ("widget.ts", TS))]
+    resp = client.post("/parse/batch", data={"lang_ids": ["c_sharp", "typescript", "typescript"]}, files=files)
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [(r["index"], r["filepath"]) for r in rows] == [(0, "Cart.cs"), (1, "bad.ts"), (2, "widget.ts")]
+    assert rows[1]["error"] == "Internal error: boom" and "features" not in rows[1]
+    [widget] = rows[2]["features"]
+    assert widget["source"] == TS.decode()
+    assert _symbols(widget) == [("class", "Widget"), ("method", "render"), ("function", "helper")]
+
+def test_parse_batch_rejects_mismatched_languages(client):
+    files = [("files", ("a.cs", CS, "text/plain"))]
+    assert client.post("/parse/batch", data={"lang_ids": ["c_sharp", "css"]}, files=files).status_code == 400
+    assert client.post("/parse/batch", data={"lang_ids": ["cobol"]}, files=files).status_code == 400
@@ -0,0 +1,41 @@
+import json
+import pickle
+from src.extractors.utils.spans import Feature, SourceBuffer, to_records, with_sources
+
+def test_feature_source_is_lazy_span(tmp_path):
+    fp = tmp_path / "page.html"
+    fp.write_bytes("<div><p>héllo</p></div>".encode("utf-8"))
+    buf = SourceBuffer.read(fp)
+    outer = Feature(buf, type="element", start_byte=0, end_byte=len(buf))
+    inner = Feature(buf, type="element", start_byte=5, end_byte=len(buf) - 6)
+
+    assert inner["source"] == "<p>héllo</p>" and outer.text() == "<div><p>héllo</p></div>"
+    assert "source" not in inner and inner.get("source") is None
+    assert json.loads(json.dumps(inner)) == {"type": "element", "start_byte": 5, "end_byte": 18}
+    assert pickle.loads(pickle.dumps(inner))["source"] == "<p>héllo</p>"
+    assert buf.text(0, len(buf), max_bytes=4).startswith("<large-slice")
+
+def test_records_store_file_text_once(tmp_path):
+    fp = tmp_path / "a.css"
+    fp.write_bytes(b"a { } b { }")
+    buf = SourceBuffer.read(fp)
+    feats = [Feature(buf, lang="css", type="rule_set", start_byte=s, end_byte=s + 5) for s in (0, 6)]
+
+    records = json.loads(json.dumps(to_records(feats, "a.css")))
+    assert [r["type"] for r in records] == ["file", "rule_set", "rule_set"]
+    assert sum("source" in r for r in records) == 1
+    assert [r["source"] for r in with_sources(records)[1:]] == ["a { }", "b { }"]
+
+def test_records_of_non_utf8_files_slice_back_exactly(tmp_path):
+    cases = {
+        "u16.sql": ("SELECT 'é'; SELECT 2;".encode("utf-16"), "SELECT 2;"),
+        "cp.cs": ("// café\nclass A { }".encode("cp1252"), "class A { }"),
+    }
+    for name, (data, tail) in cases.items():
+        fp = tmp_path / name
+        fp.write_bytes(data)
+        buf = SourceBuffer.read(fp)
+        feat = Feature(buf, type="x", start_byte=len(buf) - len(tail.encode()), end_byte=len(buf))
+        assert feat.text() == tail, name
+        records = json.loads(json.dumps(to_records([feat], name)))
+        assert with_sources(records)[1]["source"] == tail, name
@@ -0,0 +1,40 @@
+from src.extractors.utils.walker import IgnoreRules, walk_files
+
+def _rel(root, **kw):
+    return [p.relative_to(root).as_posix() for p, _ in walk_files(root, **kw)]
+
+def test_walker_prunes_excluded_and_gitignored(tmp_path):
+    files = [
+        "a.cs", "src/b.ts", "src/gen/c.ts", "src/keep.log", "src/x.log",
+        "node_modules/pkg/index.js", "bin/Debug/app.dll", ".github/ci.yml", "docs/readme.md",
+    ]
+    for f in files:
+        (tmp_path / f).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / f).write_text("x", encoding="utf-8")
+    (tmp_path / ".gitignore").write_text("*.log\n/docs/\n", encoding="utf-8")
+    (tmp_path / "src" / ".gitignore").write_text("gen/\n!keep.log\n", encoding="utf-8")
+
+    assert _rel(tmp_path) == [
+        ".gitignore", "a.cs", ".github/ci.yml", "src/.gitignore", "src/b.ts", "src/keep.log",
+    ]
+    assert _rel(tmp_path, skip_hidden=True, suffixes={".ts"}) == ["src/b.ts"]
+    assert "docs/readme.md" in _rel(tmp_path, gitignore=False)
+
+def test_walker_yields_stat(tmp_path):
+    (tmp_path / "f.txt").write_bytes(b"12345")
+    [(path, st)] = list(walk_files(tmp_path))
+    assert path == tmp_path / "f.txt" and st.st_size == 5
+
+def test_ignore_rules_agree_with_walker(tmp_path):
+    root = tmp_path / "build" / "checkout"  # excluded names above the root don't count
+    files = ["a.cs", "src/gen/c.ts", "src/keep.log", "src/x.log", "src/b.ts", "obj/o.cs", "docs/r.md"]
+    for f in files:
+        (root / f).parent.mkdir(parents=True, exist_ok=True)
+        (root / f).write_text("x", encoding="utf-8")
+    (root / ".gitignore").write_text("*.log\n/docs/\n", encoding="utf-8")
+    (root / "src" / ".gitignore").write_text("gen/\n!keep.log\n", encoding="utf-8")
+
+    rules = IgnoreRules(root)
+    walked = set(_rel(root))
+    assert {f for f in files if not rules.ignored(f)} == walked - {".gitignore", "src/.gitignore"}
+    assert rules.ignored("obj", is_dir=True) and not rules.ignored("src", is_dir=True)
@@ -9,6 +9,7 @@ if str(project_root) not in sys.path:
     sys.path.append(str(project_root))
 
 from src.config.settings import settings
+from src.storage.feature_loader import iter_features, unique_features
 
 COLLECTION = "features_test"
 
@@ -40,4 +41,26 @@ def test_feature_loader_script():
     db = client[settings.mongodb_database]
     doc_count = db[COLLECTION].count_documents({})
     assert doc_count > 0, f"Feature loader did not insert any documents! (count={doc_count})"
-    clear_features()
\ No newline at end of file
+    clear_features()
+
+
+def test_iter_features_streams_jsonl_shards(tmp_path):
+    (tmp_path / "part-00001.jsonl").write_text('{"repo": "b", "value": "b.cs"}\n\n', encoding="utf-8")
+    (tmp_path / "part-00000.jsonl").write_text('{"repo": "a", "value": "a.cs"}\n{"repo": "a", "value": "c.cs"}\n',
+                                               encoding="utf-8")
+    rows = list(iter_features(tmp_path))
+    assert [(r["value"], r["source_file"]) for r in rows] == [
+        ("a.cs", "part-00000.jsonl"), ("c.cs", "part-00000.jsonl"), ("b.cs", "part-00001.jsonl"),
+    ]
+    single = tmp_path / "features.json"
+    single.write_text('[{"repo": "a", "value": "a.cs"}]', encoding="utf-8")
+    assert list(iter_features(single)) == [{"repo": "a", "value": "a.cs", "source_file": "features.json"}]
+
+
+def test_unique_features_drops_duplicates_across_shards(tmp_path):
+    (tmp_path / "part-00000.jsonl").write_text(
+        '{"repo": "a", "value": "u.cs", "hash": "h"}\n{"repo": "a", "value": "u.cs", "hash": "g"}\n',
+        encoding="utf-8")
+    (tmp_path / "part-00001.jsonl").write_text('{"repo": "a", "value": "u.cs", "hash": "h"}\n', encoding="utf-8")
+    rows = list(unique_features(iter_features(tmp_path)))
+    assert [(r["hash"], r["source_file"]) for r in rows] == [("h", "part-00000.jsonl"), ("g", "part-00000.jsonl")]
@@ -0,0 +1,79 @@
+from pymongo.errors import OperationFailure, ServerSelectionTimeoutError
+
+from src.storage.pattern_store import PatternStore
+
+CONTROLLER = {"keyword": "Controller", "file_patterns": ["*Controller.cs"], "directories": ["Controllers/"]}
+SERVICE = {"keyword": "Service", "file_patterns": ["*Service.cs"], "directories": []}
+
+class Patterns:
+    """Just enough of a pymongo collection: `find`, and `watch` on replica sets."""
+
+    def __init__(self, docs, replica_set=False):
+        self.docs = docs
+        self.replica_set = replica_set
+        self.changes = []
+        self.reads = 0
+        self.docs_after_first_read = None
+        self.watching = False
+
+    def find(self, query, projection):
+        self.reads += 1
+        docs = [dict(d) for d in self.docs]
+        if self.replica_set and self.reads == 1 and self.docs_after_first_read is not None:
+            # an edit lands while the first read is in progress
+            self.docs = self.docs_after_first_read
+            if self.watching:  # change streams only report edits made after they open
+                self.changes.append({"operationType": "insert"})
+        return docs
+
+    def watch(self):
+        if not self.replica_set:
+            raise OperationFailure("The $changeStream stage is only supported on replica sets")
+        self.watching = True
+        return self
+
+    def try_next(self):
+        return self.changes.pop(0) if self.changes else None
+
+class Unreachable:
+    def find(self, query, projection):
+        raise ServerSelectionTimeoutError("localhost:27017: connection refused")
+
+def test_polls_for_edits_and_snapshots_to_disk(tmp_path):
+    coll = Patterns([CONTROLLER])
+    store = PatternStore(tmp_path / "patterns.json", coll, refresh_seconds=0)
+    seen = []
+    store.subscribe(seen.append)
+    first = store.snapshot()
+    assert first.source == "mongo" and first.index.find("a/Controllers/HomeController.cs")
+
+    assert store.snapshot() is first  # reloaded, same version
+    coll.docs = [SERVICE, CONTROLLER]
+    second = store.snapshot()
+    assert second.version != first.version and seen == [second]
+    assert second.index.find("a/Controllers/BillingService.cs")["keyword"] == "Service"
+
+    # offline: the last snapshot, without touching Mongo
+    offline = PatternStore(tmp_path / "patterns.json", Unreachable(), offline=True).snapshot()
+    assert offline.source == "cache" and offline.version == second.version
+    assert PatternStore(tmp_path / "patterns.json", Unreachable()).snapshot().patterns == second.patterns
+
+def test_change_stream_and_defaults(tmp_path):
+    coll = Patterns([CONTROLLER], replica_set=True)
+    store = PatternStore(tmp_path / "patterns.json", coll, refresh_seconds=0)
+    first = store.snapshot()
+    store.snapshot()
+    assert coll.reads == 1  # no change events, no reload
+    coll.docs = [SERVICE]
+    coll.changes = [{"operationType": "replace"}, {"operationType": "insert"}]
+    assert store.snapshot() is not first and coll.reads == 2 and not coll.changes
+
+    defaults = PatternStore(tmp_path / "missing.json", Unreachable()).snapshot()
+    assert defaults.source == "defaults" and len(defaults) > 50
+
+def test_edit_during_first_load_is_seen(tmp_path):
+    coll = Patterns([CONTROLLER], replica_set=True)
+    coll.docs_after_first_read = [CONTROLLER, SERVICE]
+    store = PatternStore(tmp_path / "patterns.json", coll, refresh_seconds=0)
+    assert len(store.snapshot()) == 1
+    assert len(store.snapshot()) == 2 and coll.reads == 2
@@ -0,0 +1,87 @@
+from src.storage.symbol_index import SymbolIndex
+
+RECORDS = [
+    {"type": "file", "name": "ignored", "source": "..."},
+    {"type": "class", "name": "WidgetController", "lang": "csharp",
+     "start_byte": 10, "end_byte": 200, "start_point": [1, 0], "end_point": [20, 1]},
+    {"type": "method", "name": "GetWidget", "lang": "csharp",
+     "start_byte": 40, "end_byte": 90, "start_point": [4, 4], "end_point": [8, 5]},
+    {"type": "class", "name": "widgetHelper", "lang": "csharp",
+     "start_byte": 210, "end_byte": 260, "start_point": [22, 0], "end_point": [25, 1]},
+]
+
+def test_symbol_index_lookup_prefix_and_replace(tmp_path):
+    path = tmp_path / "symbols.sqlite"
+    index = SymbolIndex.open(path)
+    assert index.is_new
+    assert index.replace_file("shop/src/WidgetController.cs", RECORDS) == 3
+    index.replace_file("admin/src/WidgetController.cs", RECORDS[:2])
+    index.commit()
+
+    hits = index.lookup("WidgetController")
+    assert {h["repo"] for h in hits} == {"shop", "admin"}
+    assert index.lookup("WidgetController", repo="shop")[0]["start_line"] == 1
+    method = index.lookup("GetWidget", repo="shop")[0]
+    assert method["container"] == "WidgetController" and method["kind"] == "method"
+    assert index.lookup("widgetcontroller") == []
+
+    names = [h["name"] for h in index.prefix("widget", repo="shop")]
+    assert names == ["WidgetController", "widgetHelper"]
+
+    # re-extraction replaces a file's rows; removal drops them
+    index.replace_file("shop/src/WidgetController.cs", RECORDS[3:])
+    index.remove_file("admin/src/WidgetController.cs")
+    index.close()
+
+    reader = SymbolIndex.open(path, readonly=True)
+    assert not reader.is_new and len(reader) == 1
+    assert reader.lookup("WidgetController") == []
+
+def _span(start, end):
+    return {"start_byte": start, "end_byte": end, "start_point": [0, 0], "end_point": [0, 0]}
+
+WIDGET = [
+    {"type": "module", "name": "widget", "lang": "python", "imports": ["shop.util"], **_span(0, 300)},
+    {"type": "class", "name": "Widget", "lang": "python", "bases": ["util.Base"], **_span(10, 200)},
+    {"type": "function", "name": "save", "lang": "python", "calls": ["self.validate", "helper"],
+     **_span(40, 90)},
+]
+UTIL = [
+    {"type": "module", "name": "util", "lang": "python", "imports": [], **_span(0, 100)},
+    {"type": "class", "name": "Base", "lang": "python", "bases": [], **_span(0, 40)},
+    {"type": "function", "name": "helper", "lang": "python", "calls": ["open"], **_span(50, 90)},
+]
+
+def test_reference_graph_neighborhood_and_incremental_updates(tmp_path):
+    index = SymbolIndex.open(tmp_path / "symbols.sqlite")
+    index.replace_file("shop/widget.py", WIDGET)
+    index.replace_file("shop/util.py", UTIL)
+    index.replace_file("shop/main.c", [{"type": "include", "path": "lib/util.h", "lang": "c", **_span(0, 20)}])
+    index.replace_file("shop/lib/util.h", [{"type": "include", "path": "stdio.h", "lang": "c", **_span(0, 20)}])
+
+    save = index.symbol_ids("save")
+    graph = index.neighborhood(save)
+    assert [(n["name"], n["hop"]) for n in graph["nodes"]] == [("save", 0), ("helper", 1)]
+    assert {(e["name"], e["kind"], e["dst"] is None) for e in graph["edges"]} == {
+        ("validate", "call", True), ("helper", "call", False)}
+    assert not graph["truncated"]
+
+    two = index.neighborhood(index.symbol_ids("widget"), hops=2, direction="out")
+    assert {n["name"] for n in two["nodes"]} == {"widget", "util"}
+    widget = index.neighborhood(index.symbol_ids("Widget"))
+    assert [n["name"] for n in widget["nodes"]] == ["Widget", "Base"]
+
+    callers = index.neighborhood(index.symbol_ids("helper"), direction="in")
+    assert [n["name"] for n in callers["nodes"]] == ["helper", "save"]
+    includes = index.neighborhood(index.symbol_ids("main.c"))
+    assert [(n["name"], n["kind"]) for n in includes["nodes"]] == [("main.c", "file"), ("util.h", "file")]
+    assert index.neighborhood(save, hops=2, max_nodes=1)["truncated"]
+
+    # re-indexing util.py alone updates what save resolves to
+    index.replace_file("shop/util.py", UTIL[:2])
+    assert [n["name"] for n in index.neighborhood(save)["nodes"]] == ["save"]
+    index.replace_file("shop/util.py", UTIL)
+    assert [n["name"] for n in index.neighborhood(save)["nodes"]] == ["save", "helper"]
+    index.remove_file("shop/widget.py")
+    assert index.neighborhood(index.symbol_ids("helper"), direction="in")["edges"] == []
+    index.close()
@@ -0,0 +1,98 @@
+import os
+from src.extractors.utils.hashing import content_hash
+from src.orchestration.watch import (
+    IncrementalExtractor, PollingWatcher, feature_keys, run, text_edit,
+)
+
+def test_text_edit_trims_common_prefix_and_suffix():
+    old = b"class A {\n  int x;\n}\n"
+    new = b"class A {\n  long x;\n}\n"
+    assert text_edit(old, old) is None
+    start, old_end, new_end, sp, oep, nep = text_edit(old, new)
+    assert old[start:old_end] == b"int" and new[start:new_end] == b"long"
+    assert sp == (1, 2) and oep == (1, 5) and nep == (1, 6)
+    big_old, big_new = b"a" * 10000 + b"x" + b"b" * 9000, b"a" * 10000 + b"yz" + b"b" * 9000
+    assert text_edit(big_old, big_new)[:3] == (10000, 10001, 10002)
+
+def test_feature_keys_are_stable_per_name():
+    feats = [{"type": "kv", "key": "a"}, {"type": "kv", "key": "b"}, {"type": "kv", "key": "a"}]
+    assert feature_keys(feats) == ["kv:a#0", "kv:b#0", "kv:a#1"]
+
+class _Sink:
+    def __init__(self):
+        self.deltas = []
+    def apply(self, delta):
+        self.deltas.append(delta)
+
+def test_watch_pushes_only_changed_json_keys(tmp_path):
+    cfg = tmp_path / "repo" / "cfg.json"
+    cfg.parent.mkdir()
+    cfg.write_text('{"a": 1, "b": 2}', encoding="utf-8")
+    watcher, extractor, sink = PollingWatcher([tmp_path]), IncrementalExtractor(), _Sink()
+
+    st = cfg.stat()
+    os.utime(cfg, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+    run(watcher, extractor, sink, once=True)
+    [first] = sink.deltas
+    assert first.added and [k for k, _ in first.upserts] == ["kv:a#0", "kv:b#0"]
+
+    cfg.write_text('{"a": 1, "b": 3, "c": 4}', encoding="utf-8")
+    os.utime(cfg, ns=(st.st_atime_ns, st.st_mtime_ns + 20_000_000))
+    run(watcher, extractor, sink, once=True)
+    second = sink.deltas[-1]
+    assert not second.added and [k for k, _ in second.upserts] == ["kv:b#0", "kv:c#0"]
+    assert second.upserts[0][1]["filepath"] == "repo/cfg.json"
+    assert second.hash == content_hash(cfg.read_bytes()) != first.hash
+    assert {feat["hash"] for _, feat in second.upserts} == {second.hash}
+
+    cfg.unlink()
+    run(watcher, extractor, sink, once=True)
+    assert sink.deltas[-1].removed and sorted(sink.deltas[-1].deletes) == ["kv:a#0", "kv:b#0", "kv:c#0"]
+
+class _FlakySink(_Sink):
+    def __init__(self):
+        super().__init__()
+        self.fail = False
+    def apply(self, delta):
+        if self.fail:
+            raise ConnectionError("index unavailable")
+        super().apply(delta)
+
+def test_watch_keeps_digests_when_a_removal_fails(tmp_path):
+    cfg = tmp_path / "repo" / "cfg.json"
+    cfg.parent.mkdir()
+    cfg.write_text('{"a": 1}', encoding="utf-8")
+    watcher, extractor, sink = PollingWatcher([tmp_path]), IncrementalExtractor(), _FlakySink()
+    extractor.update(cfg, "repo/cfg.json")
+    extractor.commit("repo/cfg.json")
+
+    cfg.unlink()
+    sink.fail = True
+    run(watcher, extractor, sink, once=True)  # logged, not raised
+    assert "repo/cfg.json" in extractor.digests
+
+    sink.fail = False
+    run(watcher, extractor, sink, once=True)  # retried without a new event
+    assert sink.deltas[-1].removed and sink.deltas[-1].deletes == ["kv:a#0"]
+    assert "repo/cfg.json" not in extractor.digests
+
+def test_watch_retries_an_update_whose_push_failed(tmp_path):
+    cfg = tmp_path / "repo" / "cfg.json"
+    cfg.parent.mkdir()
+    cfg.write_text('{"a": 1, "b": 2}', encoding="utf-8")
+    watcher, extractor, sink = PollingWatcher([tmp_path]), IncrementalExtractor(), _FlakySink()
+    extractor.update(cfg, "repo/cfg.json")
+    extractor.commit("repo/cfg.json")
+
+    st = cfg.stat()
+    cfg.write_text('{"a": 5}', encoding="utf-8")
+    os.utime(cfg, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+    sink.fail = True
+    run(watcher, extractor, sink, once=True)  # logged, not raised
+    assert set(extractor.digests["repo/cfg.json"]) == {"kv:a#0", "kv:b#0"}
+
+    sink.fail = False
+    run(watcher, extractor, sink, once=True)  # retried without a new event
+    [delta] = sink.deltas
+    assert [k for k, _ in delta.upserts] == ["kv:a#0"] and delta.deletes == ["kv:b#0"]
+    assert not extractor.retrying and set(extractor.digests["repo/cfg.json"]) == {"kv:a#0"}